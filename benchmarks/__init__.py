@@ -0,0 +1,8 @@
+#benchmarks/__init__.py
+# civileng.serdar@gmail.com
+"""
+Benchmark suite for the cutting optimizer
+
+    python -m benchmarks.run --suite quick --out results.json
+    python -m benchmarks.run --suite quick --baseline baseline.json
+"""
@@ -0,0 +1,166 @@
+#benchmarks/instances.py
+# civileng.serdar@gmail.com
+"""
+Seeded synthetic rebar schedules
+
+Each profile mimics a kind of bar bending schedule:
+- mixed:    typical building - stirrups, column/beam bars and some long bars
+- stirrups: stirrup/link heavy - many short pieces with large counts
+- long:     long-bar heavy - few pieces close to the stock length
+
+The same (profile, n_types, stock_length, seed) always gives the same
+instance, so results can be compared between runs and machines.
+"""
+
+import math
+import random
+from dataclasses import dataclass
+from typing import List, Tuple, Dict, Iterable
+
+
+LENGTH_STEP = 0.05           # schedules are detailed to 5 cm...
+FINE_LENGTH_STEP = 0.01      # ...or to 1 cm when 5 cm cannot give enough distinct types
+MIN_LENGTH = 0.5
+STOCK_LENGTHS = (6.0, 9.0, 12.0)
+
+# (weight, min_length, max_length, unit) - unit 'm' is metres, 'stock' is
+# a fraction of the stock length
+PROFILES: Dict[str, Tuple[Tuple[float, float, float, str], ...]] = {
+    'mixed': (
+        (0.35, 0.60, 2.40, 'm'),        # stirrups and links
+        (0.45, 0.20, 0.70, 'stock'),    # column / beam bars
+        (0.20, 0.70, 0.98, 'stock'),    # long bars
+    ),
+    'stirrups': (
+        (0.80, 0.50, 2.50, 'm'),
+        (0.20, 0.20, 0.50, 'stock'),
+    ),
+    'long': (
+        (0.15, 1.00, 3.00, 'm'),
+        (0.85, 0.55, 0.98, 'stock'),
+    ),
+}
+
+# Count distribution per profile: (lognormal mu, sigma)
+COUNT_SHAPE = {
+    'mixed': (3.0, 1.4),
+    'stirrups': (5.0, 1.3),
+    'long': (2.0, 1.0),
+}
+
+MAX_COUNT = 10000
+
+
+@dataclass(frozen=True)
+class Instance:
+    """One benchmark instance in the form solve_packing_lexicographic takes"""
+    name: str
+    profile: str
+    lengths: Tuple[float, ...]
+    counts: Tuple[int, ...]
+    bin_capacity: float
+    seed: int
+
+    @property
+    def n_types(self) -> int:
+        return len(self.lengths)
+
+    @property
+    def total_demand(self) -> float:
+        return sum(l * c for l, c in zip(self.lengths, self.counts))
+
+    @property
+    def lower_bound(self) -> int:
+        """
+        Bars lower bound: the continuous bound ceil(demand / stock length),
+        or the number of pieces longer than half a bar (no two share one)
+        """
+        continuous = math.ceil(self.total_demand / self.bin_capacity - 1e-9)
+        long_pieces = sum(c for l, c in zip(self.lengths, self.counts)
+                          if l > self.bin_capacity / 2)
+        return max(continuous, long_pieces)
+
+
+def _band_limits(band: Tuple[float, float, float, str], stock_length: float) -> Tuple[float, float]:
+    _, low, high, unit = band
+    if unit == 'stock':
+        low, high = low * stock_length, high * stock_length
+    return max(low, MIN_LENGTH), min(high, stock_length)
+
+
+def generate_instance(
+    profile: str = 'mixed',
+    n_types: int = 20,
+    stock_length: float = 12.0,
+    seed: int = 0
+) -> Instance:
+    """
+    Generate one schedule with n_types distinct cut lengths
+
+    Args:
+        profile: 'mixed', 'stirrups' or 'long'
+        n_types: Number of distinct cut lengths (5-500 in the suites)
+        stock_length: Stock bar length (m)
+        seed: Random seed
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown profile: {profile} (expected one of {sorted(PROFILES)})")
+
+    rng = random.Random(f"{profile}/{n_types}/{stock_length}/{seed}")
+    bands = PROFILES[profile]
+    weights = [band[0] for band in bands]
+    mu, sigma = COUNT_SHAPE[profile]
+
+    step = LENGTH_STEP
+    if n_types * 4 > (stock_length - MIN_LENGTH) / LENGTH_STEP:
+        step = FINE_LENGTH_STEP
+    max_steps = int(round(stock_length / step))
+    if n_types > max_steps - int(round(MIN_LENGTH / step)) + 1:
+        raise ValueError(f"{n_types} distinct lengths do not fit a {stock_length}m stock")
+
+    lengths = set()
+    attempts = 0
+    while len(lengths) < n_types:
+        attempts += 1
+        low, high = _band_limits(rng.choices(bands, weights)[0], stock_length)
+        if attempts > n_types * 200:
+            # Bands exhausted at this resolution - fill from the whole range
+            low, high = MIN_LENGTH, stock_length
+        steps = rng.randint(int(math.ceil(low / step - 1e-9)), int(high / step + 1e-9))
+        lengths.add(round(min(steps, max_steps) * step, 2))
+
+    ordered = sorted(lengths, reverse=True)
+    counts = [max(1, min(MAX_COUNT, int(rng.lognormvariate(mu, sigma)))) for _ in ordered]
+
+    return Instance(
+        name=f"{profile}-n{n_types}-L{stock_length:g}-s{seed}",
+        profile=profile,
+        lengths=tuple(ordered),
+        counts=tuple(counts),
+        bin_capacity=stock_length,
+        seed=seed
+    )
+
+
+# Suites: (profiles, type counts, stock lengths, seeds)
+SUITES = {
+    'quick': (('mixed', 'stirrups', 'long'), (5, 20), (12.0,), (0,)),
+    'standard': (('mixed', 'stirrups', 'long'), (5, 20, 50, 150), STOCK_LENGTHS, (0, 1)),
+    'large': (('mixed', 'stirrups', 'long'), (150, 300, 500), (12.0,), (0,)),
+}
+
+
+def iter_suite(name: str) -> Iterable[Instance]:
+    """Every instance of a named suite, in a fixed order"""
+    if name not in SUITES:
+        raise ValueError(f"Unknown suite: {name} (expected one of {sorted(SUITES)})")
+    profiles, sizes, stock_lengths, seeds = SUITES[name]
+    for profile in profiles:
+        for n_types in sizes:
+            for stock_length in stock_lengths:
+                for seed in seeds:
+                    yield generate_instance(profile, n_types, stock_length, seed)
+
+
+def suite_instances(name: str) -> List[Instance]:
+    return list(iter_suite(name))
@@ -0,0 +1,298 @@
+#benchmarks/literature.py
+# civileng.serdar@gmail.com
+"""
+Classic 1D bin-packing / cutting-stock instances
+
+Loaders for the standard literature sets in benchmarks/data/. Two
+Falkenauer u1000 and two Schoenfield hard instances are bundled; the full
+sets come from OR-Library / BPPLIB (see benchmarks/data/README.md):
+
+    falkenauer/   OR-Library binpack1.txt ... binpack8.txt (u120-u1000, t60-t501)
+    scholl/       *.BPP / *.txt, one instance per file (N1C1W1_A ... HARD9)
+    schwerin/     *.BPP / *.txt (Schwerin & Wäscher 1997)
+    waescher/     *.BPP / *.txt (Wäscher & Gau 1996)
+    hard28/       *.BPP / *.txt (Schoenfield's hard28)
+
+Single-instance files use the BPPLIB layout: number of items, capacity,
+then one weight per line (a "weight count" pair per line is accepted too).
+OR-Library files carry the best known solution of every instance; for the
+other sets, known optima are read from an optima.csv (name,optimum) next
+to the instance files.
+
+    python -m benchmarks.literature --family hard28 --time-limit 30
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import List, Dict, Optional, Tuple, Iterable
+
+if __package__ in (None, ''):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.instances import Instance
+
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+FAMILIES = ('falkenauer', 'scholl', 'schwerin', 'waescher', 'hard28')
+INSTANCE_EXTENSIONS = ('.bpp', '.txt')
+OPTIMA_FILE = 'optima.csv'
+
+
+@dataclass(frozen=True)
+class LiteratureInstance:
+    """One literature instance - item weights and the known optimum"""
+    name: str
+    family: str
+    weights: Tuple[int, ...]
+    bin_capacity: int
+    optimum: Optional[int] = None
+
+    def to_demand(self) -> Tuple[List[float], List[int], float]:
+        """(lengths, counts, bin_capacity) as solve_packing_lexicographic takes them"""
+        counter = Counter(self.weights)
+        lengths = sorted(counter, reverse=True)
+        return [float(w) for w in lengths], [counter[w] for w in lengths], float(self.bin_capacity)
+
+    def to_instance(self) -> Instance:
+        """Same instance as a benchmark Instance, usable with every engine in run.ENGINES"""
+        lengths, counts, bin_capacity = self.to_demand()
+        return Instance(
+            name=self.name,
+            profile=self.family,
+            lengths=tuple(lengths),
+            counts=tuple(counts),
+            bin_capacity=bin_capacity,
+            seed=0
+        )
+
+
+# ============================================================================
+# PARSERS
+# ============================================================================
+
+def _numbers(text: str) -> List[List[str]]:
+    return [line.split() for line in text.splitlines() if line.strip()]
+
+
+def parse_orlib(text: str, family: str = 'falkenauer') -> List[LiteratureInstance]:
+    """
+    OR-Library binpack format:
+        number of problems
+        then per problem: identifier / "capacity n best_known" / n weights
+    """
+    lines = _numbers(text)
+    n_problems = int(lines[0][0])
+    instances = []
+    pos = 1
+    for _ in range(n_problems):
+        name = lines[pos][0]
+        capacity, n_items, best = (int(float(v)) for v in lines[pos + 1][:3])
+        weights = tuple(int(float(lines[pos + 2 + i][0])) for i in range(n_items))
+        instances.append(LiteratureInstance(name, family, weights, capacity, best))
+        pos += 2 + n_items
+    return instances
+
+
+def parse_bpp(text: str, name: str, family: str, optimum: Optional[int] = None) -> LiteratureInstance:
+    """
+    BPPLIB single-instance format:
+        number of items (or of distinct weights if the lines are "weight count")
+        capacity
+        one weight per line, or "weight count" per line
+    """
+    lines = _numbers(text)
+    n_lines = int(lines[0][0])
+    capacity = int(float(lines[1][0]))
+    weights = []
+    for parts in lines[2:2 + n_lines]:
+        weight = int(float(parts[0]))
+        count = int(parts[1]) if len(parts) > 1 else 1
+        weights.extend([weight] * count)
+    return LiteratureInstance(name, family, tuple(weights), capacity, optimum)
+
+
+def read_optima(directory: str) -> Dict[str, int]:
+    """Known optima from optima.csv (name,optimum) - empty if there is none"""
+    path = os.path.join(directory, OPTIMA_FILE)
+    if not os.path.exists(path):
+        return {}
+    optima = {}
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.reader(f):
+            if len(row) >= 2 and row[1].strip().isdigit():
+                optima[os.path.splitext(row[0].strip())[0]] = int(row[1])
+    return optima
+
+
+# ============================================================================
+# LOADERS
+# ============================================================================
+
+def available_families(data_dir: str = DATA_DIR) -> List[str]:
+    """Families with at least one instance file in data_dir"""
+    return [f for f in FAMILIES if _instance_files(os.path.join(data_dir, f))]
+
+
+def _instance_files(directory: str) -> List[str]:
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.lower().endswith(INSTANCE_EXTENSIONS) and name != OPTIMA_FILE
+    )
+
+
+def _is_orlib(text: str) -> bool:
+    # OR-Library files start with the problem count followed by a name line
+    lines = _numbers(text)
+    return len(lines) > 2 and len(lines[0]) == 1 and not lines[1][0].lstrip('-').isdigit()
+
+
+def load_family(family: str, data_dir: str = DATA_DIR) -> List[LiteratureInstance]:
+    """Every instance of one family, sorted by name"""
+    if family not in FAMILIES:
+        raise ValueError(f"Unknown family: {family} (expected one of {', '.join(FAMILIES)})")
+
+    directory = os.path.join(data_dir, family)
+    files = _instance_files(directory)
+    if not files:
+        raise FileNotFoundError(
+            f"No {family} instances in {directory} - add them as described in "
+            f"benchmarks/data/README.md")
+
+    optima = read_optima(directory)
+    instances = []
+    for path in files:
+        with open(path, encoding='utf-8', errors='replace') as f:
+            text = f.read()
+        if _is_orlib(text):
+            for instance in parse_orlib(text, family):
+                if instance.name in optima:
+                    instance = LiteratureInstance(instance.name, family, instance.weights,
+                                                  instance.bin_capacity, optima[instance.name])
+                instances.append(instance)
+        else:
+            name = os.path.splitext(os.path.basename(path))[0]
+            instances.append(parse_bpp(text, name, family, optima.get(name)))
+    return sorted(instances, key=lambda i: i.name)
+
+
+def iter_instances(families: Iterable[str], data_dir: str = DATA_DIR) -> Iterable[LiteratureInstance]:
+    for family in families:
+        yield from load_family(family, data_dir)
+
+
+# ============================================================================
+# RUNNER
+# ============================================================================
+
+def run_literature(
+    instances: List[LiteratureInstance],
+    engine: str = 'lexicographic',
+    time_limit_ms: int = 30000,
+    progress: bool = True
+) -> List[Dict]:
+    """Solve every instance and compare the bars with the known optimum"""
+    from benchmarks.run import ENGINES
+
+    solve = ENGINES[engine]
+    records = []
+    for literature in instances:
+        start = time.perf_counter()
+        try:
+            result = solve(literature.to_instance(), time_limit_ms)
+            error = None
+        except Exception as e:
+            result, error = None, f"{type(e).__name__}: {e}"
+        elapsed = time.perf_counter() - start
+
+        bars = result['total_bins'] if result else None
+        record = {
+            'instance': literature.name,
+            'family': literature.family,
+            'items': len(literature.weights),
+            'engine': engine,
+            'bars': bars,
+            'optimum': literature.optimum,
+            'hit': bars is not None and literature.optimum is not None and bars <= literature.optimum,
+            'wall_time': round(elapsed, 4),
+            'error': error
+        }
+        records.append(record)
+        if progress:
+            optimum = literature.optimum if literature.optimum is not None else '?'
+            outcome = error or (f"{bars} bars" if bars is not None else 'NO SOLUTION')
+            mark = '✓' if record['hit'] else ' '
+            print(f"{mark} {literature.name:<24} {outcome:<14} opt {optimum:<6} {elapsed:.2f}s", flush=True)
+    return records
+
+
+def summarize(records: List[Dict]) -> List[Dict]:
+    """Per family: instances, optima known, optimal-hit rate, mean/max time, excess bars"""
+    rows = []
+    for family in sorted({r['family'] for r in records}):
+        group = [r for r in records if r['family'] == family]
+        with_optimum = [r for r in group if r['optimum'] is not None]
+        hits = sum(1 for r in with_optimum if r['hit'])
+        excess = sum(r['bars'] - r['optimum'] for r in with_optimum if r['bars'] is not None)
+        times = [r['wall_time'] for r in group]
+        rows.append({
+            'family': family,
+            'instances': len(group),
+            'with_optimum': len(with_optimum),
+            'optimal_hits': hits,
+            'hit_rate': (hits / len(with_optimum) * 100) if with_optimum else None,
+            'unsolved': sum(1 for r in group if r['bars'] is None),
+            'excess_bars': excess,
+            'mean_time': sum(times) / len(times),
+            'max_time': max(times)
+        })
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the optimizer on literature instances")
+    parser.add_argument('--family', action='append', choices=FAMILIES,
+                        help="Family to run (repeatable, default: every family present)")
+    parser.add_argument('--engine', default='lexicographic')
+    parser.add_argument('--time-limit', type=float, default=30.0,
+                        help="Time limit per solver phase in seconds")
+    parser.add_argument('--limit', type=int, help="Run only the first N instances per family")
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    args = parser.parse_args(argv)
+
+    families = args.family or available_families(args.data_dir)
+    if not families:
+        print(f"No instance files found in {args.data_dir} - add them as described in "
+              f"benchmarks/data/README.md", file=sys.stderr)
+        return 1
+
+    instances = []
+    for family in families:
+        try:
+            loaded = load_family(family, args.data_dir)
+        except FileNotFoundError as e:
+            print(e, file=sys.stderr)
+            return 1
+        instances.extend(loaded[:args.limit] if args.limit else loaded)
+
+    records = run_literature(instances, args.engine, int(args.time_limit * 1000))
+
+    print(f"\n{'FAMILY':<12} {'N':>5} {'OPT':>5} {'HITS':>5} {'HIT%':>7} {'+BARS':>6} "
+          f"{'MEAN(s)':>8} {'MAX(s)':>8}")
+    print("-" * 62)
+    for row in summarize(records):
+        hit_rate = f"{row['hit_rate']:.1f}" if row['hit_rate'] is not None else '-'
+        print(f"{row['family']:<12} {row['instances']:>5} {row['with_optimum']:>5} "
+              f"{row['optimal_hits']:>5} {hit_rate:>7} {row['excess_bars']:>6} "
+              f"{row['mean_time']:>8.2f} {row['max_time']:>8.2f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,315 @@
+#benchmarks/run.py
+# civileng.serdar@gmail.com
+"""
+Benchmark runner
+
+Solves every instance of a suite with every registered engine and writes
+wall time, peak memory, bars, waste and gap to a JSON results file.
+With --baseline the run is compared against an earlier results file and
+regressions are listed (exit code 1 if any).
+
+    python -m benchmarks.run --suite quick --out results.json
+    python -m benchmarks.run --suite standard --baseline baseline.json
+    python -m benchmarks.run --suite quick --engines lexicographic --save-baseline baseline.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import List, Dict, Optional, Callable
+
+if __package__ in (None, ''):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calculations import solve_packing_lexicographic
+from benchmarks.instances import Instance, SUITES, suite_instances
+
+
+# ============================================================================
+# ENGINES
+# Each engine takes (instance, time_limit_ms) and returns a result dict in
+# the solve_packing_lexicographic format, or None if it found no solution.
+# ============================================================================
+
+def _lexicographic(solver_backend: str, mode: str = 'exact') -> Callable[[Instance, int], Optional[Dict]]:
+    def run(instance: Instance, time_limit_ms: int) -> Optional[Dict]:
+        return solve_packing_lexicographic(
+            lengths=list(instance.lengths),
+            counts=list(instance.counts),
+            bin_capacity=instance.bin_capacity,
+            phase1_time_limit_ms=time_limit_ms,
+            phase2_time_limit_ms=time_limit_ms,
+            verbose=False,
+            print_output=False,
+            solver_backend=solver_backend,
+            mode=mode
+        )
+    return run
+
+
+def _multi_stock(instance: Instance, time_limit_ms: int) -> Optional[Dict]:
+    """Multi-stock engine on the instance's one stock length - bars stay comparable"""
+    from multistock import solve_multi_stock
+
+    return solve_multi_stock(
+        lengths=list(instance.lengths),
+        counts=list(instance.counts),
+        stocks=[instance.bin_capacity],
+        phase1_time_limit_ms=time_limit_ms,
+        phase2_time_limit_ms=time_limit_ms,
+        verbose=False
+    )
+
+
+ENGINES: Dict[str, Callable[[Instance, int], Optional[Dict]]] = {
+    'lexicographic': _lexicographic('SCIP'),
+    'cbc': _lexicographic('CBC'),
+    'cp-sat': _lexicographic('CP-SAT'),
+    'greedy': _lexicographic('greedy'),
+    'portfolio': _lexicographic('portfolio'),
+    'residual': _lexicographic('SCIP', mode='residual'),
+    'decomposition': _lexicographic('SCIP', mode='decomposition'),
+    'multi-stock': _multi_stock,
+}
+
+
+# ============================================================================
+# RUNNING
+# ============================================================================
+
+RECORD_FIELDS = [
+    'instance', 'profile', 'n_types', 'stock_length', 'engine', 'status',
+    'wall_time', 'peak_memory_mb', 'bars', 'lower_bound', 'gap', 'solver_gap',
+    'waste', 'waste_percentage', 'error'
+]
+
+
+def _solver_gap(result: Dict) -> Optional[float]:
+    """Relative MIP gap of the last Phase 1 solve, if the engine reports it"""
+    levels = (result.get('stats') or {}).get('levels') or []
+    for level in reversed(levels):
+        if level.get('phase1'):
+            return level['phase1'].get('gap')
+    return None
+
+
+def run_case(
+    instance: Instance,
+    engine: str,
+    time_limit_ms: int = 30000,
+    memory: bool = True
+) -> Dict:
+    """
+    Solve one instance with one engine
+
+    Peak memory comes from a second, separate run under tracemalloc so the
+    tracing overhead does not distort the wall time. It counts Python
+    allocations only - the solver's native memory is not included.
+    """
+    solve = ENGINES[engine]
+    record = {
+        'instance': instance.name,
+        'profile': instance.profile,
+        'n_types': instance.n_types,
+        'stock_length': instance.bin_capacity,
+        'engine': engine,
+        'status': 'ok',
+        'wall_time': None,
+        'peak_memory_mb': None,
+        'bars': None,
+        'lower_bound': instance.lower_bound,
+        'gap': None,
+        'solver_gap': None,
+        'waste': None,
+        'waste_percentage': None,
+        'error': None
+    }
+
+    try:
+        start = time.perf_counter()
+        result = solve(instance, time_limit_ms)
+        record['wall_time'] = round(time.perf_counter() - start, 4)
+
+        if memory:
+            tracemalloc.start()
+            try:
+                solve(instance, time_limit_ms)
+                record['peak_memory_mb'] = round(tracemalloc.get_traced_memory()[1] / 1e6, 3)
+            finally:
+                tracemalloc.stop()
+    except Exception as e:
+        record['status'] = 'error'
+        record['error'] = f"{type(e).__name__}: {e}"
+        return record
+
+    if not result:
+        record['status'] = 'no_solution'
+        return record
+
+    bars = result['total_bins']
+    record['bars'] = bars
+    record['gap'] = round((bars - instance.lower_bound) / instance.lower_bound * 100, 3)
+    record['solver_gap'] = _solver_gap(result)
+    record['waste'] = round(result['total_waste'], 4)
+    record['waste_percentage'] = round(result['waste_percentage'], 3)
+    return record
+
+
+def run_suite(
+    instances: List[Instance],
+    engines: List[str],
+    time_limit_ms: int = 30000,
+    memory: bool = True,
+    progress: bool = True
+) -> List[Dict]:
+    records = []
+    for instance in instances:
+        for engine in engines:
+            record = run_case(instance, engine, time_limit_ms, memory)
+            records.append(record)
+            if progress:
+                print(_format_record(record), flush=True)
+    return records
+
+
+def _format_record(record: Dict) -> str:
+    if record['status'] != 'ok':
+        outcome = record['error'] or 'NO SOLUTION'
+    else:
+        memory = f"{record['peak_memory_mb']:.1f}MB" if record['peak_memory_mb'] is not None else '-'
+        outcome = (f"{record['bars']:>6} bars (LB {record['lower_bound']}, gap {record['gap']:.2f}%)  "
+                   f"waste {record['waste']:.2f}m  {record['wall_time']:.2f}s  {memory}")
+    return f"{record['instance']:<28} {record['engine']:<14} {outcome}"
+
+
+def save_results(records: List[Dict], filename: str, suite: str, time_limit_ms: int):
+    try:
+        from ortools import __version__ as ortools_version
+    except ImportError:
+        ortools_version = None
+
+    payload = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'suite': suite,
+        'time_limit_ms': time_limit_ms,
+        'python': platform.python_version(),
+        'ortools': ortools_version,
+        'platform': platform.platform(),
+        'records': records
+    }
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, indent=1)
+
+
+def load_results(filename: str) -> List[Dict]:
+    with open(filename, encoding='utf-8') as f:
+        return json.load(f)['records']
+
+
+# ============================================================================
+# BASELINE COMPARISON
+# ============================================================================
+
+def compare_results(
+    records: List[Dict],
+    baseline: List[Dict],
+    time_tolerance: float = 0.25,
+    min_time_delta: float = 0.05,
+    memory_tolerance: float = 0.25,
+    waste_tolerance: float = 1e-3
+) -> List[str]:
+    """
+    Regressions of records against a baseline run, one line each
+
+    Flags cases that stopped solving, need more bars, waste more, or got
+    slower / bigger by more than the relative tolerance. Cases missing
+    from the baseline are ignored.
+    """
+    reference = {(r['instance'], r['engine']): r for r in baseline}
+    regressions = []
+
+    for record in records:
+        key = (record['instance'], record['engine'])
+        base = reference.get(key)
+        if base is None:
+            continue
+        label = f"{record['instance']} [{record['engine']}]"
+
+        if base['status'] == 'ok' and record['status'] != 'ok':
+            regressions.append(f"{label}: {record['status']} (baseline solved)")
+            continue
+        if record['status'] != 'ok' or base['status'] != 'ok':
+            continue
+
+        if record['bars'] > base['bars']:
+            regressions.append(f"{label}: bars {base['bars']} → {record['bars']}")
+        elif record['bars'] == base['bars'] and record['waste'] > base['waste'] + waste_tolerance:
+            regressions.append(f"{label}: waste {base['waste']:.3f}m → {record['waste']:.3f}m")
+
+        base_time, time_now = base['wall_time'], record['wall_time']
+        if (time_now - base_time > min_time_delta and
+                time_now > base_time * (1 + time_tolerance)):
+            regressions.append(f"{label}: time {base_time:.2f}s → {time_now:.2f}s")
+
+        base_memory, memory_now = base.get('peak_memory_mb'), record.get('peak_memory_mb')
+        if (base_memory is not None and memory_now is not None and
+                memory_now > base_memory * (1 + memory_tolerance)):
+            regressions.append(f"{label}: memory {base_memory:.1f}MB → {memory_now:.1f}MB")
+
+    return regressions
+
+
+# ============================================================================
+# COMMAND LINE
+# ============================================================================
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Cutting optimizer benchmark suite")
+    parser.add_argument('--suite', default='quick', choices=sorted(SUITES))
+    parser.add_argument('--engines', default=','.join(ENGINES),
+                        help=f"Comma-separated engines (available: {', '.join(ENGINES)})")
+    parser.add_argument('--time-limit', type=float, default=30.0,
+                        help="Time limit per solver phase in seconds")
+    parser.add_argument('--no-memory', action='store_true',
+                        help="Skip the tracemalloc pass (halves the run time)")
+    parser.add_argument('--out', default='benchmark_results.json', help="Results file")
+    parser.add_argument('--baseline', help="Compare against this results file")
+    parser.add_argument('--save-baseline', help="Also write the results to this baseline file")
+    parser.add_argument('--time-tolerance', type=float, default=0.25,
+                        help="Allowed relative slowdown before flagging (default 0.25)")
+    args = parser.parse_args(argv)
+
+    engines = [e.strip() for e in args.engines.split(',') if e.strip()]
+    unknown = [e for e in engines if e not in ENGINES]
+    if unknown:
+        parser.error(f"Unknown engine(s): {', '.join(unknown)}")
+
+    time_limit_ms = int(args.time_limit * 1000)
+    records = run_suite(suite_instances(args.suite), engines, time_limit_ms,
+                        memory=not args.no_memory)
+
+    save_results(records, args.out, args.suite, time_limit_ms)
+    print(f"\nResults written to {args.out}")
+    if args.save_baseline:
+        save_results(records, args.save_baseline, args.suite, time_limit_ms)
+        print(f"Baseline written to {args.save_baseline}")
+
+    if args.baseline:
+        regressions = compare_results(records, load_results(args.baseline),
+                                      time_tolerance=args.time_tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} REGRESSION(S) against {args.baseline}:")
+            for line in regressions:
+                print(f"  ✗ {line}")
+            return 1
+        print(f"\nNo regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -12,18 +12,391 @@ FIXED VERSION:
 """
 
 from ortools.linear_solver import pywraplp
+import bisect
+import contextvars
+import functools
+import inspect
+import logging
 import math
-from typing import List, Tuple, Dict, Optional
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import List, Tuple, Dict, Optional, Callable, Any
 
+import numpy as np
 
+from patterns import PatternStore
+
+
+# ============================================================================
+# INSTRUMENTATION (opt-in)
+# Spans around the hot paths are only timed while at least one subscriber
+# is registered; otherwise span() returns a shared no-op context manager.
+# ============================================================================
+
+_span_subscribers: List[Callable[[Dict], None]] = []
+
+
+class _NullSpan:
+    """Span used while instrumentation is off - does nothing"""
+    __slots__ = ()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        return False
+    
+    def set(self, **fields):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """Timed span - reports {'name', 'duration', 'fields', 'error'} to subscribers"""
+    __slots__ = ('name', 'fields', 'start')
+    
+    def __init__(self, name: str, fields: Dict):
+        self.name = name
+        self.fields = fields
+        self.start = 0.0
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        event = {
+            'name': self.name,
+            'duration': time.perf_counter() - self.start,
+            'fields': self.fields,
+            'error': repr(exc) if exc is not None else None
+        }
+        for callback in list(_span_subscribers):
+            callback(event)
+        return False
+    
+    def set(self, **fields):
+        """Attach result fields (pattern count, status, ...) before the span closes"""
+        self.fields.update(fields)
+
+
+def span(name: str, **fields):
+    """
+    Context manager around a hot path
+    
+    Spans: 'diameter', 'adaptive_loop', 'generate_patterns', 'phase1', 'phase2'
+    """
+    if not _span_subscribers:
+        return _NULL_SPAN
+    return _Span(name, fields)
+
+
+def subscribe(callback: Callable[[Dict], None]) -> Callable[[Dict], None]:
+    """Register a span subscriber (called with one event dict per closed span)"""
+    _span_subscribers.append(callback)
+    return callback
+
+
+def unsubscribe(callback: Callable[[Dict], None]):
+    """Remove a span subscriber"""
+    if callback in _span_subscribers:
+        _span_subscribers.remove(callback)
+
+
+def profile_solve(
+    output_path: str,
+    solve_func: Callable,
+    *args,
+    memory: bool = True,
+    top: int = 40,
+    **kwargs
+) -> Any:
+    """
+    Run one solve under cProfile (and tracemalloc) and write a text report
+    
+    The report lists every span, the top functions by cumulative time and,
+    with memory=True, peak memory and the top allocation sites. The raw
+    cProfile data is written next to it as <output_path>.prof.
+    
+    Example:
+        profile_solve('ticket_1234.txt', solve_packing_lexicographic,
+                      lengths, counts, bin_capacity=12.0, verbose=False)
+    
+    Returns:
+        Whatever solve_func returns
+    """
+    import cProfile
+    import io
+    import pstats
+    import tracemalloc
+    
+    events = []
+    collector = subscribe(events.append)
+    profiler = cProfile.Profile()
+    if memory:
+        tracemalloc.start(10)
+    
+    wall_start = time.perf_counter()
+    try:
+        profiler.enable()
+        try:
+            result = solve_func(*args, **kwargs)
+        finally:
+            profiler.disable()
+        wall_time = time.perf_counter() - wall_start
+        if memory:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+    finally:
+        if memory:
+            tracemalloc.stop()
+        unsubscribe(collector)
+    
+    profiler.dump_stats(output_path + '.prof')
+    
+    out = io.StringIO()
+    out.write("=" * 70 + "\n")
+    out.write(f"PROFILE: {getattr(solve_func, '__name__', solve_func)}\n")
+    out.write("=" * 70 + "\n")
+    out.write(f"Wall time: {wall_time:.3f}s\n")
+    if memory:
+        out.write(f"Peak traced memory: {peak / 1e6:.1f} MB (current {current / 1e6:.1f} MB)\n")
+    
+    out.write("\nSPANS\n" + "-" * 70 + "\n")
+    for event in events:
+        fields = ", ".join(f"{k}={v}" for k, v in event['fields'].items())
+        error = f"  ERROR {event['error']}" if event['error'] else ""
+        out.write(f"{event['name']:<20} {event['duration']:>9.3f}s  {fields}{error}\n")
+    
+    out.write(f"\nTOP {top} FUNCTIONS (cumulative)\n" + "-" * 70 + "\n")
+    pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(top)
+    
+    if memory:
+        out.write(f"\nTOP {top} ALLOCATION SITES\n" + "-" * 70 + "\n")
+        for stat in snapshot.statistics('lineno')[:top]:
+            out.write(f"{stat}\n")
+    
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(out.getvalue())
+    
+    return result
+
+
+# ============================================================================
+# LOGGING
+# Diagnostics go to the 'calculations' logger, result tables to
+# 'calculations.report'. Every record carries the structured fields
+# diameter, phase and efficiency (None when not set). verbose/print_output
+# only add a plain console handler if the application configured none.
+# ============================================================================
+
+logger = logging.getLogger('calculations')
+report_logger = logging.getLogger('calculations.report')
+
+LOG_FIELDS = ('diameter', 'phase', 'efficiency')
+_log_context: contextvars.ContextVar = contextvars.ContextVar('calculations_log_context', default={})
+
+
+class _ContextFilter(logging.Filter):
+    """Adds the current solve context (diameter, phase, efficiency) to records"""
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        context = _log_context.get()
+        for field in LOG_FIELDS:
+            if not hasattr(record, field):
+                setattr(record, field, context.get(field))
+        return True
+
+
+logger.addFilter(_ContextFilter())
+report_logger.addFilter(_ContextFilter())
+logger.addHandler(logging.NullHandler())   # library default: silent unless configured
+
+
+def _logging_configured() -> bool:
+    """True if the application (or an outer console_output) attached a real handler"""
+    handlers = logger.handlers + logging.getLogger().handlers
+    return any(not isinstance(h, logging.NullHandler) for h in handlers)
+
+
+@contextmanager
+def log_context(**fields):
+    """Set structured log fields (e.g. diameter=12) for the enclosed block"""
+    token = _log_context.set({**_log_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _log_context.reset(token)
+
+
+class _ConsoleHandler(logging.StreamHandler):
+    """Plain console output for verbose / print_output"""
+    
+    def __init__(self, verbose: bool, print_output: bool):
+        super().__init__(sys.stdout)
+        self.setFormatter(logging.Formatter('%(message)s'))
+        self.verbose = verbose
+        self.print_output = print_output
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.name == report_logger.name:
+            return self.print_output
+        return self.verbose
+
+
+@contextmanager
+def console_output(verbose: bool, print_output: bool = False):
+    """
+    Print log records to stdout for the enclosed block, like the old
+    print-based verbose mode - unless logging is already configured
+    (a handler on the logger or root) or a console is already attached.
+    """
+    if not (verbose or print_output) or _logging_configured():
+        yield
+        return
+    
+    handler = _ConsoleHandler(verbose, print_output)
+    previous_level = logger.level
+    logger.addHandler(handler)
+    logger.setLevel(logging.DEBUG if verbose else logging.INFO)
+    try:
+        yield
+    finally:
+        logger.removeHandler(handler)
+        logger.setLevel(previous_level)
+
+
+def _console_args(func):
+    """Wrap func in console_output() driven by its verbose / print_output arguments"""
+    signature = inspect.signature(func)
+    defaults = {name: signature.parameters[name].default
+                for name in ('verbose', 'print_output') if name in signature.parameters}
+    
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _logging_configured():
+            return func(*args, **kwargs)
+        arguments = signature.bind_partial(*args, **kwargs).arguments
+        verbose = arguments.get('verbose', defaults.get('verbose', False))
+        print_output = arguments.get('print_output', defaults.get('print_output', False))
+        with console_output(verbose, print_output):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+class CallbackHandler(logging.Handler):
+    """Forwards log records to a callable, e.g. a GUI status bar updater"""
+    
+    def __init__(self, callback: Callable[[logging.LogRecord], None], level: int = logging.INFO):
+        super().__init__(level)
+        self.callback = callback
+    
+    def emit(self, record: logging.LogRecord):
+        try:
+            self.callback(record)
+        except Exception:
+            self.handleError(record)
+
+
+@contextmanager
+def log_to(callback: Callable[[logging.LogRecord], None], level: int = logging.INFO):
+    """Route diagnostic records of the enclosed block to callback"""
+    handler = CallbackHandler(callback, level)
+    handler.addFilter(lambda record: record.name != report_logger.name)
+    previous_level = logger.level
+    logger.addHandler(handler)
+    if logger.getEffectiveLevel() > level:
+        logger.setLevel(level)
+    try:
+        yield handler
+    finally:
+        logger.removeHandler(handler)
+        logger.setLevel(previous_level)
+
+
+SOLVER_STATUS_NAMES = {
+    pywraplp.Solver.OPTIMAL: 'OPTIMAL',
+    pywraplp.Solver.FEASIBLE: 'FEASIBLE',
+    pywraplp.Solver.INFEASIBLE: 'INFEASIBLE',
+    pywraplp.Solver.UNBOUNDED: 'UNBOUNDED',
+    pywraplp.Solver.ABNORMAL: 'ABNORMAL',
+    pywraplp.Solver.NOT_SOLVED: 'NOT_SOLVED',
+}
+
+# Phase 1 backends: MIP solvers through pywraplp, native CP-SAT, the
+# greedy heuristic, a parallel race of all of them ('portfolio', see
+# portfolio.py), or 'auto' - the past race winner for this instance class.
+MIP_BACKENDS = ('SCIP', 'CBC')
+EXACT_BACKENDS = MIP_BACKENDS + ('CP-SAT',)
+SOLVER_BACKENDS = EXACT_BACKENDS + ('greedy', 'portfolio', 'auto')
+SOLVE_MODES = ('exact', 'residual')
+PACKING_MODES = SOLVE_MODES + ('decomposition',)
+
+# CP-SAT works on integers: waste is scaled to millimetres
+CPSAT_WASTE_SCALE = 1000
+CPSAT_WORKERS = os.cpu_count() or 1
+
+
+def _create_solver(backend: str = 'SCIP') -> 'pywraplp.Solver':
+    """pywraplp solver for a MIP backend (SCIP falls back to CBC)"""
+    if backend not in MIP_BACKENDS:
+        raise ValueError(f"Unknown MIP backend: {backend} (expected one of {', '.join(MIP_BACKENDS)})")
+    
+    solver = pywraplp.Solver.CreateSolver(backend)
+    if not solver and backend == 'SCIP':
+        solver = pywraplp.Solver.CreateSolver('CBC')
+    if not solver:
+        raise RuntimeError(f"{backend} is not available in this OR-Tools build")
+    return solver
+
+
+def _record_solver_stats(
+    stats: Optional[Dict],
+    solver: 'pywraplp.Solver',
+    status: int,
+    build_time: float,
+    solve_time: float,
+    backend: Optional[str] = None
+):
+    """Fill a phase statistics dict (no-op if stats is None)"""
+    if stats is None:
+        return
+    
+    stats['solver'] = solver.SolverVersion()
+    stats['backend'] = backend
+    stats['build_time'] = build_time
+    stats['solve_time'] = solve_time
+    stats['status'] = SOLVER_STATUS_NAMES.get(status, str(status))
+    stats['variables'] = solver.NumVariables()
+    stats['constraints'] = solver.NumConstraints()
+    stats['nodes'] = solver.nodes()
+    
+    if status in (pywraplp.Solver.OPTIMAL, pywraplp.Solver.FEASIBLE):
+        objective = solver.Objective().Value()
+        best_bound = solver.Objective().BestBound()
+        stats['objective'] = objective
+        stats['best_bound'] = best_bound
+        stats['gap'] = abs(objective - best_bound) / max(abs(objective), 1e-9)
+    else:
+        stats['objective'] = None
+        stats['best_bound'] = None
+        stats['gap'] = None
+
+
+@_console_args
 def generate_comprehensive_patterns(
     lengths: List[float],
     counts: List[int],  # ← FIXED: Added counts parameter
     bin_capacity: float = 12.0, 
     min_efficiency: float = 0.85,
     max_patterns: int = 500,
-    verbose: bool = False
-) -> Tuple[List[List[int]], List[Dict]]:
+    verbose: bool = False,
+    capacities: Optional[Dict[float, float]] = None
+) -> PatternStore:
     """
     Generate comprehensive pattern pool
     
@@ -35,7 +408,22 @@ def generate_comprehensive_patterns(
     2. Two-type combinations
     3. Three-type combinations (most common)
     4. Greedy fill patterns (maximum utilization)
+    
+    Returns the best max_patterns patterns (lowest waste first) as a sparse
+    PatternStore; duplicates are dropped by their sparse form.
+    
+    capacities: {stock length: min efficiency} to generate for several stock
+        lengths in one pass (bin_capacity and min_efficiency are then
+        ignored). A pattern is kept if it is efficient enough on some stock
+        it fits, waste is measured on the shortest such stock, and the best
+        max_patterns are kept per stock length. The store is at the longest.
     """
+    if capacities:
+        stock_efficiency = sorted(capacities.items())
+        bin_capacity = stock_efficiency[-1][0]
+    else:
+        stock_efficiency = [(bin_capacity, min_efficiency)]
+    
     n_types = len(lengths)
     max_per_type = [int(bin_capacity // l) for l in lengths]
     
@@ -44,44 +432,49 @@ def generate_comprehensive_patterns(
     
     # SMART EFFICIENCY: For small orders, relax efficiency constraint
     total_demand = sum(lengths[i] * counts[i] for i in range(n_types))
-    demand_ratio = total_demand / bin_capacity
+    demand_ratio = total_demand / stock_efficiency[0][0]
     
     # If demand is less than 50% of one bar, allow any efficiency
-    effective_min_efficiency = min_efficiency
     if demand_ratio < 0.5:
-        effective_min_efficiency = 0.0
-        if verbose:
-            print(f"  ℹ Small order detected ({demand_ratio*100:.1f}% of bar)")
-            print(f"  → Efficiency constraint relaxed (any pattern accepted)")
+        stock_efficiency = [(capacity, 0.0) for capacity, _ in stock_efficiency]
+        logger.info("  ℹ Small order detected (%.1f%% of bar)", demand_ratio * 100)
+        logger.info("  → Efficiency constraint relaxed (any pattern accepted)")
+    
+    min_efficiency = min(efficiency for _, efficiency in stock_efficiency)
+    
+    stock_capacities = [capacity for capacity, _ in stock_efficiency]
+    single_stock = len(stock_efficiency) == 1   # plain comparisons in the hot loops
+    
+    def stock_for(total: float) -> float:
+        """Shortest stock length the pattern is efficient enough on (0.0 = none)"""
+        for capacity, efficiency in stock_efficiency[bisect.bisect_left(stock_capacities, total - 1e-9):]:
+            if total / capacity >= efficiency:
+                return capacity
+        return 0.0
+    
+    def accepted_totals(max_waste: float) -> Tuple[List[float], List[float]]:
+        """Merged (starts, ends) of the totals some stock accepts - bisect in the hot loops"""
+        starts, ends = [], []
+        for start, end in sorted((max(c - max_waste, e * c) - 1e-9, c + 1e-9) for c, e in stock_efficiency):
+            if starts and start <= ends[-1]:
+                ends[-1] = max(ends[-1], end)
+            else:
+                starts.append(start)
+                ends.append(end)
+        return starts, ends
     
-    min_efficiency = effective_min_efficiency
+    pair_starts, pair_ends = accepted_totals(1.5)
+    triple_starts, triple_ends = accepted_totals(1.2)
     
-    patterns = []
-    pattern_info = []
-    seen = set()
+    store = PatternStore(lengths, bin_capacity)
     
     # 1. Single-type patterns - FIXED: Use max_needed instead of max_per_type
     for i in range(n_types):
         for count in range(max_needed[i], 0, -1):  # ← FIXED: was max_per_type[i]
-            combo = [0] * n_types
-            combo[i] = count
             total = lengths[i] * count
             
-            if total <= bin_capacity:
-                waste = bin_capacity - total
-                efficiency = total / bin_capacity
-                
-                if efficiency >= min_efficiency:
-                    combo_tuple = tuple(combo)
-                    if combo_tuple not in seen:
-                        seen.add(combo_tuple)
-                        patterns.append(combo)
-                        pattern_info.append({
-                            'pattern': combo_tuple,
-                            'waste': waste,
-                            'efficiency': efficiency,
-                            'total': total
-                        })
+            if stock_for(total):
+                store.add(((i, count),), total)
     
     # 2. Two-type combinations - FIXED: Use max_needed
     for i in range(n_types):
@@ -91,254 +484,721 @@ def generate_comprehensive_patterns(
             
             for ci in range(1, max_ci + 1):
                 for cj in range(1, max_cj + 1):
-                    if i == j and ci >= cj:
-                        continue
-                    
-                    combo = [0] * n_types
-                    combo[i] = ci
-                    if i != j:
-                        combo[j] = cj
+                    if i == j:
+                        if ci >= cj:
+                            continue
+                        cuts = ((i, ci),)
+                        total = lengths[i] * ci
+                    else:
+                        cuts = ((i, ci), (j, cj))
+                        total = lengths[i] * ci + lengths[j] * cj
                     
-                    total = sum(lengths[k] * combo[k] for k in range(n_types))
-                    
-                    if total <= bin_capacity:
-                        waste = bin_capacity - total
-                        efficiency = total / bin_capacity
-                        
-                        if efficiency >= min_efficiency and waste <= 1.5:
-                            combo_tuple = tuple(combo)
-                            if combo_tuple not in seen:
-                                seen.add(combo_tuple)
-                                patterns.append(combo)
-                                pattern_info.append({
-                                    'pattern': combo_tuple,
-                                    'waste': waste,
-                                    'efficiency': efficiency,
-                                    'total': total
-                                })
+                    if total > bin_capacity:
+                        break   # more pieces of j only get longer
+                    if single_stock:
+                        accepted = total / bin_capacity >= min_efficiency and bin_capacity - total <= 1.5
+                    else:
+                        slot = bisect.bisect_right(pair_starts, total) - 1
+                        accepted = slot >= 0 and total <= pair_ends[slot]
+                    if accepted:
+                        store.add(cuts, total)
     
     # 3. Three-type combinations - FIXED: Use max_needed
     for i in range(n_types):
         for j in range(i + 1, n_types):
+            if lengths[i] + lengths[j] > bin_capacity:
+                continue
             for k in range(j + 1, n_types):
                 max_ci = min(max_needed[i], 6)  # ← FIXED
                 max_cj = min(max_needed[j], 6)  # ← FIXED
                 max_ck = min(max_needed[k], 6)  # ← FIXED
                 
                 for ci in range(1, max_ci + 1):
+                    total_i = lengths[i] * ci
+                    if total_i + lengths[j] + lengths[k] > bin_capacity:
+                        break
                     for cj in range(1, max_cj + 1):
+                        total_ij = total_i + lengths[j] * cj
+                        if total_ij + lengths[k] > bin_capacity:
+                            break
                         for ck in range(1, max_ck + 1):
-                            combo = [0] * n_types
-                            combo[i] = ci
-                            combo[j] = cj
-                            combo[k] = ck
+                            total = total_ij + lengths[k] * ck
+                            if total > bin_capacity:
+                                break
                             
-                            total = sum(lengths[m] * combo[m] for m in range(n_types))
-                            
-                            if total <= bin_capacity:
-                                waste = bin_capacity - total
-                                efficiency = total / bin_capacity
-                                
-                                if efficiency >= min_efficiency and waste <= 1.2:
-                                    combo_tuple = tuple(combo)
-                                    if combo_tuple not in seen:
-                                        seen.add(combo_tuple)
-                                        patterns.append(combo)
-                                        pattern_info.append({
-                                            'pattern': combo_tuple,
-                                            'waste': waste,
-                                            'efficiency': efficiency,
-                                            'total': total
-                                        })
-    
-    # 4. Greedy fill patterns - FIXED: Use max_needed
+                            if single_stock:
+                                accepted = total / bin_capacity >= min_efficiency and bin_capacity - total <= 1.2
+                            else:
+                                slot = bisect.bisect_right(triple_starts, total) - 1
+                                accepted = slot >= 0 and total <= triple_ends[slot]
+                            if accepted:
+                                store.add(((i, ci), (j, cj), (k, ck)), total)
+    
+    # 4. Greedy fill patterns - FIXED: Use max_needed (one fill per stock length)
     sorted_indices = sorted(range(n_types), key=lambda x: lengths[x], reverse=True)
     
-    for start_idx in sorted_indices[:min(3, n_types)]:
-        max_start = min(max_needed[start_idx], 5)  # ← FIXED
-        
-        for main_count in range(1, max_start + 1):
-            combo = [0] * n_types
-            combo[start_idx] = main_count
-            remaining = bin_capacity - lengths[start_idx] * main_count
-            
-            for fill_idx in reversed(sorted_indices):
-                if fill_idx == start_idx:
-                    continue
-                if remaining >= lengths[fill_idx]:
-                    # FIXED: Don't exceed what's needed
-                    fit_count = int(remaining // lengths[fill_idx])
-                    needed_count = max_needed[fill_idx] - combo[fill_idx]
-                    actual_count = min(fit_count, needed_count)
-                    
-                    combo[fill_idx] = actual_count
-                    remaining -= lengths[fill_idx] * actual_count
-            
-            total = sum(lengths[m] * combo[m] for m in range(n_types))
-            waste = bin_capacity - total
-            efficiency = total / bin_capacity
+    for capacity, _ in stock_efficiency:
+        for start_idx in sorted_indices[:min(3, n_types)]:
+            max_start = min(max_needed[start_idx], 5)  # ← FIXED
             
-            if efficiency >= min_efficiency:
-                combo_tuple = tuple(combo)
-                if combo_tuple not in seen:
-                    seen.add(combo_tuple)
-                    patterns.append(combo)
-                    pattern_info.append({
-                        'pattern': combo_tuple,
-                        'waste': waste,
-                        'efficiency': efficiency,
-                        'total': total
-                    })
-    
-    # Sort by waste and take best N patterns
-    combined = list(zip(patterns, pattern_info))
-    combined.sort(key=lambda x: (x[1]['waste'], -x[1]['efficiency']))
-    
-    if len(combined) > max_patterns:
-        combined = combined[:max_patterns]
+            for main_count in range(1, max_start + 1):
+                cuts = {start_idx: main_count}
+                remaining = capacity - lengths[start_idx] * main_count
+                if remaining < 0:
+                    break
+                
+                for fill_idx in reversed(sorted_indices):
+                    if fill_idx == start_idx:
+                        continue
+                    if remaining >= lengths[fill_idx]:
+                        # FIXED: Don't exceed what's needed
+                        fit_count = int(remaining // lengths[fill_idx])
+                        actual_count = min(fit_count, max_needed[fill_idx])
+                        
+                        if actual_count > 0:
+                            cuts[fill_idx] = actual_count
+                        remaining -= lengths[fill_idx] * actual_count
+                
+                total = sum(lengths[t] * c for t, c in sorted(cuts.items()))
+                
+                if stock_for(total):
+                    store.add(cuts.items(), total)
     
-    patterns = [c[0] for c in combined]
-    pattern_info = [c[1] for c in combined]
+    # Sort by waste and take best N patterns (per stock length)
+    if single_stock:
+        patterns = store.best(max_patterns)
+    else:
+        totals = store.total.tolist()
+        by_stock: Dict[float, List[int]] = {}
+        for p, total in enumerate(totals):
+            by_stock.setdefault(stock_for(total), []).append(p)
+        order = []
+        for capacity, members in sorted(by_stock.items()):
+            members.sort(key=lambda p: capacity - totals[p])     # stable: insertion order on ties
+            order.extend(members[:max_patterns])
+        patterns = store.select(order)
+    
+    logger.debug("  → %d patterns generated", len(patterns),
+                 extra={'pattern_count': len(patterns), 'efficiency': min_efficiency})
+    
+    return patterns
+
+
+def _add_demand_constraints(solver, y: List, patterns: PatternStore, counts: List[int]):
+    """One row per cut type over the patterns that contain it: sum(pieces * y) >= count"""
+    for t, (rows, pieces) in enumerate(patterns.columns()):
+        constraint = solver.Constraint(counts[t], solver.infinity())
+        for p, n in zip(rows.tolist(), pieces.tolist()):
+            constraint.SetCoefficient(y[p], n)
+
+
+def _solution_counts(y: List) -> List[int]:
+    return [int(round(var.solution_value())) for var in y]
+
+
+def _used_patterns(patterns: PatternStore, pattern_counts: List[int]) -> Tuple[List[Dict], float]:
+    """Patterns with a positive count in the solution, and their total waste"""
+    used_patterns = []
+    total_waste_m = 0
     
-    if verbose:
-        print(f"  → {len(patterns)} patterns generated")
+    totals = patterns.total
+    for p, count in enumerate(pattern_counts):
+        if count > 0:
+            pattern_total = float(totals[p])
+            pattern_waste = patterns.bin_capacity - pattern_total
+            
+            used_patterns.append({
+                'pattern_id': p,
+                'count': count,
+                'cuts': patterns.cuts(p),
+                'waste': pattern_waste,
+                'total': pattern_total
+            })
+            total_waste_m += pattern_waste * count
     
-    return patterns, pattern_info
+    return used_patterns, total_waste_m
 
 
+@_console_args
 def solve_phase1_minimize_bins(
     lengths: List[float],
     counts: List[int],
-    patterns: List[List[int]],
-    pattern_info: List[Dict],
+    patterns: PatternStore,
     bin_capacity: float = 12.0,
     time_limit_ms: int = 30000,
-    verbose: bool = False
+    verbose: bool = False,
+    stats: Optional[Dict] = None,
+    solver_backend: str = 'SCIP',
+    hint: Optional[List[Dict]] = None
 ) -> Optional[Tuple[int, List[Dict], float]]:
     """
     PHASE 1: Minimize number of bars only
-    """
-    n_patterns = len(patterns)
-    n_types = len(lengths)
     
-    solver = pywraplp.Solver.CreateSolver('SCIP')
-    if not solver:
-        solver = pywraplp.Solver.CreateSolver('CBC')
+    stats: Optional dict, filled with build/solve time, status, bound, gap, nodes
+    solver_backend: 'SCIP', 'CBC', 'CP-SAT', 'greedy', 'portfolio' or 'auto'
+    hint: used_patterns of a similar solve, a MIP start (patterns missing
+        from the pool are ignored; the solver repairs an infeasible start)
+    """
+    if solver_backend == 'auto':
+        from portfolio import choose_backend
+        solver_backend = choose_backend(len(lengths), len(patterns))
+    if solver_backend == 'greedy':
+        return solve_phase1_greedy(lengths, counts, patterns, bin_capacity,
+                                   time_limit_ms=time_limit_ms, stats=stats)
+    if solver_backend == 'portfolio':
+        from portfolio import solve_phase1_portfolio
+        return solve_phase1_portfolio(lengths, counts, patterns, bin_capacity,
+                                      time_limit_ms=time_limit_ms, stats=stats)
+    if solver_backend == 'CP-SAT':
+        return _solve_phase1_cpsat(lengths, counts, patterns, bin_capacity, time_limit_ms, stats)
     
-    y = {}
-    for p in range(n_patterns):
-        y[p] = solver.IntVar(0, solver.infinity(), f'pattern_{p}')
+    n_patterns = len(patterns)
     
-    # Demand constraints
-    for t in range(n_types):
-        solver.Add(
-            sum(patterns[p][t] * y[p] for p in range(n_patterns)) >= counts[t]
-        )
+    build_start = time.perf_counter()
+    start = _hint_counts(lengths, counts, patterns, hint) if hint else None
+    if start is not None:
+        # A start at the rounded-up LP bound is optimal - nothing left to prove
+        lower_bound = math.ceil(sum(l * c for l, c in zip(lengths, counts)) / bin_capacity - 1e-9)
+        if sum(start) > lower_bound:
+            lower_bound = max(lower_bound, math.ceil(_lp_bound(patterns, counts) - 1e-6))
+        if sum(start) <= lower_bound:
+            used_patterns, total_waste_m = _used_patterns(patterns, start)
+            if stats is not None:
+                stats.update({
+                    'solver': 'hint', 'backend': solver_backend, 'build_time': 0.0,
+                    'solve_time': time.perf_counter() - build_start, 'status': 'OPTIMAL',
+                    'variables': n_patterns, 'constraints': len(lengths), 'nodes': 0,
+                    'objective': sum(start), 'best_bound': lower_bound, 'gap': 0.0
+                })
+            logger.info("  → Minimum bars: %d (start solution at bound)", sum(start),
+                        extra={'phase': 1, 'bars': sum(start), 'waste': total_waste_m})
+            return sum(start), used_patterns, total_waste_m
+    
+    solver = _create_solver(solver_backend)
+    
+    y = [solver.IntVar(0, solver.infinity(), f'pattern_{p}') for p in range(n_patterns)]
+    _add_demand_constraints(solver, y, patterns, counts)
     
     # Objective: minimize number of bars ONLY
-    total_bins = sum(y[p] for p in range(n_patterns))
-    solver.Minimize(total_bins)
+    objective = solver.Objective()
+    for var in y:
+        objective.SetCoefficient(var, 1)
+    objective.SetMinimization()
+    
+    if start is not None:
+        solver.SetHint(y, [float(v) for v in start])
     
     solver.SetTimeLimit(time_limit_ms)
+    solve_start = time.perf_counter()
     status = solver.Solve()
+    _record_solver_stats(stats, solver, status, solve_start - build_start,
+                         time.perf_counter() - solve_start, solver_backend)
     
     if status != pywraplp.Solver.OPTIMAL and status != pywraplp.Solver.FEASIBLE:
         return None
     
-    min_bins = int(solver.Objective().Value())
+    min_bins = int(round(solver.Objective().Value()))
     
-    used_patterns = []
-    total_waste_m = 0
+    used_patterns, total_waste_m = _used_patterns(patterns, _solution_counts(y))
     
-    for p in range(n_patterns):
-        count = int(y[p].solution_value())
-        if count > 0:
-            pattern_total = sum(patterns[p][i] * lengths[i] for i in range(n_types))
-            pattern_waste = bin_capacity - pattern_total
+    logger.info("  → Minimum bars: %d", min_bins,
+                extra={'phase': 1, 'bars': min_bins, 'waste': total_waste_m,
+                       'elapsed': stats['solve_time'] if stats else None})
+    logger.debug("  → Total waste: %.2fm", total_waste_m, extra={'phase': 1})
+    
+    return min_bins, used_patterns, total_waste_m
+
+
+def _lp_solution(patterns: PatternStore, counts: List[int]) -> Optional[Tuple[float, List[float]]]:
+    """Phase 1 LP relaxation (GLOP): optimum and pattern multiplicities, None if unsolved"""
+    solver = pywraplp.Solver.CreateSolver('GLOP')
+    y = [solver.NumVar(0, solver.infinity(), f'pattern_{p}') for p in range(len(patterns))]
+    _add_demand_constraints(solver, y, patterns, counts)
+    objective = solver.Objective()
+    for var in y:
+        objective.SetCoefficient(var, 1)
+    objective.SetMinimization()
+    if solver.Solve() != pywraplp.Solver.OPTIMAL:
+        return None
+    return solver.Objective().Value(), [var.solution_value() for var in y]
+
+
+def _lp_bound(patterns: PatternStore, counts: List[int]) -> float:
+    """Phase 1 LP relaxation optimum - a lower bound on the bars of this pool"""
+    solution = _lp_solution(patterns, counts)
+    return solution[0] if solution else 0.0
+
+
+@_console_args
+def solve_phase1_residual(
+    lengths: List[float],
+    counts: List[int],
+    patterns: PatternStore,
+    bin_capacity: float = 12.0,
+    time_limit_ms: int = 30000,
+    verbose: bool = False,
+    stats: Optional[Dict] = None,
+    solver_backend: str = 'SCIP'
+) -> Optional[Tuple[int, List[Dict], float]]:
+    """
+    PHASE 1 and 2 for huge counts: LP rounding plus an exact residual
+    
+    The LP relaxation is solved and the floor of every pattern multiplicity
+    is fixed; only the residual demand is solved exactly (bars, then waste
+    with those bars fixed). A basic LP solution uses at most one pattern
+    per cut type, so the residual stays a few bars however large the
+    counts. Waste is only optimized on the residual here - the caller's
+    Phase 2 optimizes the whole plan.
+    
+    Bounds in stats: 'best_bound' and 'gap' use ceil(demand / bar length),
+    a proven bound for the instance. 'lp_bound' is the LP optimum over
+    this (efficiency-filtered, max_patterns-capped) pool and 'pool_bound'
+    its round-up - bounds for the pool only, not for the instance.
+    """
+    solve_start = time.perf_counter()
+    lp = _lp_solution(patterns, counts)
+    if lp is None:
+        return None
+    lp_value, multiplicities = lp
+    build_time = time.perf_counter() - solve_start
+    
+    fixed = [int(math.floor(x + 1e-6)) for x in multiplicities]
+    produced = np.zeros(len(counts), dtype=np.int64)
+    for p, n in enumerate(fixed):
+        for t, pieces in patterns.cuts(p) if n else ():
+            produced[t] += pieces * n
+    residual = np.maximum(np.asarray(counts, dtype=np.int64) - produced, 0).tolist()
+    
+    values = list(fixed)
+    residual_stats = {}
+    if any(residual):
+        sub = solve_phase1_minimize_bins(lengths, residual, patterns, bin_capacity,
+                                         time_limit_ms=time_limit_ms, stats=residual_stats,
+                                         solver_backend=solver_backend)
+        if sub is None:
+            return None
+        residual_bars, residual_patterns, _ = sub
+        backend = residual_stats.get('backend')
+        refined = solve_phase2_minimize_waste(
+            lengths, residual, patterns, residual_bars, bin_capacity,
+            time_limit_ms=time_limit_ms,
+            solver_backend=backend if backend in EXACT_BACKENDS else 'SCIP',
+            hint=residual_patterns
+        )
+        if refined is not None:
+            residual_patterns = refined[0]
+        for used in residual_patterns:
+            values[used['pattern_id']] += used['count']
+    
+    min_bins = sum(values)
+    lower_bound = math.ceil(sum(l * c for l, c in zip(lengths, counts)) / bin_capacity - 1e-9)
+    pool_bound = max(lower_bound, math.ceil(lp_value - 1e-6))
+    used_patterns, total_waste_m = _used_patterns(patterns, values)
+    
+    if stats is not None:
+        stats.update({
+            'solver': 'residual', 'backend': residual_stats.get('backend', solver_backend),
+            'build_time': build_time, 'solve_time': time.perf_counter() - solve_start - build_time,
+            'status': 'OPTIMAL' if min_bins <= lower_bound else 'FEASIBLE',
+            'variables': len(patterns), 'constraints': len(lengths),
+            'nodes': residual_stats.get('nodes', 0),
+            'objective': min_bins, 'best_bound': lower_bound,
+            'gap': (min_bins - lower_bound) / max(min_bins, 1e-9),
+            'lp_bound': lp_value, 'pool_bound': pool_bound,
+            'fixed_bars': sum(fixed), 'residual_bars': min_bins - sum(fixed)
+        })
+    logger.info("  → Minimum bars: %d (LP rounding + %d residual bars, pool LP bound %d, "
+                "instance bound %d)",
+                min_bins, min_bins - sum(fixed), pool_bound, lower_bound,
+                extra={'phase': 1, 'bars': min_bins, 'waste': total_waste_m,
+                       'elapsed': time.perf_counter() - solve_start})
+    return min_bins, used_patterns, total_waste_m
+
+
+def _hint_counts(
+    lengths: List[float],
+    counts: List[int],
+    patterns: PatternStore,
+    hint: List[Dict]
+) -> Optional[List[int]]:
+    """
+    A feasible Phase 1 start from a similar solve's used_patterns
+
+    Hint patterns missing from the pool are dropped, copies that only
+    over-produce are removed (highest waste first) and still-missing
+    pieces are covered greedily. None if the pool cannot cover the demand.
+    """
+    values = [0] * len(patterns)
+    for used in hint:
+        p = patterns.find(used['cuts'])
+        if p >= 0:
+            values[p] += used['count']
+    
+    needed = np.asarray(counts, dtype=np.int64)
+    coverage = np.zeros(len(counts), dtype=np.int64)
+    for p, n in enumerate(values):
+        for t, pieces in patterns.cuts(p) if n else ():
+            coverage[t] += pieces * n
+    
+    waste = patterns.waste
+    for p in sorted((p for p, n in enumerate(values) if n), key=lambda p: -waste[p]):
+        cuts = patterns.cuts(p)
+        removable = min(values[p], min(int(coverage[t] - needed[t]) // pieces for t, pieces in cuts))
+        if removable > 0:
+            values[p] -= removable
+            for t, pieces in cuts:
+                coverage[t] -= pieces * removable
+    
+    residual = np.maximum(needed - coverage, 0)
+    if residual.any():
+        topped = solve_phase1_greedy(lengths, residual.tolist(), patterns)
+        if topped is None:
+            return None
+        for used in topped[1]:
+            values[used['pattern_id']] += used['count']
+    return values
+
+
+def solve_phase1_greedy(
+    lengths: List[float],
+    counts: List[int],
+    patterns: PatternStore,
+    bin_capacity: float = 12.0,
+    time_limit_ms: int = 30000,
+    stats: Optional[Dict] = None
+) -> Optional[Tuple[int, List[Dict], float]]:
+    """
+    PHASE 1 heuristic: greedy pattern selection on the pattern pool
+    
+    Repeatedly takes the pattern covering the most still-needed length
+    (ties: less waste) as many times as all its pieces stay needed.
+    Fast but not optimal; returns None if the pool cannot cover the demand.
+    """
+    solve_start = time.perf_counter()
+    deadline = solve_start + time_limit_ms / 1000
+    
+    remaining = np.asarray(counts, dtype=np.int64).copy()
+    pattern_counts = [0] * len(patterns)
+    solved = len(patterns) > 0 or not remaining.any()
+    
+    if len(patterns):
+        indptr, indices, pieces = patterns.indptr, patterns.indices, patterns.pieces
+        piece_lengths = np.asarray(lengths, dtype=np.float64)[indices]
+        starts = indptr[:-1]
+        waste = patterns.waste
+        
+        while remaining.any():
+            useful = np.add.reduceat(np.minimum(pieces, remaining[indices]) * piece_lengths, starts)
+            best = int(np.lexsort((waste, -useful))[0])
+            if useful[best] <= 0 or time.perf_counter() > deadline:
+                solved = False
+                break
             
-            used_patterns.append({
-                'pattern_id': p,
-                'count': count,
-                'combo': patterns[p],
-                'waste': pattern_waste,
-                'total': pattern_total
-            })
-            total_waste_m += pattern_waste * count
+            row = slice(indptr[best], indptr[best + 1])
+            types, row_pieces = indices[row], pieces[row]
+            copies = max(1, int((remaining[types] // row_pieces).min()))
+            remaining[types] = np.maximum(remaining[types] - row_pieces * copies, 0)
+            pattern_counts[best] += copies
+    
+    min_bins = sum(pattern_counts)
+    if stats is not None:
+        lower_bound = math.ceil(sum(l * c for l, c in zip(lengths, counts)) / bin_capacity - 1e-9)
+        stats.update({
+            'solver': 'greedy', 'backend': 'greedy', 'build_time': 0.0,
+            'solve_time': time.perf_counter() - solve_start,
+            'status': 'FEASIBLE' if solved else 'NOT_SOLVED',
+            'variables': len(patterns), 'constraints': len(lengths), 'nodes': 0,
+            'objective': min_bins if solved else None,
+            'best_bound': lower_bound if solved else None,
+            'gap': abs(min_bins - lower_bound) / max(min_bins, 1e-9) if solved else None
+        })
+    if not solved:
+        return None
     
-    if verbose:
-        print(f"  → Minimum bars: {min_bins}")
-        print(f"  → Total waste: {total_waste_m:.2f}m")
+    used_patterns, total_waste_m = _used_patterns(patterns, pattern_counts)
+    logger.info("  → Minimum bars: %d (greedy)", min_bins,
+                extra={'phase': 1, 'bars': min_bins, 'waste': total_waste_m,
+                       'elapsed': time.perf_counter() - solve_start})
+    return min_bins, used_patterns, total_waste_m
+
+
+# ============================================================================
+# CP-SAT (native cp_model) - both phases
+# ============================================================================
+
+def _cpsat_model(patterns: PatternStore, counts: List[int], upper_bounds: List[int]):
+    from ortools.sat.python import cp_model
+    
+    model = cp_model.CpModel()
+    y = [model.NewIntVar(0, int(ub), f'pattern_{p}') for p, ub in enumerate(upper_bounds)]
+    for t, (rows, pieces) in enumerate(patterns.columns()):
+        model.Add(sum(n * y[p] for p, n in zip(rows.tolist(), pieces.tolist())) >= counts[t])
+    return model, y
+
+
+def _cpsat_solve(model, time_limit_ms: int, stats: Optional[Dict], build_start: float):
+    from ortools.sat.python import cp_model
+    
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = time_limit_ms / 1000
+    solver.parameters.num_search_workers = CPSAT_WORKERS
+    solve_start = time.perf_counter()
+    status = solver.Solve(model)
+    solved = status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+    
+    if stats is not None:
+        proto = model.Proto()
+        objective = solver.ObjectiveValue() if solved else None
+        best_bound = solver.BestObjectiveBound() if solved else None
+        stats.update({
+            'solver': f"CP-SAT ({CPSAT_WORKERS} workers)",
+            'backend': 'CP-SAT',
+            'build_time': solve_start - build_start,
+            'solve_time': time.perf_counter() - solve_start,
+            'status': solver.StatusName(status),
+            'variables': len(proto.variables),
+            'constraints': len(proto.constraints),
+            'nodes': solver.NumBranches(),
+            'objective': objective,
+            'best_bound': best_bound,
+            'gap': abs(objective - best_bound) / max(abs(objective), 1e-9) if solved else None
+        })
+    return solver, solved
+
+
+def _pattern_upper_bounds(patterns: PatternStore, counts: List[int]) -> List[int]:
+    """Copies of each pattern worth using: enough to cover its most needed type alone"""
+    indptr, indices, pieces = patterns.indptr, patterns.indices, patterns.pieces
+    need = -(-np.asarray(counts, dtype=np.int64)[indices] // pieces)    # ceil(count / pieces)
+    return np.maximum.reduceat(need, indptr[:-1]).tolist() if len(patterns) else []
+
+
+def _solve_phase1_cpsat(
+    lengths: List[float],
+    counts: List[int],
+    patterns: PatternStore,
+    bin_capacity: float,
+    time_limit_ms: int,
+    stats: Optional[Dict]
+) -> Optional[Tuple[int, List[Dict], float]]:
+    """
+    PHASE 1 on CP-SAT: bars >= ceil(demand / stock), greedy solution as hint
+    """
+    build_start = time.perf_counter()
+    model, y = _cpsat_model(patterns, counts, _pattern_upper_bounds(patterns, counts))
+    
+    total_bins = sum(y)
+    lower_bound = math.ceil(sum(l * c for l, c in zip(lengths, counts)) / bin_capacity - 1e-9)
+    model.Add(total_bins >= lower_bound)
+    model.Minimize(total_bins)
+    
+    greedy = solve_phase1_greedy(lengths, counts, patterns, bin_capacity, time_limit_ms=1000)
+    if greedy is not None:
+        hinted = {up['pattern_id']: up['count'] for up in greedy[1]}
+        for p, var in enumerate(y):
+            model.AddHint(var, hinted.get(p, 0))
+    
+    solver, solved = _cpsat_solve(model, time_limit_ms, stats, build_start)
+    if not solved:
+        return None
+    
+    pattern_counts = [solver.Value(var) for var in y]
+    min_bins = sum(pattern_counts)
+    used_patterns, total_waste_m = _used_patterns(patterns, pattern_counts)
     
+    logger.info("  → Minimum bars: %d", min_bins,
+                extra={'phase': 1, 'bars': min_bins, 'waste': total_waste_m,
+                       'elapsed': stats['solve_time'] if stats else None})
+    logger.debug("  → Total waste: %.2fm", total_waste_m, extra={'phase': 1})
     return min_bins, used_patterns, total_waste_m
 
 
+def _solve_phase2_cpsat(
+    lengths: List[float],
+    counts: List[int],
+    patterns: PatternStore,
+    fixed_bins: int,
+    bin_capacity: float,
+    time_limit_ms: int,
+    stats: Optional[Dict],
+    hint: Optional[List[Dict]]
+) -> Optional[Tuple[List[Dict], float]]:
+    """
+    PHASE 2 on CP-SAT: waste in integer millimetres, bars fixed to the
+    Phase 1 result (which also caps every pattern count), Phase 1 patterns
+    as hint so the search starts from a feasible plan
+    """
+    build_start = time.perf_counter()
+    model, y = _cpsat_model(patterns, counts, [fixed_bins] * len(patterns))
+    model.Add(sum(y) == fixed_bins)
+    
+    scaled_waste = [int(round(w * CPSAT_WASTE_SCALE)) for w in patterns.waste.tolist()]
+    model.Minimize(sum(w * var for w, var in zip(scaled_waste, y)))
+    
+    if hint:
+        hinted = {up['pattern_id']: up['count'] for up in hint}
+        for p, var in enumerate(y):
+            model.AddHint(var, hinted.get(p, 0))
+    
+    solver, solved = _cpsat_solve(model, time_limit_ms, stats, build_start)
+    if not solved:
+        return None
+    
+    used_patterns, total_waste_m = _used_patterns(patterns, [solver.Value(var) for var in y])
+    
+    logger.info("  → Optimized waste: %.2fm", total_waste_m,
+                extra={'phase': 2, 'bars': fixed_bins, 'waste': total_waste_m,
+                       'elapsed': stats['solve_time'] if stats else None})
+    return used_patterns, total_waste_m
+
+
+@_console_args
 def solve_phase2_minimize_waste(
     lengths: List[float],
     counts: List[int],
-    patterns: List[List[int]],
-    pattern_info: List[Dict],
+    patterns: PatternStore,
     fixed_bins: int,
     bin_capacity: float = 12.0,
     time_limit_ms: int = 30000,
-    verbose: bool = False
+    verbose: bool = False,
+    stats: Optional[Dict] = None,
+    solver_backend: str = 'SCIP',
+    hint: Optional[List[Dict]] = None
 ) -> Optional[Tuple[List[Dict], float]]:
     """
     PHASE 2: Minimize waste with fixed number of bars
+    
+    stats: Optional dict, filled with build/solve time, status, bound, gap, nodes
+    solver_backend: Exact backend ('SCIP', 'CBC' or 'CP-SAT')
+    hint: Phase 1 used_patterns, a feasible start for CP-SAT
     """
+    if solver_backend == 'CP-SAT':
+        return _solve_phase2_cpsat(lengths, counts, patterns, fixed_bins, bin_capacity,
+                                   time_limit_ms, stats, hint)
+    
     n_patterns = len(patterns)
-    n_types = len(lengths)
     
-    solver = pywraplp.Solver.CreateSolver('SCIP')
-    if not solver:
-        solver = pywraplp.Solver.CreateSolver('CBC')
+    build_start = time.perf_counter()
+    solver = _create_solver(solver_backend)
     
-    y = {}
-    for p in range(n_patterns):
-        y[p] = solver.IntVar(0, solver.infinity(), f'pattern_{p}')
-    
-    # Demand constraints
-    for t in range(n_types):
-        solver.Add(
-            sum(patterns[p][t] * y[p] for p in range(n_patterns)) >= counts[t]
-        )
+    y = [solver.IntVar(0, solver.infinity(), f'pattern_{p}') for p in range(n_patterns)]
+    _add_demand_constraints(solver, y, patterns, counts)
     
     # CRITICAL: Number of bars is FIXED
-    solver.Add(sum(y[p] for p in range(n_patterns)) == fixed_bins)
+    bars = solver.Constraint(fixed_bins, fixed_bins)
+    for var in y:
+        bars.SetCoefficient(var, 1)
     
     # Objective: minimize waste ONLY
-    total_waste = sum(pattern_info[p]['waste'] * y[p] for p in range(n_patterns))
-    solver.Minimize(total_waste)
+    objective = solver.Objective()
+    for var, waste in zip(y, patterns.waste.tolist()):
+        objective.SetCoefficient(var, waste)
+    objective.SetMinimization()
     
     solver.SetTimeLimit(time_limit_ms)
+    solve_start = time.perf_counter()
     status = solver.Solve()
+    _record_solver_stats(stats, solver, status, solve_start - build_start,
+                         time.perf_counter() - solve_start, solver_backend)
     
     if status != pywraplp.Solver.OPTIMAL and status != pywraplp.Solver.FEASIBLE:
         return None
     
-    used_patterns = []
-    total_waste_m = 0
+    used_patterns, total_waste_m = _used_patterns(patterns, _solution_counts(y))
     
-    for p in range(n_patterns):
-        count = int(y[p].solution_value())
-        if count > 0:
-            pattern_total = sum(patterns[p][i] * lengths[i] for i in range(n_types))
-            pattern_waste = bin_capacity - pattern_total
-            
-            used_patterns.append({
-                'pattern_id': p,
-                'count': count,
-                'combo': patterns[p],
-                'waste': pattern_waste,
-                'total': pattern_total
-            })
-            total_waste_m += pattern_waste * count
+    logger.info("  → Optimized waste: %.2fm", total_waste_m,
+                extra={'phase': 2, 'bars': fixed_bins, 'waste': total_waste_m,
+                       'elapsed': stats['solve_time'] if stats else None})
     
-    if verbose:
-        print(f"  → Optimized waste: {total_waste_m:.2f}m")
+    return used_patterns, total_waste_m
+
+
+@_console_args
+def solve_phase3_minimize_patterns(
+    lengths: List[float],
+    counts: List[int],
+    patterns: PatternStore,
+    fixed_bins: int,
+    max_waste: float,
+    bin_capacity: float = 12.0,
+    time_limit_ms: int = 30000,
+    verbose: bool = False,
+    stats: Optional[Dict] = None,
+    solver_backend: str = 'SCIP',
+    hint: Optional[List[Dict]] = None
+) -> Optional[Tuple[List[Dict], float]]:
+    """
+    PHASE 3: Minimize distinct patterns with bars fixed and waste capped
+    
+    Every pattern change is a saw setup. A binary use indicator z per
+    pattern with y <= upper_bound * z; the objective counts the z.
+    
+    max_waste: Waste cap (m), usually the Phase 2 waste plus a tolerance
+    solver_backend: MIP backend ('SCIP' or 'CBC')
+    hint: Phase 2 used_patterns, a feasible start
+    """
+    build_start = time.perf_counter()
+    
+    # A pattern wasting more than the cap alone can never be used
+    patterns = patterns.select(np.flatnonzero(patterns.waste <= max_waste + 1e-6))
+    n_patterns = len(patterns)
+    solver = _create_solver(solver_backend)
+    
+    # Copies worth using, also limited by how many fit under the waste cap
+    upper_bounds = [
+        min(ub, fixed_bins, int((max_waste + 1e-6) // waste) if waste > 1e-9 else fixed_bins)
+        for ub, waste in zip(_pattern_upper_bounds(patterns, counts), patterns.waste.tolist())
+    ]
+    y = [solver.IntVar(0, ub, f'pattern_{p}') for p, ub in enumerate(upper_bounds)]
+    z = [solver.BoolVar(f'used_{p}') for p in range(n_patterns)]
+    _add_demand_constraints(solver, y, patterns, counts)
+    
+    # Pattern used only if its indicator is set
+    for var, used, ub in zip(y, z, upper_bounds):
+        link = solver.Constraint(-solver.infinity(), 0)
+        link.SetCoefficient(var, 1)
+        link.SetCoefficient(used, -ub)
+    
+    # Bars FIXED, waste within the cap
+    bars = solver.Constraint(fixed_bins, fixed_bins)
+    waste = solver.Constraint(-solver.infinity(), max_waste + 1e-6)
+    for var, pattern_waste in zip(y, patterns.waste.tolist()):
+        bars.SetCoefficient(var, 1)
+        waste.SetCoefficient(var, pattern_waste)
+    
+    # Objective: minimize distinct patterns ONLY
+    objective = solver.Objective()
+    for used in z:
+        objective.SetCoefficient(used, 1)
+    objective.SetMinimization()
+    
+    if hint:
+        start = [0] * n_patterns
+        for used_pattern in hint:
+            p = patterns.find(used_pattern['cuts'])
+            if p >= 0:
+                start[p] += used_pattern['count']
+        solver.SetHint(y + z, [float(v) for v in start] + [1.0 if v else 0.0 for v in start])
+    
+    solver.SetTimeLimit(time_limit_ms)
+    solve_start = time.perf_counter()
+    status = solver.Solve()
+    _record_solver_stats(stats, solver, status, solve_start - build_start,
+                         time.perf_counter() - solve_start, solver_backend)
+    
+    if status != pywraplp.Solver.OPTIMAL and status != pywraplp.Solver.FEASIBLE:
+        return None
+    
+    used_patterns, total_waste_m = _used_patterns(patterns, _solution_counts(y))
+    
+    logger.info("  → Distinct patterns: %d (waste %.2fm)", len(used_patterns), total_waste_m,
+                extra={'phase': 3, 'bars': fixed_bins, 'waste': total_waste_m,
+                       'elapsed': stats['solve_time'] if stats else None})
     
     return used_patterns, total_waste_m
 
 
+@_console_args
 def solve_with_lexicographic_optimization(
     lengths: List[float],
     counts: List[int],
@@ -348,7 +1208,15 @@ def solve_with_lexicographic_optimization(
     phase1_time_limit_ms: int = 30000,
     phase2_time_limit_ms: int = 30000,
     verbose: bool = True,
-    adaptive: bool = True
+    adaptive: bool = True,
+    solver_backend: str = 'SCIP',
+    pattern_pool: Optional[Callable[[float], PatternStore]] = None,
+    hint: Optional[List[Dict]] = None,
+    minimize_patterns: bool = False,
+    waste_tolerance: float = 0.0,
+    phase3_time_limit_ms: int = 30000,
+    lns_time_limit_ms: int = 10000,
+    mode: str = 'exact'
 ) -> Optional[Dict]:
     """
     Lexicographic (Sequential) Optimization - ADAPTIVE VERSION
@@ -360,41 +1228,60 @@ def solve_with_lexicographic_optimization(
     2. DECISION: Compare with theoretical minimum
        - If theoretical = found → STOP (optimal!)
        - If theoretical < found → Go to PHASE 2
-    3. PHASE 2: Minimize waste with fixed bars
+    3. PHASE 2: Minimize waste with fixed bars (after an LNS pass if
+       Phase 1 hit its time limit)
+    4. PHASE 3 (minimize_patterns=True): fewest distinct patterns with the
+       bars fixed and waste at most (1 + waste_tolerance) x the Phase 2 waste
     
     ADAPTIVE: Auto-reduce min_efficiency if no solution found
+    
+    The result includes 'stats': timings and solver statistics of every
+    adaptive level tried and of Phase 2 (see solver_stats_rows in exporters).
+    
+    solver_backend: Phase 1 backend (see SOLVER_BACKENDS). Phase 2 uses the
+        MIP backend that solved Phase 1, or SCIP after the greedy heuristic.
+    pattern_pool: Called with the efficiency level instead of generating
+        the pool, e.g. to share one pool between similar solves
+    hint: used_patterns of a similar solve, a Phase 1 MIP start
+    waste_tolerance: Relative extra waste Phase 3 may spend on fewer setups
+    lns_time_limit_ms: Budget of the large neighbourhood search (lns.py) run
+        when an exact Phase 1 backend (SCIP, CBC, CP-SAT) stops at its time
+        limit above the theoretical minimum (0 = off; never after greedy)
+    mode: 'exact', or 'residual' for huge counts - Phase 1 is LP rounding
+        with an exact residual solve (solve_phase1_residual) instead of the
+        full MIP, no LNS pass; Phase 2 then minimizes the waste of the
+        whole plan, started from it
     """
+    if solver_backend not in SOLVER_BACKENDS:
+        raise ValueError(f"Unknown solver_backend: {solver_backend} "
+                         f"(expected one of {', '.join(SOLVER_BACKENDS)})")
+    if mode not in SOLVE_MODES:
+        raise ValueError(f"Unknown mode: {mode} (expected one of {', '.join(SOLVE_MODES)})")
+    solve_start = time.perf_counter()
     total_demand = sum(l * c for l, c in zip(lengths, counts))
     theoretical_min = math.ceil(total_demand / bin_capacity)
     
     # Check for cuts that are too long
     max_length = max(lengths)
     if max_length > bin_capacity:
-        if verbose:
-            print("\n" + "="*70)
-            print("❌ WARNING: CUT TOO LONG DETECTED!")
-            print("="*70)
-            print(f"Longest cut: {max_length:.2f}m")
-            print(f"Bar length: {bin_capacity}m")
-            print(f"This cut doesn't fit in {bin_capacity}m bar!")
-            print("Solution: Use welding/splice or longer bars.")
+        logger.warning("\n%s\n❌ WARNING: CUT TOO LONG DETECTED!\n%s\n"
+                       "Longest cut: %.2fm\nBar length: %sm\n"
+                       "This cut doesn't fit in %sm bar!\n"
+                       "Solution: Use welding/splice or longer bars.",
+                       "="*70, "="*70, max_length, bin_capacity, bin_capacity)
         return None
     
-    if verbose:
-        print("\n" + "="*70)
-        print("LEXICOGRAPHIC OPTIMIZATION (ADAPTIVE) - FIXED VERSION")
-        print("="*70)
-        print(f"Total demand: {total_demand:.2f}m")
-        print(f"Theoretical minimum: {theoretical_min} bars")
-        print(f"Bar length: {bin_capacity}m")
+    logger.debug("\n%s\nLEXICOGRAPHIC OPTIMIZATION (ADAPTIVE) - FIXED VERSION\n%s", "="*70, "="*70)
+    logger.info("Total demand: %.2fm", total_demand)
+    logger.info("Theoretical minimum: %d bars", theoretical_min)
+    logger.debug("Bar length: %sm", bin_capacity)
     
     # SMART EFFICIENCY: For single-bar cases or small orders, relax efficiency
     adaptive_efficiency_levels = [min_efficiency]
     
     # If theoretical minimum is 1 bar, always include 0% efficiency
     if theoretical_min == 1:
-        if verbose:
-            print(f"ℹ Single-bar case detected → Efficiency constraint relaxed")
+        logger.info("ℹ Single-bar case detected → Efficiency constraint relaxed")
         adaptive_efficiency_levels = [0.0]  # Skip efficiency check entirely
         adaptive = False  # No need for adaptive
     elif adaptive:
@@ -407,85 +1294,132 @@ def solve_with_lexicographic_optimization(
     
     phase1_result = None
     patterns = None
-    pattern_info = None
     used_efficiency = min_efficiency
     
-    # Try each efficiency level
-    for eff in efficiency_levels:
-        if verbose and eff != efficiency_levels[0] and len(efficiency_levels) > 1:
-            print(f"\n⚠ No solution found, reducing efficiency: {eff*100:.0f}%")
+    stats = {'levels': [], 'lns': None, 'phase2': None, 'phase3': None}
+    
+    with span('adaptive_loop', levels=len(efficiency_levels)) as loop_span:
+        # Try each efficiency level
+        for eff in efficiency_levels:
+            if eff != efficiency_levels[0] and len(efficiency_levels) > 1:
+                logger.info("\n⚠ No solution found, reducing efficiency: %.0f%%", eff * 100,
+                            extra={'efficiency': eff})
         
-        if verbose and eff == efficiency_levels[0] and len(efficiency_levels) > 1:
-            print("\n[PREPARATION] Generating pattern pool...")
-        elif verbose and len(efficiency_levels) == 1:
-            print("\n[PREPARATION] Generating pattern pool...")
+            if eff == efficiency_levels[0]:
+                logger.info("\n[PREPARATION] Generating pattern pool...", extra={'efficiency': eff})
         
-        # FIXED: Pass counts parameter to pattern generator
-        patterns, pattern_info = generate_comprehensive_patterns(
-            lengths=lengths,
-            counts=counts,  # ← FIXED: Now passes counts
-            bin_capacity=bin_capacity,
-            min_efficiency=eff,
-            max_patterns=max_patterns,
-            verbose=verbose and eff == efficiency_levels[0]
-        )
+            level_stats = {'min_efficiency': eff, 'phase1': None}
+            stats['levels'].append(level_stats)
         
-        if not patterns:
-            if verbose:
-                print(f"  → No patterns found with {eff*100:.0f}% efficiency")
-            continue
+            # FIXED: Pass counts parameter to pattern generator
+            generation_start = time.perf_counter()
+            with span('generate_patterns', min_efficiency=eff, n_types=len(lengths)) as gen_span:
+                if pattern_pool is not None:
+                    patterns = pattern_pool(eff)
+                else:
+                    patterns = generate_comprehensive_patterns(
+                        lengths=lengths,
+                        counts=counts,  # ← FIXED: Now passes counts
+                        bin_capacity=bin_capacity,
+                        min_efficiency=eff,
+                        max_patterns=max_patterns,
+                        verbose=verbose and eff == efficiency_levels[0]
+                    )
+                gen_span.set(pattern_count=len(patterns))
+            level_stats['generation_time'] = time.perf_counter() - generation_start
+            level_stats['pattern_count'] = len(patterns)
         
-        if verbose:
-            print(f"\n[PHASE 1] Calculating minimum bars (efficiency: {eff*100:.0f}%)...")
+            if not patterns:
+                logger.debug("  → No patterns found with %.0f%% efficiency", eff * 100,
+                             extra={'efficiency': eff})
+                continue
         
-        phase1_result = solve_phase1_minimize_bins(
-            lengths=lengths,
-            counts=counts,
-            patterns=patterns,
-            pattern_info=pattern_info,
-            bin_capacity=bin_capacity,
-            time_limit_ms=phase1_time_limit_ms,
-            verbose=verbose
-        )
+            logger.info("\n[PHASE 1] Calculating minimum bars (efficiency: %.0f%%)...", eff * 100,
+                        extra={'phase': 1, 'efficiency': eff})
+        
+            level_stats['phase1'] = {}
+            with span('phase1', min_efficiency=eff, pattern_count=len(patterns)) as phase_span:
+                if mode == 'residual':
+                    phase1_result = solve_phase1_residual(
+                        lengths=lengths,
+                        counts=counts,
+                        patterns=patterns,
+                        bin_capacity=bin_capacity,
+                        time_limit_ms=phase1_time_limit_ms,
+                        verbose=verbose,
+                        stats=level_stats['phase1'],
+                        solver_backend=solver_backend
+                    )
+                else:
+                    phase1_result = solve_phase1_minimize_bins(
+                        lengths=lengths,
+                        counts=counts,
+                        patterns=patterns,
+                        bin_capacity=bin_capacity,
+                        time_limit_ms=phase1_time_limit_ms,
+                        verbose=verbose,
+                        stats=level_stats['phase1'],
+                        solver_backend=solver_backend,
+                        hint=hint
+                    )
+                phase_span.set(status=level_stats['phase1'].get('status'))
         
-        if phase1_result is not None:
-            used_efficiency = eff
-            if verbose and eff != efficiency_levels[0] and len(efficiency_levels) > 1:
-                print(f"  ✓ Solution found (efficiency: {eff*100:.0f}%)")
-            break
+            if phase1_result is not None:
+                used_efficiency = eff
+                if eff != efficiency_levels[0] and len(efficiency_levels) > 1:
+                    logger.info("  ✓ Solution found (efficiency: %.0f%%)", eff * 100,
+                                extra={'efficiency': eff})
+                break
+        loop_span.set(levels_tried=len(stats['levels']), solved=phase1_result is not None)
     
     if phase1_result is None:
-        if verbose:
-            print("\n" + "="*70)
-            print("❌ NO SOLUTION FOUND!")
-            print("="*70)
-            print("All efficiency levels tried but no solution found.")
-            print("Possible reasons:")
-            print("  1. Cut lengths create combinations that are too large")
-            print("  2. Demand quantities incompatible with pattern combinations")
-            print("Suggestions:")
-            print("  1. Increase max_patterns (500 → 1000)")
-            print("  2. Increase time limit (30s → 60s)")
-            print("  3. Check bar length")
+        logger.warning("\n%s\n❌ NO SOLUTION FOUND!\n%s\n"
+                       "All efficiency levels tried but no solution found.\n"
+                       "Possible reasons:\n"
+                       "  1. Cut lengths create combinations that are too large\n"
+                       "  2. Demand quantities incompatible with pattern combinations\n"
+                       "Suggestions:\n"
+                       "  1. Increase max_patterns (500 → 1000)\n"
+                       "  2. Increase time limit (30s → 60s)\n"
+                       "  3. Check bar length", "="*70, "="*70)
         return None
     
     min_bins, used_patterns, total_waste = phase1_result
     
+    # An exact Phase 1 stopped at its time limit - improve the plan locally instead.
+    # Greedy always reports FEASIBLE: it chose speed, so it gets no LNS budget.
+    phase1_stats = stats['levels'][-1]['phase1']
+    phase1_timed_out = (phase1_stats.get('backend') in EXACT_BACKENDS
+                        and phase1_stats.get('status') == 'FEASIBLE')
+    if mode == 'exact' and lns_time_limit_ms > 0 and phase1_timed_out and min_bins > theoretical_min:
+        from lns import improve_plan
+        
+        logger.info("\n[LNS] Phase 1 not proven optimal, improving %d bars...", min_bins,
+                    extra={'phase': 1})
+        stats['lns'] = {}
+        backend = phase1_stats.get('backend')
+        with span('lns', start_bars=min_bins, pattern_count=len(patterns)) as lns_span:
+            min_bins, used_patterns, total_waste = improve_plan(
+                lengths, counts, patterns, used_patterns,
+                time_limit_ms=lns_time_limit_ms,
+                solver_backend=backend if backend in MIP_BACKENDS else 'SCIP',
+                stats=stats['lns']
+            )
+            lns_span.set(bars=min_bins)
+    
     # CRITICAL DECISION: Compare with theoretical minimum
-    if verbose:
-        print(f"\n[DECISION ANALYSIS]")
-        print(f"  Theoretical minimum: {theoretical_min} bars")
-        print(f"  Found minimum: {min_bins} bars")
-        if used_efficiency != efficiency_levels[0]:
-            print(f"  ⚠ Found with reduced efficiency: {used_efficiency*100:.0f}%")
-        elif used_efficiency == 0.0 and theoretical_min == 1:
-            print(f"  ℹ Single-bar case: efficiency constraint bypassed")
+    logger.debug("\n[DECISION ANALYSIS]\n  Theoretical minimum: %d bars\n  Found minimum: %d bars",
+                 theoretical_min, min_bins)
+    if used_efficiency != efficiency_levels[0]:
+        logger.info("  ⚠ Found with reduced efficiency: %.0f%%", used_efficiency * 100,
+                    extra={'efficiency': used_efficiency})
+    elif used_efficiency == 0.0 and theoretical_min == 1:
+        logger.debug("  ℹ Single-bar case: efficiency constraint bypassed")
     
     if min_bins == theoretical_min:
         # OPTIMAL! No need for Phase 2
-        if verbose:
-            print(f"  ✓ OPTIMAL! At theoretical minimum!")
-            print(f"  → Skipping Phase 2 (unnecessary)")
+        logger.info("  ✓ OPTIMAL! At theoretical minimum!")
+        logger.debug("  → Skipping Phase 2 (unnecessary)")
         
         final_patterns = used_patterns
         final_waste = total_waste
@@ -493,27 +1427,29 @@ def solve_with_lexicographic_optimization(
     
     else:
         # More than theoretical - Try to improve with Phase 2
-        if verbose:
-            print(f"  ⚠ {min_bins - theoretical_min} bars more than theoretical")
-            print(f"  → Proceeding to Phase 2 (waste optimization)")
+        logger.debug("  ⚠ %d bars more than theoretical\n  → Proceeding to Phase 2 (waste optimization)",
+                     min_bins - theoretical_min)
+        logger.info("\n[PHASE 2] Bars=%d fixed, minimizing waste...", min_bins, extra={'phase': 2})
         
-        if verbose:
-            print(f"\n[PHASE 2] Bars={min_bins} fixed, minimizing waste...")
-        
-        phase2_result = solve_phase2_minimize_waste(
-            lengths=lengths,
-            counts=counts,
-            patterns=patterns,
-            pattern_info=pattern_info,
-            fixed_bins=min_bins,
-            bin_capacity=bin_capacity,
-            time_limit_ms=phase2_time_limit_ms,
-            verbose=verbose
-        )
+        stats['phase2'] = {}
+        phase1_backend = stats['levels'][-1]['phase1'].get('backend')
+        with span('phase2', fixed_bins=min_bins, pattern_count=len(patterns)) as phase_span:
+            phase2_result = solve_phase2_minimize_waste(
+                lengths=lengths,
+                counts=counts,
+                patterns=patterns,
+                fixed_bins=min_bins,
+                bin_capacity=bin_capacity,
+                time_limit_ms=phase2_time_limit_ms,
+                verbose=verbose,
+                stats=stats['phase2'],
+                solver_backend=phase1_backend if phase1_backend in EXACT_BACKENDS else 'SCIP',
+                hint=used_patterns
+            )
+            phase_span.set(status=stats['phase2'].get('status'))
         
         if phase2_result is None:
-            if verbose:
-                print("  ⚠ Phase 2 failed, using Phase 1 result")
+            logger.warning("  ⚠ Phase 2 failed, using Phase 1 result", extra={'phase': 2})
             final_patterns = used_patterns
             final_waste = total_waste
             phase_used = 1
@@ -521,27 +1457,51 @@ def solve_with_lexicographic_optimization(
             final_patterns, final_waste = phase2_result
             phase_used = 2
             
-            if verbose:
-                improvement = total_waste - final_waste
-                print(f"  ✓ Waste improvement: {improvement:.2f}m")
+            logger.info("  ✓ Waste improvement: %.2fm", total_waste - final_waste, extra={'phase': 2})
+    
+    if minimize_patterns and len(final_patterns) > 1:
+        logger.info("\n[PHASE 3] Bars=%d fixed, waste ≤ %.2fm, minimizing distinct patterns...",
+                    min_bins, final_waste * (1 + waste_tolerance), extra={'phase': 3})
+        
+        stats['phase3'] = {}
+        phase_backend = (stats['phase2'] or stats['levels'][-1]['phase1']).get('backend')
+        with span('phase3', fixed_bins=min_bins, pattern_count=len(patterns)) as phase_span:
+            phase3_result = solve_phase3_minimize_patterns(
+                lengths=lengths,
+                counts=counts,
+                patterns=patterns,
+                fixed_bins=min_bins,
+                max_waste=final_waste * (1 + waste_tolerance),
+                bin_capacity=bin_capacity,
+                time_limit_ms=phase3_time_limit_ms,
+                verbose=verbose,
+                stats=stats['phase3'],
+                solver_backend=phase_backend if phase_backend in MIP_BACKENDS else 'SCIP',
+                hint=final_patterns
+            )
+            phase_span.set(status=stats['phase3'].get('status'))
+        
+        if phase3_result is not None and len(phase3_result[0]) < len(final_patterns):
+            logger.info("  ✓ Patterns: %d → %d", len(final_patterns), len(phase3_result[0]),
+                        extra={'phase': 3})
+            final_patterns, final_waste = phase3_result
+            phase_used = 3
+    
+    stats['total_time'] = time.perf_counter() - solve_start
     
     # FIXED: Use industry standard formula for waste percentage
     total_capacity = min_bins * bin_capacity
     waste_percentage = (final_waste / total_capacity) * 100  # ← FIXED: was (final_waste / total_demand)
     
-    if verbose:
-        print("\n" + "="*70)
-        print("RESULT SUMMARY")
-        print("="*70)
-        print(f"Bars used: {min_bins}")
-        print(f"Total capacity: {total_capacity:.2f}m")
-        print(f"Total waste: {final_waste:.2f}m")
-        print(f"Waste percentage: {waste_percentage:.2f}% (of total capacity)")  # ← FIXED: clarified
-        print(f"Phase used: {phase_used}")
-        if used_efficiency == 0.0 and theoretical_min == 1:
-            print(f"ℹ Efficiency: Not applicable (single-bar small order)")
-        elif used_efficiency != efficiency_levels[0]:
-            print(f"⚠ Reduced efficiency: {used_efficiency*100:.0f}% (initial: {efficiency_levels[0]*100:.0f}%)")
+    logger.debug("\n%s\nRESULT SUMMARY\n%s\nBars used: %d\nTotal capacity: %.2fm\n"
+                 "Total waste: %.2fm\nWaste percentage: %.2f%% (of total capacity)\nPhase used: %d",
+                 "="*70, "="*70, min_bins, total_capacity, final_waste, waste_percentage, phase_used,
+                 extra={'bars': min_bins, 'waste': final_waste, 'elapsed': stats['total_time']})
+    if used_efficiency == 0.0 and theoretical_min == 1:
+        logger.debug("ℹ Efficiency: Not applicable (single-bar small order)")
+    elif used_efficiency != efficiency_levels[0]:
+        logger.debug("⚠ Reduced efficiency: %.0f%% (initial: %.0f%%)",
+                     used_efficiency * 100, efficiency_levels[0] * 100)
     
     return {
         'used_patterns': final_patterns,
@@ -552,7 +1512,8 @@ def solve_with_lexicographic_optimization(
         'total_demand': total_demand,
         'total_capacity': total_capacity,  # ← FIXED: Added for clarity
         'phase_used': phase_used,
-        'used_efficiency': used_efficiency
+        'used_efficiency': used_efficiency,
+        'stats': stats
     }
 
 
@@ -561,26 +1522,27 @@ def print_results(
     lengths: List[float],
     bin_capacity: float = 12.0
 ):
-    """Print results"""
-    print("\n" + "="*70)
-    print("USED PATTERNS")
-    print("="*70)
+    """Print results (to the calculations.report logger)"""
+    lines = ["", "="*70, "USED PATTERNS", "="*70]
     
     used_patterns_sorted = sorted(result['used_patterns'], key=lambda x: x['waste'])
     
-    n_types = len(lengths)
     for up in used_patterns_sorted:
-        pattern_str = ' + '.join([f"{up['combo'][i]}x{lengths[i]}m" 
-                                 for i in range(n_types) if up['combo'][i] > 0])
+        pattern_str = ' + '.join([f"{pieces}x{lengths[i]}m" for i, pieces in up['cuts']])
         
-        calculated_total = sum(up['combo'][i] * lengths[i] for i in range(n_types))
-        calculated_waste = bin_capacity - calculated_total
+        calculated_total = sum(pieces * lengths[i] for i, pieces in up['cuts'])
+        capacity = up.get('stock_length', bin_capacity)     # multi-stock patterns carry their own
+        calculated_waste = capacity - calculated_total
         
-        print(f"\n{up['count']} bars → {pattern_str}")
-        print(f"  Total: {calculated_total:.2f}m | Waste: {calculated_waste:.2f}m | "
-              f"Utilization: {(calculated_total/bin_capacity)*100:.1f}%")
+        lines.append(f"\n{up['count']} bars → {pattern_str}")
+        lines.append(f"  Total: {calculated_total:.2f}m | Waste: {calculated_waste:.2f}m | "
+                     f"Utilization: {(calculated_total/capacity)*100:.1f}%")
+    
+    with console_output(False, print_output=True):
+        report_logger.info("\n".join(lines))
 
 
+@_console_args
 def solve_packing_lexicographic(
     lengths: List[float],
     counts: List[int],
@@ -591,34 +1553,82 @@ def solve_packing_lexicographic(
     phase2_time_limit_ms: int = 30000,
     verbose: bool = True,
     print_output: bool = True,
-    adaptive: bool = True
+    adaptive: bool = True,
+    solver_backend: str = 'SCIP',
+    minimize_patterns: bool = False,
+    waste_tolerance: float = 0.0,
+    phase3_time_limit_ms: Optional[int] = None,
+    lns_time_limit_ms: int = 10000,
+    mode: str = 'exact',
+    clusters: Optional[List[int]] = None
 ) -> Optional[Dict]:
     """
     Lexicographic optimization - Main function
+    
+    solver_backend: 'SCIP' (default), 'CBC', 'CP-SAT', 'greedy', 'portfolio'
+        (race all in parallel) or 'auto' (past portfolio winner)
+    minimize_patterns: Run Phase 3 (fewest distinct patterns = saw setups),
+        allowing waste_tolerance relative extra waste
+    phase3_time_limit_ms: Phase 3 budget, None = phase2_time_limit_ms
+    lns_time_limit_ms: Neighbourhood search budget when Phase 1 times out (0 = off)
+    mode: 'exact', 'residual' (LP rounding + exact residual, for counts in
+        the thousands - near-optimal in well under a second)
+        or 'decomposition' (hundreds of types - clusters solved in parallel,
+        then a cross-cluster repair, see decomposition.py)
+    clusters: Decomposition cluster label per type (e.g. building element),
+        None = length bands
     """
+    if not lengths:
+        raise ValueError("lengths cannot be empty!")
     if len(lengths) != len(counts):
         raise ValueError("lengths and counts must have same length!")
+    if mode not in PACKING_MODES:
+        raise ValueError(f"Unknown mode: {mode} (expected one of {', '.join(PACKING_MODES)})")
     
-    if verbose:
-        print("\n" + "="*70)
-        print("INPUT INFORMATION")
-        print("="*70)
-        total_demand = sum(l * c for l, c in zip(lengths, counts))
-        print(f"Total demand: {total_demand:.2f}m")
-        print(f"Bar length: {bin_capacity}m")
-        print(f"Number of cut types: {len(lengths)}")
-    
-    result = solve_with_lexicographic_optimization(
-        lengths=lengths,
-        counts=counts,
-        bin_capacity=bin_capacity,
-        min_efficiency=min_efficiency,
-        max_patterns=max_patterns,
-        phase1_time_limit_ms=phase1_time_limit_ms,
-        phase2_time_limit_ms=phase2_time_limit_ms,
-        verbose=verbose,
-        adaptive=adaptive
-    )
+    logger.debug("\n%s\nINPUT INFORMATION\n%s\nTotal demand: %.2fm\nBar length: %sm\n"
+                 "Number of cut types: %d", "="*70, "="*70,
+                 sum(l * c for l, c in zip(lengths, counts)), bin_capacity, len(lengths))
+    
+    if phase3_time_limit_ms is None:
+        phase3_time_limit_ms = phase2_time_limit_ms
+    
+    if mode == 'decomposition':
+        from decomposition import solve_decomposed
+        result = solve_decomposed(
+            lengths=lengths,
+            counts=counts,
+            bin_capacity=bin_capacity,
+            clusters=clusters,
+            min_efficiency=min_efficiency,
+            max_patterns=max_patterns,
+            phase1_time_limit_ms=phase1_time_limit_ms,
+            phase2_time_limit_ms=phase2_time_limit_ms,
+            repair_time_limit_ms=lns_time_limit_ms,
+            adaptive=adaptive,
+            solver_backend=solver_backend,
+            verbose=verbose,
+            minimize_patterns=minimize_patterns,
+            waste_tolerance=waste_tolerance,
+            phase3_time_limit_ms=phase3_time_limit_ms
+        )
+    else:
+        result = solve_with_lexicographic_optimization(
+            lengths=lengths,
+            counts=counts,
+            bin_capacity=bin_capacity,
+            min_efficiency=min_efficiency,
+            max_patterns=max_patterns,
+            phase1_time_limit_ms=phase1_time_limit_ms,
+            phase2_time_limit_ms=phase2_time_limit_ms,
+            verbose=verbose,
+            adaptive=adaptive,
+            solver_backend=solver_backend,
+            minimize_patterns=minimize_patterns,
+            waste_tolerance=waste_tolerance,
+            phase3_time_limit_ms=phase3_time_limit_ms,
+            lns_time_limit_ms=lns_time_limit_ms,
+            mode=mode
+        )
     
     if result and print_output:
         print_results(result, lengths, bin_capacity)
@@ -626,6 +1636,26 @@ def solve_packing_lexicographic(
     return result
 
 
+def _multi_stock_unsupported(
+    solver_backend: str,
+    minimize_patterns: bool,
+    mode: str,
+    clusters: Optional[List[int]]
+) -> List[str]:
+    """Settings of a single-stock solve the multi-stock engine cannot honour"""
+    unsupported = []
+    if solver_backend not in MIP_BACKENDS:
+        unsupported.append(f"solver_backend='{solver_backend}'")
+    if minimize_patterns:
+        unsupported.append("minimize_patterns")
+    if mode != 'exact':
+        unsupported.append(f"mode='{mode}'")
+    if clusters is not None:
+        unsupported.append("clusters")
+    return unsupported
+
+
+@_console_args
 def solve_multi_diameter_lexicographic(
     demands: Dict[int, Dict],
     bin_capacity: float = 12.0,
@@ -635,7 +1665,15 @@ def solve_multi_diameter_lexicographic(
     phase2_time_limit_ms: int = 90000,
     verbose: bool = True,
     print_output: bool = True,
-    adaptive: bool = True
+    adaptive: bool = True,
+    solver_backend: str = 'SCIP',
+    stocks: Optional[List] = None,
+    offcuts=None,
+    minimize_patterns: bool = False,
+    waste_tolerance: float = 0.0,
+    phase3_time_limit_ms: Optional[int] = None,
+    lns_time_limit_ms: int = 10000,
+    mode: str = 'exact'
 ) -> Dict[int, Optional[Dict]]:
     """
     Lexicographic optimization for multi-diameter steel
@@ -643,6 +1681,26 @@ def solve_multi_diameter_lexicographic(
     Args:
         demands: {diameter: {'lengths': [...], 'counts': [...]}}
         adaptive: Auto-reduce efficiency (recommended: True)
+        solver_backend: Phase 1 backend, see solve_packing_lexicographic
+        stocks: Several stock lengths (with prices) instead of bin_capacity,
+            solved with multistock.solve_multi_stock; demand_data['stocks']
+            overrides it per diameter. That engine needs a MIP backend and
+            has no Phase 3, residual or decomposition mode - asking for one
+            raises ValueError
+        offcuts: offcuts.OffcutInventory - stored remnants of each diameter
+            join the stock list as limited-quantity bars (book the plan
+            with offcuts.apply_plan afterwards). A diameter with remnants
+            is solved by the multi-stock engine; settings it cannot honour
+            are logged as a warning and left out, SCIP stands in for a
+            non-MIP backend
+        minimize_patterns: Phase 3 - fewest distinct patterns, see
+            solve_packing_lexicographic (single-stock solves only)
+        phase3_time_limit_ms: Phase 3 budget, None = phase2_time_limit_ms
+        lns_time_limit_ms: Neighbourhood search after a timed-out Phase 1
+            (single-stock solves only, the multi-stock engine has none; 0 = off)
+        mode: 'exact', 'residual' or 'decomposition', see
+            solve_packing_lexicographic (single-stock solves only);
+            demand_data['clusters'] labels the types for a decomposition
     
     Returns:
         {diameter: result_dict}
@@ -650,6 +1708,15 @@ def solve_multi_diameter_lexicographic(
     if not demands:
         raise ValueError("demands cannot be empty!")
     
+    # Check every diameter up front - not after the first ones are solved
+    for diameter, demand_data in demands.items():
+        if demand_data.get('stocks', stocks):
+            unsupported = _multi_stock_unsupported(solver_backend, minimize_patterns, mode,
+                                                   demand_data.get('clusters'))
+            if unsupported:
+                raise ValueError(f"Multi-stock solve of diameter {diameter}mm does not support "
+                                 f"{', '.join(unsupported)}!")
+    
     results = {}
     
     for diameter in sorted(demands.keys()):
@@ -658,74 +1725,116 @@ def solve_multi_diameter_lexicographic(
         if 'lengths' not in demand_data or 'counts' not in demand_data:
             raise ValueError(f"'lengths' and 'counts' required for diameter {diameter}mm!")
         
-        if print_output:
-            print("\n" + "="*80)
-            print(f"DIAMETER: {diameter}mm")
-            print("="*80)
+        report_logger.info("\n%s\nDIAMETER: %dmm\n%s", "="*80, diameter, "="*80,
+                           extra={'diameter': diameter})
         
         current_bin_capacity = demand_data.get('bin_capacity', bin_capacity)
+        current_stocks = demand_data.get('stocks', stocks)
+        if offcuts is not None:
+            remnants = offcuts.as_stocks(diameter, min(demand_data['lengths']))
+            if remnants:
+                if not current_stocks:
+                    unsupported = _multi_stock_unsupported(solver_backend, minimize_patterns, mode,
+                                                           demand_data.get('clusters'))
+                    if unsupported:
+                        logger.warning("⚠ Stored offcuts of %dmm - the multi-stock engine solves it "
+                                       "without %s", diameter, ", ".join(unsupported))
+                current_stocks = list(current_stocks or [current_bin_capacity]) + remnants
         
-        result = solve_packing_lexicographic(
-            lengths=demand_data['lengths'],
-            counts=demand_data['counts'],
-            bin_capacity=current_bin_capacity,
-            min_efficiency=min_efficiency,
-            max_patterns=max_patterns,
-            phase1_time_limit_ms=phase1_time_limit_ms,
-            phase2_time_limit_ms=phase2_time_limit_ms,
-            verbose=verbose,
-            print_output=print_output,
-            adaptive=adaptive
-        )
+        with log_context(diameter=diameter), \
+                span('diameter', diameter=diameter, n_types=len(demand_data['lengths'])):
+            if current_stocks:
+                from multistock import solve_multi_stock
+                results[diameter] = solve_multi_stock(
+                    lengths=demand_data['lengths'],
+                    counts=demand_data['counts'],
+                    stocks=current_stocks,
+                    min_efficiency=min_efficiency,
+                    max_patterns=max_patterns,
+                    phase1_time_limit_ms=phase1_time_limit_ms,
+                    phase2_time_limit_ms=phase2_time_limit_ms,
+                    verbose=verbose,
+                    adaptive=adaptive,
+                    solver_backend=solver_backend if solver_backend in MIP_BACKENDS else 'SCIP'
+                )
+                if results[diameter] and print_output:
+                    print_results(results[diameter], demand_data['lengths'], current_bin_capacity)
+                continue
+            
+            result = solve_packing_lexicographic(
+                lengths=demand_data['lengths'],
+                counts=demand_data['counts'],
+                bin_capacity=current_bin_capacity,
+                min_efficiency=min_efficiency,
+                max_patterns=max_patterns,
+                phase1_time_limit_ms=phase1_time_limit_ms,
+                phase2_time_limit_ms=phase2_time_limit_ms,
+                verbose=verbose,
+                print_output=print_output,
+                adaptive=adaptive,
+                solver_backend=solver_backend,
+                minimize_patterns=minimize_patterns,
+                waste_tolerance=waste_tolerance,
+                phase3_time_limit_ms=phase3_time_limit_ms,
+                lns_time_limit_ms=lns_time_limit_ms,
+                mode=mode,
+                clusters=demand_data.get('clusters')
+            )
         
         results[diameter] = result
     
     # Overall summary - FIXED: Use correct waste percentage formula
     if print_output:
-        print("\n" + "="*80)
-        print("OVERALL SUMMARY - ALL DIAMETERS (FIXED VERSION)")
-        print("="*80)
+        lines = ["", "="*80, "OVERALL SUMMARY - ALL DIAMETERS (FIXED VERSION)", "="*80]
         
         total_bins_all = 0
+        stock_lengths = set()   # every stock length a plan cuts from
         total_waste_all = 0
         total_capacity_all = 0  # ← FIXED: Track total capacity
         total_demand_all = 0
         
-        print(f"\n{'DIAM(mm)':<12} {'BARS':<10} {'WASTE(m)':<12} {'WASTE%':<10} "
-              f"{'DEMAND(m)':<12} {'PHASE':<8} {'EFFIC':<8}")
-        print("-" * 85)
+        lines.append(f"\n{'DIAM(mm)':<12} {'BARS':<10} {'WASTE(m)':<12} {'WASTE%':<10} "
+                     f"{'DEMAND(m)':<12} {'PHASE':<8} {'EFFIC':<8}")
+        lines.append("-" * 85)
         
         for diameter in sorted(results.keys()):
             result = results[diameter]
             if result:
                 effic_str = f"{result.get('used_efficiency', min_efficiency)*100:.0f}%"
-                print(f"{diameter:<12} {result['total_bins']:<10} "
-                      f"{result['total_waste']:<12.2f} "
-                      f"{result['waste_percentage']:<10.2f} "
-                      f"{result['total_demand']:<12.2f} "
-                      f"{result['phase_used']:<8} "
-                      f"{effic_str:<8}")
+                lines.append(f"{diameter:<12} {result['total_bins']:<10} "
+                             f"{result['total_waste']:<12.2f} "
+                             f"{result['waste_percentage']:<10.2f} "
+                             f"{result['total_demand']:<12.2f} "
+                             f"{result['phase_used']:<8} "
+                             f"{effic_str:<8}")
                 
                 total_bins_all += result['total_bins']
+                stock_lengths.update(result['stock_mix'] if 'stock_mix' in result
+                                     else [demands[diameter].get('bin_capacity', bin_capacity)])
                 total_waste_all += result['total_waste']
                 total_capacity_all += result['total_capacity']  # ← FIXED
                 total_demand_all += result['total_demand']
             else:
-                print(f"{diameter:<12} {'NO SOLUTION':<10}")
+                lines.append(f"{diameter:<12} {'NO SOLUTION':<10}")
         
-        print("-" * 85)
+        lines.append("-" * 85)
         
         # FIXED: Use correct formula for overall waste percentage
         avg_waste_pct = (total_waste_all / total_capacity_all * 100) if total_capacity_all > 0 else 0
         
-        print(f"{'TOTAL':<12} {total_bins_all:<10} "
-              f"{total_waste_all:<12.2f} "
-              f"{avg_waste_pct:<10.2f} "
-              f"{total_demand_all:<12.2f}")
-        print(f"\nTotal capacity: {total_capacity_all:.2f}m ({total_bins_all} bars × {bin_capacity}m)")
-        print("="*85)
-        print("\n✓ FIXED: Waste % = (Total Waste / Total Capacity) × 100")
-        print(f"  = ({total_waste_all:.2f}m / {total_capacity_all:.2f}m) × 100")
-        print(f"  = {avg_waste_pct:.2f}%")
+        lines.append(f"{'TOTAL':<12} {total_bins_all:<10} "
+                     f"{total_waste_all:<12.2f} "
+                     f"{avg_waste_pct:<10.2f} "
+                     f"{total_demand_all:<12.2f}")
+        if len(stock_lengths) > 1:
+            lines.append(f"\nTotal capacity: {total_capacity_all:.2f}m ({total_bins_all} bars, mixed stock)")
+        else:
+            stock_length = next(iter(stock_lengths), bin_capacity)
+            lines.append(f"\nTotal capacity: {total_capacity_all:.2f}m ({total_bins_all} bars × {stock_length}m)")
+        lines.append("="*85)
+        lines.append("\n✓ FIXED: Waste % = (Total Waste / Total Capacity) × 100")
+        lines.append(f"  = ({total_waste_all:.2f}m / {total_capacity_all:.2f}m) × 100")
+        lines.append(f"  = {avg_waste_pct:.2f}%")
+        report_logger.info("\n".join(lines))
     
     return results
\ No newline at end of file
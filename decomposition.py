@@ -0,0 +1,240 @@
+#decomposition.py
+# civileng.serdar@gmail.com
+"""
+Decomposition for very large cut lists - hundreds of lengths of one diameter
+
+One MIP over every pattern of several hundred cut types does not finish in
+the time limit, and the pattern pool alone grows with the cube of the
+types. Instead the types are split into clusters of at most cluster_size
+types, each cluster is solved with the regular lexicographic engine in a
+process pool, and the cluster plans are joined. A repair pass (lns.py)
+then re-packs the highest-waste bars across cluster boundaries. A cluster
+the engine finds no plan for (its capped pool misses a pattern) is retried
+with a wider pool, then falls back to a best-fit-decreasing plan that is
+left to the repair.
+
+Clusters either come from the caller (one label per type, e.g. the
+building element) or are length bands: types sorted by length are dealt
+to the clusters in serpentine order, so every cluster gets a share of each
+band - long pieces keep short ones to fill their offcuts. With a fixed
+cluster size, generation and solve work grow linearly with the types.
+
+    result = solve_packing_lexicographic(lengths, counts, mode='decomposition')
+"""
+
+import bisect
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Optional, Tuple
+
+from calculations import logger, span, _used_patterns, MIP_BACKENDS, SOLVER_BACKENDS
+from patterns import PatternStore
+
+
+CLUSTER_SIZE = 30           # cut types per cluster
+RETRY_POOL_FACTOR = 4       # pool size of the second try of a failed cluster
+
+
+def length_bands(lengths: List[float], cluster_size: int = CLUSTER_SIZE) -> List[int]:
+    """Cluster label per type: sorted by length, dealt serpentine to the clusters"""
+    n_clusters = max(1, math.ceil(len(lengths) / cluster_size))
+    labels = [0] * len(lengths)
+    for rank, t in enumerate(sorted(range(len(lengths)), key=lambda t: -lengths[t])):
+        lap, position = divmod(rank, n_clusters)
+        labels[t] = position if lap % 2 == 0 else n_clusters - 1 - position
+    return labels
+
+
+def _best_fit_plan(
+    types: List[int],
+    lengths: List[float],
+    counts: List[int],
+    bin_capacity: float
+) -> List[Tuple[Tuple[int, int], ...]]:
+    """Best-fit-decreasing packing of the given types - one cut list per bar, always feasible"""
+    bars: List[Dict[int, int]] = []
+    free: List[Tuple[float, int]] = []      # (remaining space, bar), ascending
+    for t in sorted(types, key=lambda t: -lengths[t]):
+        for _ in range(counts[t]):
+            k = bisect.bisect_left(free, (lengths[t] - 1e-9, -1))
+            if k < len(free):
+                space, b = free.pop(k)
+            else:
+                space, b = bin_capacity, len(bars)
+                bars.append({})
+            bars[b][t] = bars[b].get(t, 0) + 1
+            bisect.insort(free, (space - lengths[t], b))
+    return [tuple(sorted(bar.items())) for bar in bars]
+
+
+def _solve_cluster(task: Tuple) -> Tuple[List[int], Optional[Dict]]:
+    """Process pool entry point - one cluster with the regular engine"""
+    from calculations import solve_with_lexicographic_optimization
+
+    types, lengths, counts, bin_capacity, settings = task
+    result = solve_with_lexicographic_optimization(
+        lengths=lengths,
+        counts=counts,
+        bin_capacity=bin_capacity,
+        **settings
+    )
+    if not result:
+        # The capped pool can miss the one pattern a type needs - retry with a wider one
+        result = solve_with_lexicographic_optimization(
+            lengths=lengths,
+            counts=counts,
+            bin_capacity=bin_capacity,
+            **dict(settings, max_patterns=settings['max_patterns'] * RETRY_POOL_FACTOR)
+        )
+    return types, result
+
+
+def solve_decomposed(
+    lengths: List[float],
+    counts: List[int],
+    bin_capacity: float = 12.0,
+    clusters: Optional[List[int]] = None,
+    cluster_size: int = CLUSTER_SIZE,
+    min_efficiency: float = 0.85,
+    max_patterns: int = 500,
+    phase1_time_limit_ms: int = 30000,
+    phase2_time_limit_ms: int = 30000,
+    repair_time_limit_ms: int = 10000,
+    adaptive: bool = True,
+    solver_backend: str = 'SCIP',
+    max_workers: Optional[int] = None,
+    verbose: bool = False,
+    minimize_patterns: bool = False,
+    waste_tolerance: float = 0.0,
+    phase3_time_limit_ms: int = 30000
+) -> Optional[Dict]:
+    """
+    Solve by clusters, join and repair
+
+    clusters: Cluster label per type (e.g. building element); None =
+        length_bands(lengths, cluster_size)
+    repair_time_limit_ms: Budget of the cross-cluster LNS repair (0 = off)
+    minimize_patterns, waste_tolerance, phase3_time_limit_ms: Phase 3 in
+        every cluster (see solve_with_lexicographic_optimization); the
+        repair can still add a few patterns where it saves bars or waste
+
+    Returns the solve_with_lexicographic_optimization result format; stats
+    hold one entry per cluster under 'clusters' and the repair under 'lns'.
+    A cluster without a solution falls back to a best-fit-decreasing plan
+    (its entry has 'fallback': True) and the repair runs even for a single
+    cluster then.
+    """
+    solve_start = time.perf_counter()
+    if not lengths:
+        raise ValueError("lengths cannot be empty!")
+    if len(lengths) != len(counts):
+        raise ValueError("lengths and counts must have same length!")
+    if solver_backend not in SOLVER_BACKENDS:
+        raise ValueError(f"Unknown solver_backend: {solver_backend} "
+                         f"(expected one of {', '.join(SOLVER_BACKENDS)})")
+    if max(lengths) > bin_capacity:
+        logger.warning("❌ Cut too long: %.2fm does not fit in a %sm bar", max(lengths), bin_capacity)
+        return None
+
+    labels = clusters if clusters is not None else length_bands(lengths, cluster_size)
+    if len(labels) != len(lengths):
+        raise ValueError("clusters must have one label per cut type!")
+    groups: Dict = {}
+    for t, label in enumerate(labels):
+        if counts[t] > 0:
+            groups.setdefault(label, []).append(t)
+
+    settings = {
+        'min_efficiency': min_efficiency,
+        'max_patterns': max_patterns,
+        'phase1_time_limit_ms': phase1_time_limit_ms,
+        'phase2_time_limit_ms': phase2_time_limit_ms,
+        'adaptive': adaptive,
+        'solver_backend': solver_backend,
+        'verbose': verbose,
+        'minimize_patterns': minimize_patterns,
+        'waste_tolerance': waste_tolerance,
+        'phase3_time_limit_ms': phase3_time_limit_ms,
+        'lns_time_limit_ms': 0          # the repair pass below covers it
+    }
+    tasks = [(types, [lengths[t] for t in types], [counts[t] for t in types], bin_capacity, settings)
+             for types in groups.values()]
+
+    logger.info("\n[DECOMPOSITION] %d types in %d clusters", len(lengths), len(tasks))
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, len(tasks)))
+    with span('clusters', clusters=len(tasks), n_types=len(lengths)):
+        if max_workers == 1:
+            outcomes = [_solve_cluster(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                outcomes = list(executor.map(_solve_cluster, tasks))
+
+    # Join the cluster plans on one store of global type indices
+    store = PatternStore(lengths, bin_capacity)
+    values: Dict[int, int] = {}
+    cluster_stats = []
+    fallbacks = 0
+    for types, result in outcomes:
+        if result:
+            bars = [(tuple((types[i], pieces) for i, pieces in used['cuts']), used['count'])
+                    for used in result['used_patterns']]
+            cluster_stats.append({
+                'types': len(types), 'bars': result['total_bins'], 'waste': result['total_waste'],
+                'phase_used': result['phase_used'], 'used_efficiency': result['used_efficiency'],
+                'total_time': result['stats']['total_time'], 'fallback': False
+            })
+        else:
+            fallbacks += 1
+            plan = _best_fit_plan(types, lengths, counts, bin_capacity)
+            bars = [(cuts, 1) for cuts in plan]
+            waste = sum(bin_capacity - sum(lengths[t] * n for t, n in cuts) for cuts in plan)
+            logger.warning("⚠ No solution for the cluster of %d types - best-fit plan of %d bars, "
+                           "left to the repair", len(types), len(plan))
+            cluster_stats.append({
+                'types': len(types), 'bars': len(plan), 'waste': waste,
+                'phase_used': 0, 'used_efficiency': 0.0, 'total_time': 0.0, 'fallback': True
+            })
+        for cuts, count in bars:
+            p = store.find(cuts)
+            if p < 0:
+                p = store.add(cuts)
+            values[p] = values.get(p, 0) + count
+    used_patterns, total_waste = _used_patterns(store, [values.get(p, 0) for p in range(len(store))])
+    min_bins = sum(values.values())
+    logger.info("  → Clusters joined: %d bars, waste %.2fm", min_bins, total_waste,
+                extra={'bars': min_bins, 'waste': total_waste})
+
+    total_demand = sum(l * c for l, c in zip(lengths, counts))
+    theoretical_min = math.ceil(total_demand / bin_capacity)
+    stats = {'levels': [], 'clusters': cluster_stats, 'lns': None, 'phase2': None, 'phase3': None}
+
+    if repair_time_limit_ms > 0 and (len(tasks) > 1 or fallbacks):
+        from lns import improve_plan
+
+        stats['lns'] = {}
+        with span('repair', start_bars=min_bins):
+            min_bins, used_patterns, total_waste = improve_plan(
+                lengths, counts, store, used_patterns,
+                time_limit_ms=repair_time_limit_ms,
+                solver_backend=solver_backend if solver_backend in MIP_BACKENDS else 'SCIP',
+                stats=stats['lns']
+            )
+
+    stats['total_time'] = time.perf_counter() - solve_start
+    total_capacity = min_bins * bin_capacity
+    return {
+        'used_patterns': used_patterns,
+        'total_bins': min_bins,
+        'total_waste': total_waste,
+        'waste_percentage': total_waste / total_capacity * 100 if total_capacity else 0.0,
+        'theoretical_min': theoretical_min,
+        'total_demand': total_demand,
+        'total_capacity': total_capacity,
+        'phase_used': 1,
+        'used_efficiency': min((c['used_efficiency'] for c in cluster_stats), default=min_efficiency),
+        'stats': stats
+    }
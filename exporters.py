@@ -0,0 +1,708 @@
+#exporters.py
+# civileng.serdar@gmail.com
+"""
+Cutting plan exports rendered from the report model (report.py)
+
+Text:  production instruction shown in the GUI, saved as TXT and copied
+Excel: write-only (streaming) workbook with shared named styles,
+       one summary sheet + one sheet per diameter
+PDF:   bundled DejaVu subset, tables drawn in bulk per page with a
+       page template (running header, page numbers)
+Data:  one record per physical bar for saw-line controllers / ERP,
+       as JSON Lines (.jsonl), CSV (.csv) or Parquet (.parquet)
+
+Bar record schema (save_plan_data / iter_bar_records):
+    bar_id          int         1-based running number over the whole plan
+    diameter_mm     int         rebar diameter
+    stock_length_m  float       length of the stock bar cut
+    pattern_id      str         "<diameter>-<pattern no>", same numbering as the reports
+    bar_in_pattern  int         1..count within the pattern
+    cuts_m          [float]     cut sequence, longest piece first
+    pieces          int         number of pieces cut from the bar
+    used_m          float       sum of the cuts
+    waste_m         float       offcut left on the bar
+    source_lines    [int]       input demand lines (1-based) the pieces belong to
+CSV writes the two list columns joined with ';'.
+
+Stats: solver timings per diameter / adaptive level / phase
+       (save_solver_stats → .json or .csv)
+"""
+
+import csv
+import json
+import os
+import sys
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from report import CuttingPlanReport, DiameterReport, PatternRow
+
+
+# Column layout of the pattern sheets
+PATTERN_HEADERS = ['Pattern', 'Bars', 'Cuts', 'Total(m)', 'Waste(m)']
+SUMMARY_HEADERS = ['DIAM(mm)', 'BARS', 'WASTE(m)', 'WASTE%', 'DEMAND(m)']
+COLUMN_WIDTHS = {'A': 15, 'B': 12, 'C': 30, 'D': 12, 'E': 12}
+
+
+def _pattern_label(d: DiameterReport, p: PatternRow) -> str:
+    """'Pattern 3', or 'Pattern 3 (9m)' when the diameter mixes stock lengths"""
+    if d.mixed_stock:
+        return f"Pattern {p.index} ({p.stock_length:g}m)"
+    return f"Pattern {p.index}"
+
+
+def _stock_mix_text(d: DiameterReport) -> str:
+    """e.g. '12×9m + 40×12m (cost 600.00)'"""
+    text = " + ".join(f"{bars}×{length:g}m" for length, bars in d.stock_mix)
+    if d.total_cost is not None:
+        text += f" (cost {d.total_cost:.2f})"
+    return text
+
+
+def render_report_text(report: CuttingPlanReport) -> str:
+    """Cutting plan as plain text (GUI view, TXT file and clipboard)"""
+    out = []
+    add = out.append
+
+    add("=" * 80 + "\n")
+    add("CUTTING PLAN - PRODUCTION INSTRUCTION\n")
+    add("=" * 80 + "\n\n")
+
+    add(f"Date: {report.created.strftime('%d.%m.%Y %H:%M')}\n")
+    add(f"Stock Bar Length: {report.stock_text()}\n\n")
+
+    # SUMMARY TABLE
+    add("=" * 85 + "\n")
+    add("OVERALL SUMMARY - ALL DIAMETERS\n")
+    add("=" * 85 + "\n\n")
+
+    add(f"{'DIAM(mm)':<12} {'BARS':<10} {'WASTE(m)':<12} {'WASTE%':<10} {'DEMAND(m)':<12}\n")
+    add("-" * 60 + "\n")
+
+    for d in report.diameters:
+        if d.solved:
+            add(f"{d.diameter:<12} {d.total_bins:<10} "
+                f"{d.total_waste:<12.2f} "
+                f"{d.waste_percentage:<10.2f} "
+                f"{d.total_demand:<12.2f}\n")
+        else:
+            add(f"{d.diameter:<12} {'NO SOLUTION':<10}\n")
+
+    add("-" * 60 + "\n")
+    add(f"{'TOTAL':<12} {report.total_bars:<10} "
+        f"{report.total_waste:<12.2f} "
+        f"{report.waste_percentage:<10.2f} "
+        f"{report.total_demand:<12.2f}\n")
+    add("=" * 85 + "\n\n")
+
+    # Patterns for each diameter
+    for d in report.diameters:
+        add(f"\n{'='*80}\n")
+        add(f"DIAMETER: Ø{d.diameter}mm\n")
+
+        if not d.solved:
+            add(f"{'='*80}\n")
+            add("⚠️ NO SOLUTION FOUND\n\n")
+            continue
+
+        add(f"{'='*80}\n\n")
+        add(f"Demand: {d.total_demand:.2f}m\n")
+        add(f"Bars (Theoretical/Used): {d.theoretical_min}/{d.total_bins} bars\n")
+        add(f"Waste: {d.total_waste:.2f}m ({d.waste_percentage:.2f}%)\n")
+        if d.stock_mix:
+            add(f"Stock mix: {_stock_mix_text(d)}\n")
+        if d.max_open_stacks is not None:
+            add(f"Cutting order: as listed (max {d.max_open_stacks} open stacks)\n")
+        add("\n")
+
+        add("-" * 80 + "\n")
+        add("CUTTING PATTERNS:\n")
+        add("-" * 80 + "\n\n")
+
+        for p in d.patterns:
+            add(f"{_pattern_label(d, p)}: {p.count} bars\n")
+            add(f"  Cuts: {p.cuts_text()}\n")
+            add(f"  Total: {p.total:.2f}m | Waste: {p.waste:.2f}m | Utilization: {p.utilization:.1f}%\n")
+            if p.closes:
+                add(f"  Completes: {', '.join(f'{length:.2f}m' for length in p.closes)} "
+                    f"({p.open_stacks} stacks open)\n")
+            add("\n")
+
+    add("=" * 80 + "\n")
+    add("⚠️ NOTE: Double-check all measurements before cutting.\n")
+    add("=" * 80 + "\n")
+    add("END OF CUTTING PLAN\n")
+    add("=" * 80 + "\n")
+
+    return "".join(out)
+
+
+def save_report_text(report: CuttingPlanReport, filename: str):
+    """Save the cutting plan as a UTF-8 text file"""
+    with open(filename, 'w', encoding='utf-8') as f:
+        f.write(render_report_text(report))
+
+
+def _register_styles(wb):
+    """Register the named styles once per workbook - cells only reference them"""
+    from openpyxl.styles import NamedStyle, Font, Alignment, PatternFill, Border, Side
+
+    thin = Side(style='thin')
+    border = Border(left=thin, right=thin, top=thin, bottom=thin)
+    center = Alignment(horizontal='center')
+
+    styles = [
+        NamedStyle(name='demirci_title', font=Font(bold=True, size=14)),
+        NamedStyle(name='demirci_subtitle', font=Font(bold=True, size=12)),
+        NamedStyle(
+            name='demirci_header',
+            font=Font(bold=True, color="FFFFFF", size=11),
+            fill=PatternFill(start_color="5F9598", end_color="5F9598", fill_type="solid"),
+            alignment=center,
+            border=border
+        ),
+        NamedStyle(name='demirci_cell', alignment=center, border=border),
+        NamedStyle(name='demirci_cell_left', alignment=Alignment(horizontal='left'), border=border),
+        NamedStyle(name='demirci_total', font=Font(bold=True), alignment=center, border=border),
+    ]
+    for style in styles:
+        wb.add_named_style(style)
+
+
+def _styled_row(ws, values, style):
+    """Row of WriteOnlyCells sharing one named style (style may be per column)"""
+    from openpyxl.cell import WriteOnlyCell
+
+    row = []
+    for col, value in enumerate(values):
+        cell = WriteOnlyCell(ws, value=value)
+        cell.style = style[col] if isinstance(style, (list, tuple)) else style
+        row.append(cell)
+    return row
+
+
+class _TableWriter:
+    """
+    Appends table rows through one set of pre-styled cells
+
+    Write-only sheets serialize a row as soon as it is appended, so the
+    same styled cells can be refilled for every row instead of resolving
+    the named style again per cell.
+    """
+
+    def __init__(self, ws, styles):
+        self.ws = ws
+        self.cells = _styled_row(ws, [None] * len(styles), styles)
+
+    def append(self, values):
+        for cell, value in zip(self.cells, values):
+            cell.value = value
+        self.ws.append(self.cells)
+
+
+def _new_sheet(wb, title):
+    ws = wb.create_sheet(title=title)
+    for col, width in COLUMN_WIDTHS.items():
+        ws.column_dimensions[col].width = width
+    return ws
+
+
+def save_report_xlsx(report: CuttingPlanReport, filename: str):
+    """
+    Save the cutting plan as Excel (streaming write-only workbook)
+
+    Rows are written once and never held as cell objects, so time and
+    memory grow linearly with the number of pattern rows.
+    """
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    _register_styles(wb)
+
+    # Summary sheet
+    ws = _new_sheet(wb, "Cutting Plan")
+    ws.append(_styled_row(ws, ["CUTTING PLAN - PRODUCTION INSTRUCTION"], 'demirci_title'))
+    ws.append([])
+    ws.append([f"Date: {report.created.strftime('%d.%m.%Y %H:%M')}"])
+    ws.append([f"Stock Bar Length: {report.stock_text()}"])
+    ws.append([])
+    ws.append(_styled_row(ws, ["OVERALL SUMMARY - ALL DIAMETERS"], 'demirci_subtitle'))
+    ws.append(_styled_row(ws, SUMMARY_HEADERS, 'demirci_header'))
+
+    table = _TableWriter(ws, ['demirci_cell'] * len(SUMMARY_HEADERS))
+    for d in report.diameters:
+        if d.solved:
+            table.append([d.diameter, d.total_bins, round(d.total_waste, 2),
+                          round(d.waste_percentage, 2), round(d.total_demand, 2)])
+        else:
+            table.append([d.diameter, 'NO SOLUTION', '', '', ''])
+
+    ws.append(_styled_row(ws, [
+        'TOTAL', report.total_bars, round(report.total_waste, 2),
+        round(report.waste_percentage, 2), round(report.total_demand, 2)
+    ], 'demirci_total'))
+
+    # One sheet per diameter
+    pattern_styles = ['demirci_cell', 'demirci_cell', 'demirci_cell_left',
+                      'demirci_cell', 'demirci_cell']
+
+    for d in report.solved:
+        ws = _new_sheet(wb, f"Ø{d.diameter}mm")
+        ws.append(_styled_row(ws, [f"DIAMETER: Ø{d.diameter}mm"], 'demirci_subtitle'))
+        ws.append([f"Demand: {d.total_demand:.2f}m"])
+        ws.append([f"Bars (Theoretical/Used): {d.theoretical_min}/{d.total_bins} bars"])
+        ws.append([f"Waste: {d.total_waste:.2f}m ({d.waste_percentage:.2f}%)"])
+        if d.stock_mix:
+            ws.append([f"Stock mix: {_stock_mix_text(d)}"])
+        if d.max_open_stacks is not None:
+            ws.append([f"Cutting order: as listed (max {d.max_open_stacks} open stacks)"])
+        ws.append([])
+        ws.append(_styled_row(ws, PATTERN_HEADERS, 'demirci_header'))
+
+        table = _TableWriter(ws, pattern_styles)
+        for p in d.patterns:
+            table.append([
+                _pattern_label(d, p), p.count, p.cuts_text(),
+                round(p.total, 2), round(p.waste, 2)
+            ])
+
+    wb.save(filename)
+
+
+
+# ---------------------------------------------------------------------------
+# PDF
+# ---------------------------------------------------------------------------
+
+PDF_HEADER_COLOR = (95, 149, 152)
+PDF_STRIPE_COLOR = (248, 249, 249)
+PDF_FONT_FAMILY = 'DejaVu'
+
+SUMMARY_WIDTHS = (30, 25, 30, 25, 30)
+PATTERN_WIDTHS = (25, 20, 75, 25, 25)
+
+
+def _resource_dir() -> str:
+    """Folder of bundled resources (PyInstaller unpacks to sys._MEIPASS)"""
+    return getattr(sys, '_MEIPASS', os.path.dirname(os.path.abspath(__file__)))
+
+
+@lru_cache(maxsize=None)
+def _pdf_font_files() -> Optional[Tuple[str, str]]:
+    """Bundled (regular, bold) font subset - resolved once per process"""
+    font_dir = os.path.join(_resource_dir(), 'fonts')
+    regular = os.path.join(font_dir, 'DejaVuSans-Subset.ttf')
+    bold = os.path.join(font_dir, 'DejaVuSans-Bold-Subset.ttf')
+    if os.path.exists(regular) and os.path.exists(bold):
+        return regular, bold
+    return None
+
+
+def _latin1(text: str) -> str:
+    """Core PDF fonts only know Latin-1"""
+    return text.encode('latin-1', 'replace').decode('latin-1')
+
+
+def _plan_pdf_class():
+    from fpdf import FPDF
+
+    class PlanPDF(FPDF):
+        """Page template: running header from page 2 on, page numbers in the footer"""
+
+        def __init__(self, running_title: str):
+            super().__init__()
+            fonts = _pdf_font_files()
+            if fonts:
+                self.add_font(PDF_FONT_FAMILY, '', fonts[0])
+                self.add_font(PDF_FONT_FAMILY, 'B', fonts[1])
+                self.family = PDF_FONT_FAMILY
+                self.clean = str
+            else:
+                # Bundled font missing - fall back to a core font
+                self.family = 'helvetica'
+                self.clean = _latin1
+            self.running_title = self.clean(running_title)
+            self.alias_nb_pages()
+            self.set_auto_page_break(True, margin=15)
+            self._width_cache = {}
+
+        def header(self):
+            if self.page_no() > 1:
+                self.set_font(self.family, '', 8)
+                self.set_text_color(127, 140, 141)
+                self.cell(0, 5, self.running_title, align='R', new_x='LMARGIN', new_y='NEXT')
+                self.ln(2)
+
+        def footer(self):
+            self.set_y(-12)
+            self.set_font(self.family, '', 8)
+            self.set_text_color(127, 140, 141)
+            self.cell(0, 5, f"Page {self.page_no()}/{{nb}}", align='C')
+
+        def line_text(self, text: str, size: float = 10, height: float = 6,
+                      style: str = '', align: str = 'L'):
+            self.set_font(self.family, style, size)
+            self.set_text_color(0, 0, 0)
+            self.cell(0, height, self.clean(text), align=align, new_x='LMARGIN', new_y='NEXT')
+
+        def string_width(self, text: str) -> float:
+            """get_string_width memoized per font - table cells repeat a lot"""
+            key = (self.font_style, self.font_size_pt, text)
+            width = self._width_cache.get(key)
+            if width is None:
+                width = self._width_cache[key] = self.get_string_width(text)
+            return width
+
+        def grid_table(self, headers: Sequence[str], rows: List[Sequence[str]],
+                       widths: Sequence[float], aligns: str, row_height: float = 6,
+                       total_row: Optional[Sequence[str]] = None):
+            """
+            Bordered table with striped rows, drawn in bulk
+
+            Only the text is placed per cell; stripes, row lines and the
+            column lines are drawn once per row / once per page, and the
+            heading row is repeated after every page break.
+            """
+            xs = [self.l_margin]
+            for w in widths:
+                xs.append(xs[-1] + w)
+            bottom = self.h - self.b_margin
+            self.set_draw_color(0, 0, 0)
+            self.set_line_width(0.2)
+
+            def put_row(y, values, style):
+                self.set_font(self.family, style, 9)
+                baseline = y + (row_height + self.font_size * 0.7) / 2
+                for i, value in enumerate(values):
+                    value = self.clean(str(value))
+                    if aligns[i] == 'L':
+                        x = xs[i] + 1.5
+                    else:
+                        x = xs[i] + (widths[i] - self.string_width(value)) / 2
+                    self.text(x, baseline, value)
+
+            def heading(y):
+                self.set_fill_color(*PDF_HEADER_COLOR)
+                self.rect(xs[0], y, xs[-1] - xs[0], row_height, style='DF')
+                self.set_text_color(255, 255, 255)
+                put_row(y, headers, 'B')
+                self.set_text_color(0, 0, 0)
+                return y + row_height
+
+            def close_columns(top, y):
+                for x in xs:
+                    self.line(x, top, x, y)
+
+            top = self.get_y()
+            y = heading(top)
+            self.set_fill_color(*PDF_STRIPE_COLOR)
+
+            body = list(rows)
+            if total_row is not None:
+                body.append(total_row)
+
+            for n, values in enumerate(body):
+                if y + row_height > bottom:
+                    close_columns(top, y)
+                    self.add_page()
+                    top = self.get_y()
+                    y = heading(top)
+                    self.set_fill_color(*PDF_STRIPE_COLOR)
+                is_total = total_row is not None and n == len(body) - 1
+                if n % 2 or is_total:
+                    self.rect(xs[0], y, xs[-1] - xs[0], row_height, style='F')
+                put_row(y, values, 'B' if is_total else '')
+                y += row_height
+                self.line(xs[0], y, xs[-1], y)
+
+            close_columns(top, y)
+            self.set_y(y)
+
+    return PlanPDF
+
+
+def save_report_pdf(report: CuttingPlanReport, filename: str):
+    """
+    Save the cutting plan as PDF
+
+    Uses the bundled DejaVu subset (falls back to Helvetica if missing),
+    so it does not depend on fonts installed on the machine.
+    """
+    date_text = report.created.strftime('%d.%m.%Y %H:%M')
+    pdf = _plan_pdf_class()(f"Demirci - Cutting Plan - {date_text}")
+    pdf.add_page()
+
+    # Title and info
+    pdf.line_text('CUTTING PLAN - PRODUCTION INSTRUCTION', size=16, height=10, align='C')
+    pdf.ln(5)
+    pdf.line_text(f"Date: {date_text}")
+    pdf.line_text(f"Stock Bar Length: {report.stock_text()}")
+    pdf.ln(5)
+
+    # Summary table
+    pdf.line_text('OVERALL SUMMARY - ALL DIAMETERS', size=12, height=8, align='C')
+    pdf.ln(2)
+    summary_rows = []
+    for d in report.diameters:
+        if d.solved:
+            summary_rows.append((d.diameter, d.total_bins, f"{d.total_waste:.2f}",
+                                 f"{d.waste_percentage:.2f}", f"{d.total_demand:.2f}"))
+        else:
+            summary_rows.append((d.diameter, 'NO SOLUTION', '', '', ''))
+    pdf.grid_table(
+        SUMMARY_HEADERS, summary_rows, SUMMARY_WIDTHS, 'CCCCC', row_height=7,
+        total_row=('TOTAL', report.total_bars, f"{report.total_waste:.2f}",
+                   f"{report.waste_percentage:.2f}", f"{report.total_demand:.2f}")
+    )
+    pdf.ln(10)
+
+    # Detailed patterns for each diameter
+    for d in report.solved:
+        if pdf.get_y() > 250:
+            pdf.add_page()
+
+        pdf.line_text(f"DIAMETER: Ø{d.diameter}mm", size=12, height=8)
+        pdf.line_text(f"Demand: {d.total_demand:.2f}m", size=9)
+        pdf.line_text(f"Bars (Theoretical/Used): {d.theoretical_min}/{d.total_bins} bars", size=9)
+        pdf.line_text(f"Waste: {d.total_waste:.2f}m ({d.waste_percentage:.2f}%)", size=9)
+        if d.stock_mix:
+            pdf.line_text(f"Stock mix: {_stock_mix_text(d)}", size=9)
+        if d.max_open_stacks is not None:
+            pdf.line_text(f"Cutting order: as listed (max {d.max_open_stacks} open stacks)", size=9)
+        pdf.ln(3)
+
+        pdf.grid_table(
+            PATTERN_HEADERS,
+            [(_pattern_label(d, p), p.count, p.cuts_text(), f"{p.total:.2f}", f"{p.waste:.2f}")
+             for p in d.patterns],
+            PATTERN_WIDTHS, 'CCLCC'
+        )
+        pdf.ln(5)
+
+    # Warning note at the end
+    pdf.line_text('NOTE: Double-check all measurements before cutting.', height=8, align='C')
+
+    pdf.output(filename)
+
+
+BAR_FIELDS = [
+    'bar_id', 'diameter_mm', 'stock_length_m', 'pattern_id', 'bar_in_pattern',
+    'cuts_m', 'pieces', 'used_m', 'waste_m', 'source_lines'
+]
+
+DATA_FORMATS = {'.jsonl': 'jsonl', '.csv': 'csv', '.parquet': 'parquet'}
+
+
+def _pattern_records(report: CuttingPlanReport) -> Iterator[Dict]:
+    """
+    One record per used pattern with everything shared by its bars
+
+    Per-bar records differ only in bar_id / bar_in_pattern, so the
+    writers expand these 'count' times instead of rebuilding each bar.
+    """
+    for d in report.solved:
+        for p in d.patterns:
+            if d.lines:
+                source_lines = sorted({d.lines[i] for i, _, _ in p.cuts})
+            else:
+                source_lines = []
+            cuts = p.cut_sequence()
+            yield {
+                'count': p.count,
+                'diameter_mm': d.diameter,
+                'stock_length_m': p.stock_length or d.bin_capacity,
+                'pattern_id': f"{d.diameter}-{p.index}",
+                'cuts_m': list(cuts),
+                'pieces': len(cuts),
+                'used_m': round(p.total, 4),
+                'waste_m': round(p.waste, 4),
+                'source_lines': source_lines
+            }
+
+
+def iter_bar_records(report: CuttingPlanReport) -> Iterator[Dict]:
+    """Yield one dict per physical bar (see module docstring for the schema)"""
+    bar_id = 0
+    for rec in _pattern_records(report):
+        shared = {k: v for k, v in rec.items() if k != 'count'}
+        for n in range(1, rec['count'] + 1):
+            bar_id += 1
+            record = {'bar_id': bar_id, 'bar_in_pattern': n}
+            record.update(shared)
+            yield {field: record[field] for field in BAR_FIELDS}
+
+
+def _write_jsonl(report: CuttingPlanReport, filename: str):
+    bar_id = 0
+    with open(filename, 'w', encoding='utf-8', newline='\n') as f:
+        for rec in _pattern_records(report):
+            # Serialize the shared part once, stamp the counters per bar
+            shared = json.dumps({
+                k: rec[k] for k in BAR_FIELDS if k not in ('bar_id', 'bar_in_pattern')
+            }, ensure_ascii=False)[1:]
+            lines = []
+            for n in range(1, rec['count'] + 1):
+                bar_id += 1
+                lines.append(f'{{"bar_id": {bar_id}, "bar_in_pattern": {n}, {shared}\n')
+            f.write(''.join(lines))
+
+
+def _write_csv(report: CuttingPlanReport, filename: str):
+    bar_id = 0
+    with open(filename, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(BAR_FIELDS)
+        for rec in _pattern_records(report):
+            tail = [
+                ';'.join(str(c) for c in rec['cuts_m']),
+                rec['pieces'], rec['used_m'], rec['waste_m'],
+                ';'.join(str(line) for line in rec['source_lines'])
+            ]
+            head = [rec['diameter_mm'], rec['stock_length_m'], rec['pattern_id']]
+            start = bar_id + 1
+            bar_id += rec['count']
+            writer.writerows(
+                [b] + head + [n] + tail
+                for n, b in enumerate(range(start, bar_id + 1), 1)
+            )
+
+
+def _write_parquet(report: CuttingPlanReport, filename: str):
+    import pandas as pd
+
+    columns = {field: [] for field in BAR_FIELDS}
+    bar_id = 0
+    for rec in _pattern_records(report):
+        count = rec['count']
+        columns['bar_id'].extend(range(bar_id + 1, bar_id + count + 1))
+        columns['bar_in_pattern'].extend(range(1, count + 1))
+        for field in BAR_FIELDS[1:]:
+            if field != 'bar_in_pattern':
+                columns[field].extend([rec[field]] * count)
+        bar_id += count
+
+    pd.DataFrame(columns, columns=BAR_FIELDS).to_parquet(filename, index=False)
+
+
+def save_plan_data(
+    report: CuttingPlanReport,
+    filename: str,
+    fmt: Optional[str] = None
+):
+    """
+    Bulk export of the cutting plan, one record per physical bar
+
+    Args:
+        report: Report model of the solve
+        filename: Output path
+        fmt: 'jsonl', 'csv' or 'parquet' (None → from the file extension)
+
+    Parquet needs pyarrow (pip install pyarrow).
+    """
+    if fmt is None:
+        fmt = DATA_FORMATS.get(os.path.splitext(filename)[1].lower())
+    writers = {'jsonl': _write_jsonl, 'csv': _write_csv, 'parquet': _write_parquet}
+    if fmt not in writers:
+        raise ValueError(f"Unknown data format: {fmt} (use {', '.join(writers)})")
+
+    writers[fmt](report, filename)
+
+
+
+# ---------------------------------------------------------------------------
+# Solver statistics
+# ---------------------------------------------------------------------------
+
+STATS_FIELDS = [
+    'diameter_mm', 'level', 'min_efficiency', 'phase', 'generation_time_s',
+    'pattern_count', 'build_time_s', 'solve_time_s', 'status', 'objective',
+    'best_bound', 'gap', 'nodes', 'variables', 'constraints', 'solver'
+]
+
+
+def solver_stats_rows(results: Dict[int, Optional[Dict]]) -> List[Dict]:
+    """
+    Flatten result['stats'] of every diameter into one row per solver call
+
+    Phase 1 rows carry the pattern generation of their adaptive level;
+    the LNS (phase 'lns'), Phase 2 and 3 rows belong to the level that
+    produced the solution.
+    """
+    rows = []
+    for diameter in sorted(results.keys()):
+        result = results[diameter]
+        if not result or not result.get('stats'):
+            continue
+        stats = result['stats']
+        levels = stats.get('levels', [])
+
+        for level_no, level in enumerate(levels, 1):
+            phase1 = level.get('phase1') or {}
+            rows.append({
+                'diameter_mm': diameter,
+                'level': level_no,
+                'min_efficiency': level.get('min_efficiency'),
+                'phase': 1,
+                'generation_time_s': level.get('generation_time'),
+                'pattern_count': level.get('pattern_count'),
+                'build_time_s': phase1.get('build_time'),
+                'solve_time_s': phase1.get('solve_time'),
+                'status': phase1.get('status', 'NO_PATTERNS'),
+                'objective': phase1.get('objective'),
+                'best_bound': phase1.get('best_bound'),
+                'gap': phase1.get('gap'),
+                'nodes': phase1.get('nodes'),
+                'variables': phase1.get('variables'),
+                'constraints': phase1.get('constraints'),
+                'solver': phase1.get('solver')
+            })
+
+        for phase in ('lns', 2, 3):
+            phase_stats = stats.get(phase if phase == 'lns' else f'phase{phase}')
+            if not phase_stats:
+                continue
+            rows.append({
+                'diameter_mm': diameter,
+                'level': len(levels),
+                'min_efficiency': result.get('used_efficiency'),
+                'phase': phase,
+                'generation_time_s': None,
+                'pattern_count': levels[-1].get('pattern_count') if levels else None,
+                'build_time_s': phase_stats.get('build_time'),
+                'solve_time_s': phase_stats.get('solve_time'),
+                'status': phase_stats.get('status'),
+                'objective': phase_stats.get('objective'),
+                'best_bound': phase_stats.get('best_bound'),
+                'gap': phase_stats.get('gap'),
+                'nodes': phase_stats.get('nodes'),
+                'variables': phase_stats.get('variables'),
+                'constraints': phase_stats.get('constraints'),
+                'solver': phase_stats.get('solver')
+            })
+    return rows
+
+
+def save_solver_stats(results: Dict[int, Optional[Dict]], filename: str):
+    """
+    Save solver statistics (.json: full per-diameter stats, .csv: flat rows)
+    """
+    if filename.lower().endswith('.csv'):
+        with open(filename, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=STATS_FIELDS)
+            writer.writeheader()
+            writer.writerows(solver_stats_rows(results))
+        return
+
+    payload = {
+        str(diameter): {
+            'total_time_s': result['stats'].get('total_time'),
+            'total_bins': result['total_bins'],
+            'total_waste': result['total_waste'],
+            'phase_used': result['phase_used'],
+            'stats': result['stats']
+        } if result else None
+        for diameter, result in sorted(results.items())
+    }
+    payload['rows'] = solver_stats_rows(results)
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, indent=2, ensure_ascii=False)
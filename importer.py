@@ -0,0 +1,312 @@
+#importer.py
+# civileng.serdar@gmail.com
+"""
+Demand file import - Auto-detects columns and formats
+Supports: .xlsx, .xls, .ods, .csv
+
+Single sheet:  read_file_to_demands(path)
+Many sheets / many workbooks: read_files_to_demands(paths, all_sheets=True)
+  → every (file, sheet) pair is parsed in its own worker process
+    (openpyxl parsing is CPU-bound) and the results are merged into
+    one demands dict with per-sheet provenance counts.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Optional, Tuple, Union
+
+
+# Column name aliases
+DIAMETER_ALIASES = [
+    'çap', 'cap', 'çaplar', 'caplar',
+    'diameter', 'diameters', 'dia',
+    'kalınlık', 'kalinlik'
+]
+
+LENGTH_ALIASES = [
+    'uzunluk', 'uzunluklar', 'boy', 'boylar',
+    'length', 'lengths', 'len',
+    'mesafe', 'metre', 'meter'
+]
+
+COUNT_ALIASES = [
+    'adet', 'adetler', 'miktar', 'miktarlar',
+    'sayı', 'sayılar', 'sayi', 'sayilar',
+    'count', 'counts', 'quantity', 'quantities',
+    'qty', 'number', 'adet/miktar'
+]
+
+
+def _excel_engine(file_path: str) -> Optional[str]:
+    """pandas engine for the given spreadsheet file"""
+    if file_path.lower().endswith('.ods'):
+        return 'odf'
+    return None
+
+
+def list_sheets(file_path: str) -> List[Union[int, str]]:
+    """Sheet names of a workbook ([0] for CSV files)"""
+    import pandas as pd
+
+    if file_path.lower().endswith('.csv'):
+        return [0]
+
+    with pd.ExcelFile(file_path, engine=_excel_engine(file_path)) as xls:
+        return list(xls.sheet_names)
+
+
+def _read_table(file_path: str, sheet_name: Union[int, str] = 0):
+    """Read one sheet (or CSV) into a DataFrame with detected header row"""
+    import pandas as pd
+
+    if file_path.lower().endswith('.csv'):
+        try:
+            return pd.read_csv(file_path, encoding='utf-8')
+        except UnicodeDecodeError:
+            return pd.read_csv(file_path, encoding='latin-1')
+
+    # Read all rows once (no header) - the sheet is parsed a single time
+    df_raw = pd.read_excel(
+        file_path, sheet_name=sheet_name,
+        engine=_excel_engine(file_path), header=None
+    )
+
+    # Find header row (first non-empty row with at least 2 cells)
+    header_row = None
+    for idx, row in enumerate(df_raw.itertuples(index=False)):
+        if sum(1 for v in row if not pd.isna(v)) >= 2:
+            header_row = idx
+            break
+
+    if header_row is None:
+        raise ValueError("Header row not found in file!")
+
+    df = df_raw.iloc[header_row + 1:].reset_index(drop=True)
+    df.columns = _dedupe_columns([
+        str(v) if not pd.isna(v) else f"unnamed: {i}"
+        for i, v in enumerate(df_raw.iloc[header_row])
+    ])
+    return df
+
+
+def _dedupe_columns(names: List[str]) -> List[str]:
+    """Mangle duplicate header names like pandas does ('adet', 'adet.1', ...)"""
+    taken = set(names)
+    seen: Dict[str, int] = {}
+    result = []
+    for name in names:
+        if name in seen:
+            n = seen[name]
+            while f"{name}.{n}" in taken:
+                n += 1
+            seen[name] = n + 1
+            name = f"{name}.{n}"
+            taken.add(name)
+        else:
+            seen[name] = 1
+        result.append(name)
+    return result
+
+
+def _table_to_demands(df) -> Dict[int, Dict[str, List]]:
+    """Detect columns and build {diameter: {'lengths', 'counts'}} from a table"""
+    import pandas as pd
+
+    # Normalize column names
+    df.columns = pd.Index(df.columns).astype(str).str.strip().str.lower()
+
+    # Find columns using PARTIAL MATCHING
+    diameter_col = None
+    length_col = None
+    count_col = None
+
+    for col in df.columns:
+        col_clean = col.replace(' ', '').replace('_', '')
+
+        if not diameter_col and any(alias in col_clean for alias in DIAMETER_ALIASES):
+            diameter_col = col
+
+        if not length_col and any(alias in col_clean for alias in LENGTH_ALIASES):
+            length_col = col
+
+        if not count_col and any(alias in col_clean for alias in COUNT_ALIASES):
+            count_col = col
+
+    # Check required columns
+    if not diameter_col:
+        raise ValueError(
+            f"Diameter column not found!\n"
+            f"Available columns: {list(df.columns)}\n"
+            f"Accepted names: {', '.join(DIAMETER_ALIASES[:5])}..."
+        )
+
+    if not length_col:
+        raise ValueError(
+            f"Length column not found!\n"
+            f"Available columns: {list(df.columns)}\n"
+            f"Accepted names: {', '.join(LENGTH_ALIASES[:5])}..."
+        )
+
+    # Clean numbers (replace comma with dot) - vectorized per column
+    def clean_numbers(series):
+        return pd.to_numeric(
+            series.astype(str).str.strip().str.replace(',', '.', regex=False),
+            errors='coerce'
+        )
+
+    diameters = clean_numbers(df[diameter_col])
+    lengths = clean_numbers(df[length_col])
+    # If no count column, assume 1 per row
+    if count_col:
+        counts = clean_numbers(df[count_col])
+    else:
+        counts = pd.Series(1, index=df.index)
+
+    # Remove empty / non-numeric rows
+    valid = diameters.notna() & lengths.notna() & counts.notna()
+
+    # Build demands dictionary
+    demands = {}
+    seen = {}  # (diameter, length) -> index
+
+    for diameter, length, count in zip(
+        diameters[valid].astype(int),
+        lengths[valid].astype(float),
+        counts[valid].astype(int)
+    ):
+        diameter = int(diameter)
+        length = float(length)
+        count = int(count)
+        key = (diameter, length)
+
+        # If same diameter+length seen before, add counts
+        if key in seen:
+            demands[diameter]['counts'][seen[key]] += count
+        else:
+            entry = demands.setdefault(diameter, {'lengths': [], 'counts': []})
+            entry['lengths'].append(length)
+            entry['counts'].append(count)
+            seen[key] = len(entry['lengths']) - 1
+
+    return demands
+
+
+def read_file_to_demands(
+    file_path: str,
+    sheet_name: Union[int, str] = 0
+) -> Dict[int, Dict[str, List]]:
+    """
+    Smart file reader - Auto-detects columns and formats
+    Uses partial matching for column names (e.g., "çap (mm)" matches "çap")
+
+    Returns:
+        {diameter: {'lengths': [...], 'counts': [...]}}
+    """
+    return _table_to_demands(_read_table(file_path, sheet_name))
+
+
+def _parse_sheet_task(task: Tuple[str, Union[int, str], bool]) -> Dict:
+    """Worker: parse one (file, sheet) pair, never raises for skippable sheets"""
+    file_path, sheet_name, skip_invalid = task
+    try:
+        demands = read_file_to_demands(file_path, sheet_name)
+        error = None
+    except ValueError as e:
+        if not skip_invalid:
+            raise
+        demands = {}
+        error = str(e).splitlines()[0]
+
+    return {
+        'file': file_path,
+        'sheet': sheet_name,
+        'demands': demands,
+        'error': error
+    }
+
+
+def merge_demands(
+    parts: List[Dict[int, Dict[str, List]]]
+) -> Dict[int, Dict[str, List]]:
+    """Merge demand dicts, adding counts of identical (diameter, length) pairs"""
+    merged = {}
+    seen = {}  # (diameter, length) -> index
+
+    for demands in parts:
+        for diameter, data in demands.items():
+            entry = merged.setdefault(diameter, {'lengths': [], 'counts': []})
+            for length, count in zip(data['lengths'], data['counts']):
+                key = (diameter, length)
+                if key in seen:
+                    entry['counts'][seen[key]] += count
+                else:
+                    entry['lengths'].append(length)
+                    entry['counts'].append(count)
+                    seen[key] = len(entry['lengths']) - 1
+
+    return merged
+
+
+def read_files_to_demands(
+    file_paths: Union[str, List[str]],
+    all_sheets: bool = True,
+    max_workers: Optional[int] = None
+) -> Tuple[Dict[int, Dict[str, List]], List[Dict]]:
+    """
+    Multi-sheet / multi-file import with parallel parsing
+
+    Args:
+        file_paths: One path or a list of paths
+        all_sheets: Read every sheet of each workbook (False → first sheet only).
+            In all-sheets mode, sheets without a recognizable rebar table
+            (cover pages, notes) are skipped and reported in the provenance.
+        max_workers: Worker processes (None → one per CPU, capped by task count)
+
+    Returns:
+        (demands, provenance)
+        demands: {diameter: {'lengths': [...], 'counts': [...]}}
+        provenance: [{'file', 'sheet', 'items', 'pieces', 'error'}, ...]
+            one entry per parsed sheet, in file/sheet order
+    """
+    if isinstance(file_paths, str):
+        file_paths = [file_paths]
+    if not file_paths:
+        raise ValueError("No files given!")
+
+    tasks = []
+    for file_path in file_paths:
+        sheets = list_sheets(file_path) if all_sheets else [0]
+        for sheet in sheets:
+            tasks.append((file_path, sheet, all_sheets and len(sheets) > 1))
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, len(tasks)))
+
+    # A single sheet is faster inline than paying process start-up cost
+    if max_workers == 1:
+        parsed = [_parse_sheet_task(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            parsed = list(executor.map(_parse_sheet_task, tasks))
+
+    provenance = []
+    for part in parsed:
+        provenance.append({
+            'file': part['file'],
+            'sheet': part['sheet'],
+            'items': sum(len(d['lengths']) for d in part['demands'].values()),
+            'pieces': sum(sum(d['counts']) for d in part['demands'].values()),
+            'error': part['error']
+        })
+
+    demands = merge_demands([part['demands'] for part in parsed])
+
+    if not demands:
+        errors = [p['error'] for p in provenance if p['error']]
+        raise ValueError(
+            "No rebar data found in the selected file(s)!"
+            + (f"\n{errors[0]}" if errors else "")
+        )
+
+    return demands, provenance
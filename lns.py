@@ -0,0 +1,235 @@
+#lns.py
+# civileng.serdar@gmail.com
+"""
+Large neighbourhood search - improves a feasible plan after a time-limited solve
+
+When Phase 1 stops at the time limit the plan can be several bars off.
+Instead of letting the global MIP grind on, a few bars are destroyed -
+the highest-waste ones, randomised after the first round - and the
+pieces they leave missing are re-packed exactly: every maximal pattern of
+the small residual demand is enumerated and one MIP minimizes bars, then
+waste. Better sub-plans replace the destroyed bars. The neighbourhood
+grows while rounds stop improving.
+
+    bars, used_patterns, waste = improve_plan(lengths, counts, patterns, used_patterns)
+"""
+
+import math
+import random
+import time
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
+from ortools.linear_solver import pywraplp
+
+from calculations import (
+    logger, _create_solver, _add_demand_constraints, _solution_counts, _used_patterns
+)
+from patterns import PatternStore
+
+
+MIN_DESTROY = 3             # bars per neighbourhood at the start
+MAX_DESTROY = 16            # ... and at most
+MAX_SUB_PATTERNS = 5000     # enumeration cap of one neighbourhood
+SUB_TIME_LIMIT_MS = 2000    # per neighbourhood MIP
+STALL_ROUNDS = 8            # rounds without improvement before the neighbourhood grows
+
+
+def _maximal_patterns(
+    lengths: List[float],
+    residual: List[int],
+    bin_capacity: float,
+    limit: int
+) -> List[Tuple[Tuple[int, int], ...]]:
+    """
+    Every pattern of the residual demand to which no further needed piece
+    fits (smaller patterns are dominated), up to limit patterns
+    """
+    types = sorted((t for t, n in enumerate(residual) if n > 0), key=lambda t: -lengths[t])
+    found = []
+    cuts: List[Tuple[int, int]] = []
+    budget = [limit * 50]       # search nodes - many types can explode the tree
+
+    def extend(k: int, space: float):
+        budget[0] -= 1
+        if len(found) >= limit or budget[0] < 0:
+            return
+        if k == len(types):
+            taken = dict(cuts)
+            if cuts and all(lengths[t] > space + 1e-9 or taken.get(t, 0) >= residual[t] for t in types):
+                found.append(tuple(sorted(cuts)))
+            return
+        t = types[k]
+        for pieces in range(min(residual[t], int((space + 1e-9) // lengths[t])), -1, -1):
+            if pieces:
+                cuts.append((t, pieces))
+            extend(k + 1, space - pieces * lengths[t])
+            if pieces:
+                cuts.pop()
+
+    extend(0, bin_capacity)
+    return found
+
+
+def _repack(
+    lengths: List[float],
+    residual: List[int],
+    bin_capacity: float,
+    destroyed: List[Tuple[Tuple[int, int], ...]],
+    time_limit_ms: int,
+    solver_backend: str
+) -> Optional[List[Tuple[Tuple[int, int], ...]]]:
+    """
+    Fewest bars, then least waste, covering the residual demand - one MIP
+    over the enumerated patterns plus the destroyed ones (a feasible start)
+
+    Returns one cut list per bar, or None if the solver found nothing.
+    """
+    store = PatternStore(lengths, bin_capacity)
+    for cuts in destroyed:
+        store.add(cuts)
+    for cuts in _maximal_patterns(lengths, residual, bin_capacity, MAX_SUB_PATTERNS):
+        store.add(cuts)
+
+    solver = _create_solver(solver_backend)
+    upper = len(destroyed)
+    y = [solver.IntVar(0, upper, f'pattern_{p}') for p in range(len(store))]
+    _add_demand_constraints(solver, y, store, residual)
+
+    # Bars first: the waste of at most `upper` bars weighs less than one bar
+    objective = solver.Objective()
+    weight = 1.0 / (bin_capacity * (upper + 1))
+    for var, waste in zip(y, store.waste.tolist()):
+        objective.SetCoefficient(var, 1 + max(waste, 0.0) * weight)
+    objective.SetMinimization()
+
+    start = [0] * len(store)
+    for cuts in destroyed:
+        start[store.find(cuts)] += 1
+    solver.SetHint(y, [float(v) for v in start])
+    solver.SetTimeLimit(max(int(time_limit_ms), 1))
+    if solver.Solve() not in (pywraplp.Solver.OPTIMAL, pywraplp.Solver.FEASIBLE):
+        return None
+
+    bars = []
+    for p, n in enumerate(_solution_counts(y)):
+        bars.extend([store.cuts(p)] * n)
+    return bars
+
+
+def improve_plan(
+    lengths: List[float],
+    counts: List[int],
+    patterns: PatternStore,
+    used_patterns: List[Dict],
+    time_limit_ms: int = 10000,
+    solver_backend: str = 'SCIP',
+    seed: int = 0,
+    stats: Optional[Dict] = None
+) -> Tuple[int, List[Dict], float]:
+    """
+    Improve a feasible plan (bars first, then waste) within time_limit_ms
+
+    New patterns are added to the patterns store, so the returned
+    used_patterns index it like any Phase 1 result and Phase 2 can keep
+    optimizing on it. Returns (bars, used_patterns, total_waste).
+    """
+    start_time = time.perf_counter()
+    deadline = start_time + time_limit_ms / 1000
+    rng = random.Random(seed)
+    capacity = patterns.bin_capacity
+    demand = np.asarray(counts, dtype=np.int64)
+
+    # One entry per physical bar: its cut list
+    bars: List[Tuple[Tuple[int, int], ...]] = []
+    for used in used_patterns:
+        bars.extend([tuple(used['cuts'])] * used['count'])
+
+    def bar_waste(cuts) -> float:
+        return capacity - sum(lengths[t] * n for t, n in cuts)
+
+    initial_bars = len(bars)
+    initial_waste = sum(bar_waste(cuts) for cuts in bars)
+    lower_bound = math.ceil(float(demand @ np.asarray(lengths)) / capacity - 1e-9)
+    min_waste = lower_bound * capacity - float(demand @ np.asarray(lengths))
+
+    size = MIN_DESTROY
+    stalled = rounds = improvements = 0
+    while time.perf_counter() < deadline and len(bars) > 1:
+        waste_now = [bar_waste(cuts) for cuts in bars]
+        if len(bars) <= lower_bound and sum(waste_now) <= min_waste + 1e-6:
+            break       # at the bound with no over-production - optimal
+        rounds += 1
+
+        # Effective waste: offcut plus the pieces the plan cuts beyond demand
+        produced = np.zeros(len(counts), dtype=np.int64)
+        for cuts in bars:
+            for t, n in cuts:
+                produced[t] += n
+        surplus = produced - demand
+        score = [w + sum(lengths[t] * min(n, surplus[t]) for t, n in cuts if surplus[t] > 0)
+                 for w, cuts in zip(waste_now, bars)]
+
+        # Highest first, later rounds draw weighted by it; enough bars that
+        # their effective waste could free a whole bar
+        if rounds == 1:
+            order = sorted(range(len(bars)), key=lambda b: -score[b])
+        else:
+            keys = [rng.random() ** (1.0 / (w + 1e-3)) for w in score]
+            order = sorted(range(len(bars)), key=lambda b: -keys[b])
+        chosen = []
+        freed = 0.0
+        for b in order:
+            if len(chosen) >= MAX_DESTROY or (len(chosen) >= size and freed >= capacity):
+                break
+            chosen.append(b)
+            freed += score[b]
+        chosen_set = set(chosen)
+        kept = [cuts for b, cuts in enumerate(bars) if b not in chosen_set]
+        destroyed = [bars[b] for b in chosen]
+
+        produced = np.zeros(len(counts), dtype=np.int64)
+        for cuts in kept:
+            for t, n in cuts:
+                produced[t] += n
+        residual = np.maximum(demand - produced, 0).tolist()
+
+        remaining_ms = (deadline - time.perf_counter()) * 1000
+        repacked = _repack(lengths, residual, capacity, destroyed,
+                           min(SUB_TIME_LIMIT_MS, remaining_ms), solver_backend)
+        old = (len(destroyed), sum(waste_now[b] for b in chosen))
+        if repacked is not None:
+            new = (len(repacked), sum(bar_waste(cuts) for cuts in repacked))
+            if new[0] < old[0] or (new[0] == old[0] and new[1] < old[1] - 1e-6):
+                bars = kept + repacked
+                improvements += 1
+                stalled = 0
+                continue
+        stalled += 1
+        if stalled >= STALL_ROUNDS and size < MAX_DESTROY:
+            size += 1
+            stalled = 0
+
+    # Back onto the shared pool
+    values: Dict[int, int] = {}
+    for cuts in bars:
+        p = patterns.find(cuts)
+        if p < 0:
+            p = patterns.add(cuts)
+        values[p] = values.get(p, 0) + 1
+    pattern_counts = [values.get(p, 0) for p in range(len(patterns))]
+    used, total_waste = _used_patterns(patterns, pattern_counts)
+
+    if stats is not None:
+        stats.update({
+            'solver': 'lns', 'backend': solver_backend, 'build_time': 0.0,
+            'solve_time': time.perf_counter() - start_time,
+            'status': 'FEASIBLE', 'variables': len(patterns), 'constraints': len(lengths),
+            'nodes': rounds, 'objective': len(bars), 'best_bound': lower_bound,
+            'gap': abs(len(bars) - lower_bound) / max(len(bars), 1e-9),
+            'improvements': improvements, 'start_bars': initial_bars, 'start_waste': initial_waste
+        })
+    logger.info("  → LNS: %d → %d bars, waste %.2fm → %.2fm (%d rounds)",
+                initial_bars, len(bars), initial_waste, total_waste, rounds,
+                extra={'bars': len(bars), 'waste': total_waste})
+    return len(bars), used, total_waste
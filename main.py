@@ -10,16 +10,31 @@ Integrated with Lexicographic Optimization Algorithm
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 from tkinter import font as tkfont
+from contextlib import nullcontext
 from datetime import datetime
 from typing import List, Dict
 import os
 import webbrowser
+import multiprocessing
+import queue
+import threading
 
 # GitHub Profile
 GITHUB_PROFILE = "https://github.com/srdrgl"
 
 # Import optimization functions
-from calculations import solve_multi_diameter_lexicographic
+from calculations import solve_multi_diameter_lexicographic, log_to
+from multistock import parse_stocks
+from offcuts import OffcutInventory
+from sweep import sweep_stock_lengths, format_sweep_table, DEFAULT_STOCK_LENGTHS
+from importer import read_files_to_demands
+from rebar_list import RebarListModel
+from report import build_report
+from scheduling import schedule_cutting, apply_sequence
+from exporters import (
+    render_report_text, save_report_text, save_report_xlsx,
+    save_report_pdf, save_plan_data, save_solver_stats
+)
 
 
 class RebarOptimizerGUI:
@@ -80,9 +95,13 @@ class RebarOptimizerGUI:
         self.small_font = tkfont.Font(family="Helvetica", size=8)
         
         # Data storage
-        self.rebar_list = []
+        self.rebar_model = RebarListModel()
+        self.rebar_list = self.rebar_model.rows  # Same list, kept in sync by the model
+        self.tree_fill_job = None  # Pending batched Treeview fill
         self.stock_length = 12.0  # meters
         self.optimization_results = None
+        self.report = None  # Precomputed report model of the last solve
+        self.offcuts_booked = False  # Last plan already booked into the offcut inventory
         
         self.setup_ui()
         
@@ -248,7 +267,7 @@ class RebarOptimizerGUI:
         
         tk.Label(
             settings_frame, 
-            text="Stock Bar Length (m):",
+            text="Stock Bar Length(s) (m):",
             bg=self.colors['warm_bg'],
             fg=self.colors['text_dark'],
             font=self.normal_font
@@ -256,7 +275,7 @@ class RebarOptimizerGUI:
         
         self.stock_entry = tk.Entry(
             settings_frame, 
-            width=10,
+            width=16,
             font=self.normal_font,
             relief='flat',
             bd=2,
@@ -265,6 +284,30 @@ class RebarOptimizerGUI:
         self.stock_entry.insert(0, "12.0")
         self.stock_entry.grid(row=0, column=1, padx=8, pady=3)
         
+        # Import mode: first sheet only (as before) or every sheet of every workbook
+        self.all_sheets_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            settings_frame,
+            text="Import all sheets",
+            variable=self.all_sheets_var,
+            bg=self.colors['warm_bg'],
+            fg=self.colors['text_dark'],
+            activebackground=self.colors['warm_bg'],
+            font=self.normal_font
+        ).grid(row=1, column=0, columnspan=2, sticky=tk.W, pady=3)
+        
+        # Stored remnants join the stock as limited bars
+        self.use_offcuts_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            settings_frame,
+            text="Use stored offcuts",
+            variable=self.use_offcuts_var,
+            bg=self.colors['warm_bg'],
+            fg=self.colors['text_dark'],
+            activebackground=self.colors['warm_bg'],
+            font=self.normal_font
+        ).grid(row=2, column=0, columnspan=2, sticky=tk.W, pady=3)
+        
         # Add rebar form
         input_frame = tk.LabelFrame(
             inner_panel, 
@@ -378,6 +421,39 @@ class RebarOptimizerGUI:
         )
         list_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 10))
         
+        # Diameter filter
+        filter_frame = tk.Frame(list_frame, bg=self.colors['warm_bg'])
+        filter_frame.pack(side=tk.TOP, fill=tk.X, pady=(0, 5))
+        
+        tk.Label(
+            filter_frame,
+            text="Filter:",
+            bg=self.colors['warm_bg'],
+            fg=self.colors['text_dark'],
+            font=self.normal_font
+        ).pack(side=tk.LEFT)
+        
+        self.filter_var = tk.StringVar(value="All")
+        self.filter_combo = ttk.Combobox(
+            filter_frame,
+            textvariable=self.filter_var,
+            values=["All"],
+            width=8,
+            state="readonly",
+            font=self.normal_font
+        )
+        self.filter_combo.pack(side=tk.LEFT, padx=6)
+        self.filter_combo.bind("<<ComboboxSelected>>", lambda e: self.refresh_tree())
+        
+        self.list_count_label = tk.Label(
+            filter_frame,
+            text="0 items",
+            bg=self.colors['warm_bg'],
+            fg=self.colors['dark_gray'],
+            font=self.small_font
+        )
+        self.list_count_label.pack(side=tk.RIGHT)
+        
         # Treeview with compact style
         columns = ("Diameter", "Length", "Quantity")
         self.tree = ttk.Treeview(
@@ -464,6 +540,21 @@ class RebarOptimizerGUI:
         )
         calculate_btn.pack(fill=tk.X, pady=0)
         
+        # Stock length sweep - compares every length in the stock field
+        self.sweep_btn = tk.Button(
+            inner_panel,
+            text="📐 Compare Stock Lengths",
+            command=self.run_stock_sweep,
+            bg=self.colors['steel_blue'],
+            fg=self.colors['white'],
+            font=self.normal_font,
+            relief='flat',
+            bd=0,
+            pady=4,
+            cursor="hand2"
+        )
+        self.sweep_btn.pack(fill=tk.X, pady=(4, 0))
+        
         return panel_wrapper
     
     def create_results_panel(self, parent):
@@ -546,8 +637,15 @@ class RebarOptimizerGUI:
             anchor=tk.W
         ).pack(side=tk.LEFT)
         
-        plan_frame = tk.Frame(inner_panel, bg=self.colors['warm_bg'], relief='flat', bd=1)
-        plan_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 10))
+        # Tabs: full text report + pattern browser
+        self.results_tabs = ttk.Notebook(inner_panel)
+        self.results_tabs.pack(fill=tk.BOTH, expand=True, pady=(0, 10))
+        
+        plan_frame = tk.Frame(self.results_tabs, bg=self.colors['warm_bg'], relief='flat', bd=1)
+        self.results_tabs.add(plan_frame, text="📄 Report")
+        
+        patterns_frame = self.create_pattern_browser(self.results_tabs)
+        self.results_tabs.add(patterns_frame, text="🔎 Patterns")
         
         # Text widget
         self.results_text = tk.Text(
@@ -626,8 +724,161 @@ class RebarOptimizerGUI:
         )
         copy_btn.pack(side=tk.LEFT, padx=3)
         
+        offcut_btn = tk.Button(
+            action_frame,
+            text="♻️ Book Offcuts",
+            command=self.book_offcuts,
+            bg=self.colors['dark_gray'],
+            fg=self.colors['white'],
+            font=self.normal_font,
+            relief='flat',
+            bd=0,
+            padx=15,
+            pady=6,
+            cursor="hand2"
+        )
+        offcut_btn.pack(side=tk.LEFT, padx=3)
+        
         return panel_wrapper
     
+    def create_pattern_browser(self, parent):
+        """Pattern browser - per-diameter Treeview, rows loaded page by page"""
+        frame = tk.Frame(parent, bg=self.colors['warm_bg'])
+        
+        top = tk.Frame(frame, bg=self.colors['warm_bg'])
+        top.pack(fill=tk.X, padx=6, pady=6)
+        
+        tk.Label(
+            top,
+            text="Diameter:",
+            bg=self.colors['warm_bg'],
+            fg=self.colors['text_dark'],
+            font=self.normal_font
+        ).pack(side=tk.LEFT)
+        
+        self.pattern_diameter_var = tk.StringVar()
+        self.pattern_diameter_combo = ttk.Combobox(
+            top,
+            textvariable=self.pattern_diameter_var,
+            values=[],
+            width=10,
+            state="readonly",
+            font=self.normal_font
+        )
+        self.pattern_diameter_combo.pack(side=tk.LEFT, padx=6)
+        self.pattern_diameter_combo.bind("<<ComboboxSelected>>", lambda e: self.show_patterns())
+        
+        self.pattern_info_label = tk.Label(
+            top,
+            text="",
+            bg=self.colors['warm_bg'],
+            fg=self.colors['dark_gray'],
+            font=self.small_font
+        )
+        self.pattern_info_label.pack(side=tk.LEFT, padx=6)
+        
+        tree_frame = tk.Frame(frame, bg=self.colors['warm_bg'])
+        tree_frame.pack(fill=tk.BOTH, expand=True, padx=6, pady=(0, 6))
+        
+        columns = ("Bars", "Cuts", "Total", "Waste", "Util")
+        self.pattern_tree = ttk.Treeview(tree_frame, columns=columns, show="tree headings")
+        self.pattern_tree.heading("#0", text="Pattern")
+        self.pattern_tree.column("#0", width=90, stretch=False)
+        col_widths = {"Bars": 50, "Cuts": 260, "Total": 70, "Waste": 70, "Util": 60}
+        headings = {"Bars": "Bars", "Cuts": "Cuts", "Total": "Total(m)",
+                    "Waste": "Waste(m)", "Util": "Util(%)"}
+        for col in columns:
+            self.pattern_tree.heading(col, text=headings[col])
+            self.pattern_tree.column(col, width=col_widths[col],
+                                     anchor=tk.W if col == "Cuts" else tk.CENTER)
+        self.pattern_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        
+        pattern_scroll = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.pattern_tree.yview)
+        pattern_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        def on_scroll(first, last):
+            pattern_scroll.set(first, last)
+            # Load the next page when the view gets close to the loaded end
+            if float(last) > 0.9:
+                self.load_more_patterns()
+        
+        self.pattern_tree.configure(yscrollcommand=on_scroll)
+        self.pattern_tree.bind("<<TreeviewOpen>>", self.on_pattern_open)
+        
+        self.pattern_page_size = 200
+        self.pattern_view = None    # DiameterReport on display
+        self.patterns_loaded = 0
+        
+        return frame
+    
+    def show_patterns(self, diameter=None):
+        """Show the patterns of one diameter (first page only)"""
+        self.pattern_tree.delete(*self.pattern_tree.get_children())
+        self.pattern_view = None
+        self.patterns_loaded = 0
+        
+        if not self.report:
+            return
+        
+        if diameter is None:
+            text = self.pattern_diameter_var.get().lstrip('Ø').rstrip('mm')
+            if not text:
+                return
+            diameter = int(text)
+        
+        for d in self.report.solved:
+            if d.diameter == diameter:
+                self.pattern_view = d
+                break
+        
+        if self.pattern_view is None:
+            self.pattern_info_label.config(text="No solution")
+            return
+        
+        d = self.pattern_view
+        self.pattern_info_label.config(
+            text=f"{len(d.patterns)} patterns | {d.total_bins} bars | waste {d.total_waste:.2f}m"
+        )
+        self.load_more_patterns()
+    
+    def load_more_patterns(self):
+        """Append the next page of pattern rows (details are loaded on expand)"""
+        d = self.pattern_view
+        if d is None or self.patterns_loaded >= len(d.patterns):
+            return
+        
+        end = min(self.patterns_loaded + self.pattern_page_size, len(d.patterns))
+        for p in d.patterns[self.patterns_loaded:end]:
+            item = self.pattern_tree.insert(
+                "",
+                tk.END,
+                iid=f"p{p.index}",
+                text=f"Pattern {p.index} ({p.stock_length:g}m)" if d.mixed_stock else f"Pattern {p.index}",
+                values=(p.count, p.cuts_text(), f"{p.total:.2f}", f"{p.waste:.2f}", f"{p.utilization:.1f}")
+            )
+            # Placeholder so the row can be expanded
+            self.pattern_tree.insert(item, tk.END, iid=f"p{p.index}-placeholder", text="…")
+        self.patterns_loaded = end
+    
+    def on_pattern_open(self, event):
+        """Load the cut details of a pattern the first time it is expanded"""
+        item = self.pattern_tree.focus()
+        placeholder = f"{item}-placeholder"
+        if not self.pattern_view or not self.pattern_tree.exists(placeholder):
+            return
+        
+        self.pattern_tree.delete(placeholder)
+        p = self.pattern_view.patterns[int(item[1:]) - 1]
+        lines = self.pattern_view.lines
+        for type_index, pieces, length in p.cuts:
+            source = f"line {lines[type_index]}" if lines else ""
+            self.pattern_tree.insert(
+                item,
+                tk.END,
+                text="",
+                values=(pieces, f"{pieces} × {length:.2f}m  {source}", f"{pieces * length:.2f}", "", "")
+            )
+    
     def create_status_bar(self):
         """Bottom status bar"""
         status_frame = tk.Frame(self.root, bg=self.colors['primary'], height=28)
@@ -671,8 +922,9 @@ class RebarOptimizerGUI:
             if length <= 0 or quantity <= 0:
                 raise ValueError("Length and quantity must be positive!")
             
-            if length > self.stock_length:
-                raise ValueError(f"Rebar length cannot exceed stock length ({self.stock_length}m)!")
+            max_stock = max(stock.length for stock in parse_stocks(self.stock_entry.get()))
+            if length > max_stock:
+                raise ValueError(f"Rebar length cannot exceed stock length ({max_stock}m)!")
             
             # Add to list
             rebar_info = {
@@ -680,18 +932,12 @@ class RebarOptimizerGUI:
                 'length': length,
                 'quantity': quantity
             }
-            self.rebar_list.append(rebar_info)
+            item_id = self.rebar_model.extend([rebar_info])[0]
             
-            # Add to TreeView
-            self.tree.insert(
-                "",
-                tk.END,
-                values=(
-                    f"Ø{diameter}",
-                    f"{length:.2f}m",
-                    quantity
-                )
-            )
+            # Add to TreeView (if it passes the current filter)
+            if self.filter_diameter() in (None, rebar_info['diameter']):
+                self.tree.insert("", tk.END, iid=item_id, values=self.tree_values(rebar_info))
+            self.update_list_info()
             
             # Clear form
             self.length_entry.delete(0, tk.END)
@@ -703,33 +949,71 @@ class RebarOptimizerGUI:
             messagebox.showerror("Error", f"Invalid value: {str(e)}")
     
     def delete_rebar(self):
-        """Delete selected rebar"""
+        """Delete selected rebar(s) - one pass over the list for any selection size"""
         selected = self.tree.selection()
         if not selected:
             messagebox.showwarning("Warning", "Please select rebar to delete!")
             return
         
-        # Sort indices in reverse to delete from end
-        indices = sorted([self.tree.index(item) for item in selected], reverse=True)
-        
-        for index in indices:
-            item = self.tree.get_children()[index]
-            self.tree.delete(item)
-            del self.rebar_list[index]
+        removed = self.rebar_model.remove(selected)
+        self.tree.delete(*selected)
+        self.update_list_info()
         
-        self.status_label.config(text="● Selected rebar(s) deleted")
+        self.status_label.config(text=f"● {removed} rebar(s) deleted")
     
     def clear_all(self):
         """Clear all list"""
         if messagebox.askyesno("Confirm", "Are you sure you want to clear all rebars?"):
+            self.cancel_tree_fill()
             self.tree.delete(*self.tree.get_children())
-            self.rebar_list.clear()
+            self.rebar_model.clear()
+            self.update_list_info()
             self.status_label.config(text="● List cleared")
     
+    def tree_values(self, rebar):
+        """Treeview row of one rebar"""
+        return (f"Ø{rebar['diameter']}", f"{rebar['length']:.2f}m", rebar['quantity'])
+    
+    def filter_diameter(self):
+        """Diameter selected in the list filter (None = all)"""
+        value = self.filter_var.get()
+        return None if value in ("", "All") else int(value.lstrip('Ø'))
+    
+    def update_list_info(self):
+        """Refresh item count and filter choices"""
+        self.list_count_label.config(text=f"{len(self.rebar_model)} items")
+        choices = ["All"] + [f"Ø{d}" for d in self.rebar_model.diameters()]
+        self.filter_combo.configure(values=choices)
+        if self.filter_var.get() not in choices:
+            self.filter_var.set("All")
+            self.refresh_tree()
+    
+    def cancel_tree_fill(self):
+        """Stop a batched Treeview fill that is still running"""
+        if self.tree_fill_job:
+            self.root.after_cancel(self.tree_fill_job)
+        self.tree_fill_job = None
+    
+    def refresh_tree(self, batch_size=2000):
+        """Rebuild the Treeview from the model in batches (GUI stays responsive)"""
+        self.cancel_tree_fill()
+        self.tree.delete(*self.tree.get_children())
+        pending = self.rebar_model.items(self.filter_diameter())
+        
+        def fill(start=0):
+            for item_id, rebar in pending[start:start + batch_size]:
+                self.tree.insert("", tk.END, iid=item_id, values=self.tree_values(rebar))
+            if start + batch_size < len(pending):
+                self.tree_fill_job = self.root.after(1, fill, start + batch_size)
+            else:
+                self.tree_fill_job = None
+        
+        fill()
+    
     def load_excel(self):
-        """Load rebar list from Excel file using smart reader"""
-        filename = filedialog.askopenfilename(
-            title="Select File",
+        """Load rebar list from one or more files (parsed in a background thread)"""
+        filenames = filedialog.askopenfilenames(
+            title="Select File(s)",
             filetypes=[
                 ("Excel files", "*.xlsx *.xls"),
                 ("CSV files", "*.csv"),
@@ -738,195 +1022,164 @@ class RebarOptimizerGUI:
             ]
         )
         
-        if filename:
+        if not filenames:
+            return
+        
+        self.status_label.config(text="⏳ Reading file(s)...")
+        results = queue.Queue()
+        all_sheets = self.all_sheets_var.get()
+        
+        def worker():
+            # No Tk calls here - results go back through the queue
             try:
-                # Use smart reader function
-                demands = self.read_file_to_demands(filename)
-                
-                # Clear existing list
-                self.tree.delete(*self.tree.get_children())
-                self.rebar_list.clear()
-                
-                # Add to GUI
-                total_added = 0
-                for diameter in sorted(demands.keys()):
-                    for length, count in zip(demands[diameter]['lengths'], demands[diameter]['counts']):
-                        # Add to internal list
-                        rebar_info = {
-                            'diameter': diameter,
-                            'length': length,
-                            'quantity': count
-                        }
-                        self.rebar_list.append(rebar_info)
-                        
-                        # Add to TreeView
-                        self.tree.insert(
-                            "",
-                            tk.END,
-                            values=(
-                                f"Ø{diameter}",
-                                f"{length:.2f}m",
-                                count
-                            )
-                        )
-                        total_added += 1
-                
-                self.status_label.config(text=f"● File loaded: {total_added} items added")
-                messagebox.showinfo("Success", f"File loaded successfully!\n{total_added} items added")
-                
-            except ImportError as e:
-                messagebox.showerror(
-                    "Error",
-                    "Required libraries not found!\n\n"
-                    "Install with: pip install pandas openpyxl odfpy"
-                )
+                results.put(('ok', read_files_to_demands(list(filenames), all_sheets=all_sheets)))
             except Exception as e:
-                messagebox.showerror("Error", f"Could not read file:\n{str(e)}")
-    
-    def read_file_to_demands(self, file_path: str) -> Dict[int, Dict[str, List]]:
-        """
-        Smart file reader - Auto-detects columns and formats
-        Supports: .xlsx, .xls, .ods, .csv
-        UPDATED: Now uses partial matching for column names (e.g., "çap (mm)" matches "çap")
-        """
-        import pandas as pd
-        from collections import defaultdict
-        
-        # Column name aliases
-        diameter_aliases = [
-            'çap', 'cap', 'çaplar', 'caplar',
-            'diameter', 'diameters', 'dia',
-            'kalınlık', 'kalinlik'
-        ]
+                results.put(('error', e))
         
-        length_aliases = [
-            'uzunluk', 'uzunluklar', 'boy', 'boylar',
-            'length', 'lengths', 'len',
-            'mesafe', 'metre', 'meter'
-        ]
+        threading.Thread(target=worker, daemon=True).start()
         
-        count_aliases = [
-            'adet', 'adetler', 'miktar', 'miktarlar',
-            'sayı', 'sayılar', 'sayi', 'sayilar',
-            'count', 'counts', 'quantity', 'quantities',
-            'qty', 'number', 'adet/miktar'
-        ]
-        
-        # Read file based on format
-        if file_path.endswith('.csv'):
+        def poll():
             try:
-                df = pd.read_csv(file_path, encoding='utf-8')
-            except:
-                df = pd.read_csv(file_path, encoding='latin-1')
-        else:
-            engine = None
-            if file_path.endswith('.ods'):
-                engine = 'odf'
-            
-            # Read all rows first (no header)
-            df_raw = pd.read_excel(file_path, sheet_name=0, engine=engine, header=None)
-            
-            # Find header row (first non-empty row with at least 2 cells)
-            header_row = None
-            for idx, row in df_raw.iterrows():
-                non_empty = row.dropna()
-                if len(non_empty) >= 2:
-                    header_row = idx
-                    break
-            
-            if header_row is None:
-                raise ValueError("Header row not found in file!")
-            
-            # Read again from header row
-            df = pd.read_excel(file_path, sheet_name=0, engine=engine, header=header_row)
+                outcome, payload = results.get_nowait()
+            except queue.Empty:
+                self.root.after(100, poll)
+                return
+            self.on_file_loaded(outcome, payload)
         
-        # Normalize column names
-        df.columns = df.columns.astype(str).str.strip().str.lower()
+        self.root.after(100, poll)
+    
+    def on_file_loaded(self, outcome, payload):
+        """Fill the list with the result of a background import (Tk thread)"""
+        if outcome == 'error':
+            if isinstance(payload, ImportError):
+                messagebox.showerror(
+                    "Error",
+                    "Required libraries not found!\n\n"
+                    "Install with: pip install pandas openpyxl odfpy"
+                )
+            else:
+                messagebox.showerror("Error", f"Could not read file:\n{str(payload)}")
+            self.status_label.config(text="✗ File could not be loaded!")
+            return
         
-        # Find columns using PARTIAL MATCHING
-        diameter_col = None
-        length_col = None
-        count_col = None
+        demands, provenance = payload
         
-        for col in df.columns:
-            col_clean = col.replace(' ', '').replace('_', '')
-            
-            # UPDATED: Use 'any' with 'in' for partial matching
-            if not diameter_col and any(alias in col_clean for alias in diameter_aliases):
-                diameter_col = col
-            
-            if not length_col and any(alias in col_clean for alias in length_aliases):
-                length_col = col
-            
-            if not count_col and any(alias in col_clean for alias in count_aliases):
-                count_col = col
-        
-        # Check required columns
-        if not diameter_col:
-            raise ValueError(
-                f"Diameter column not found!\n"
-                f"Available columns: {list(df.columns)}\n"
-                f"Accepted names: {', '.join(diameter_aliases[:5])}..."
-            )
+        # Replace existing list
+        self.rebar_model.clear()
+        self.rebar_model.extend(
+            {'diameter': diameter, 'length': length, 'quantity': count}
+            for diameter in sorted(demands.keys())
+            for length, count in zip(demands[diameter]['lengths'], demands[diameter]['counts'])
+        )
+        total_added = len(self.rebar_model)
+        
+        self.filter_var.set("All")
+        self.update_list_info()
+        self.refresh_tree()
+        
+        # Per-sheet provenance
+        loaded = [p for p in provenance if not p['error']]
+        skipped = [p for p in provenance if p['error']]
+        details = "\n".join(
+            f"  {os.path.basename(p['file'])}"
+            f"{'' if p['sheet'] == 0 else ' / ' + str(p['sheet'])}: "
+            f"{p['items']} items, {p['pieces']} pcs"
+            for p in loaded[:15]
+        )
+        if len(loaded) > 15:
+            details += f"\n  ... {len(loaded) - 15} more sheets"
+        if skipped:
+            details += f"\n\n{len(skipped)} sheet(s) skipped (no rebar table)"
         
-        if not length_col:
-            raise ValueError(
-                f"Length column not found!\n"
-                f"Available columns: {list(df.columns)}\n"
-                f"Accepted names: {', '.join(length_aliases[:5])}..."
-            )
+        self.status_label.config(
+            text=f"● File loaded: {total_added} items added from {len(loaded)} sheet(s)"
+        )
+        messagebox.showinfo(
+            "Success",
+            f"File loaded successfully!\n{total_added} items added\n\n{details}"
+        )
+    
+    def collect_demands(self) -> Dict[int, Dict[str, List]]:
+        """Rebar list as solver demands: {diameter: {'lengths', 'counts', 'lines'}}"""
+        demands = {}
+        for line, rebar in enumerate(self.rebar_list, 1):
+            diameter = rebar['diameter']
+            if diameter not in demands:
+                demands[diameter] = {'lengths': [], 'counts': [], 'lines': []}
+            
+            demands[diameter]['lengths'].append(rebar['length'])
+            demands[diameter]['counts'].append(rebar['quantity'])
+            demands[diameter]['lines'].append(line)  # Source line for data export
+        return demands
+    
+    def run_stock_sweep(self):
+        """Solve the list at every stock length in the stock field (or 6/9/12/14m) and compare"""
+        if not self.rebar_list:
+            messagebox.showwarning("Warning", "Please add rebars first!")
+            return
         
-        # If no count column, assume 1 per row
-        if not count_col:
-            df['_temp_count'] = 1
-            count_col = '_temp_count'
+        try:
+            stocks = parse_stocks(self.stock_entry.get())
+        except ValueError as e:
+            messagebox.showerror("Error", f"Sweep error:\n{str(e)}")
+            return
+        if len(stocks) == 1:
+            lengths = sorted(set(DEFAULT_STOCK_LENGTHS) | {stocks[0].length})
+        else:
+            lengths = [stock.length for stock in stocks]
+        prices = {stock.length: stock.price for stock in stocks}
+        demands = self.collect_demands()
         
-        # Remove empty rows
-        df = df.dropna(subset=[diameter_col, length_col])
+        self.status_label.config(text="⚡ Comparing stock lengths...")
+        self.sweep_btn.config(state=tk.DISABLED)   # one sweep (and process pool) at a time
+        results = queue.Queue()
         
-        # Clean numbers (replace comma with dot)
-        def clean_number(val):
-            if pd.isna(val):
-                return None
-            val_str = str(val).replace(',', '.')
+        def worker():
+            # No Tk calls here - results go back through the queue
             try:
-                return float(val_str)
-            except:
-                return None
-        
-        df[diameter_col] = df[diameter_col].apply(clean_number)
-        df[length_col] = df[length_col].apply(clean_number)
-        df[count_col] = df[count_col].apply(clean_number)
-        
-        # Remove NaN rows
-        df = df.dropna(subset=[diameter_col, length_col, count_col])
+                results.put(('ok', sweep_stock_lengths(demands, lengths, prices=prices,
+                                                       time_limit_ms=30000)))
+            except Exception as e:
+                results.put(('error', e))
         
-        # Convert types
-        df[diameter_col] = df[diameter_col].astype(int)
-        df[count_col] = df[count_col].astype(int)
+        threading.Thread(target=worker, daemon=True).start()
         
-        # Build demands dictionary
-        demands = defaultdict(lambda: {'lengths': [], 'counts': []})
-        seen = {}  # (diameter, length) -> index
+        def poll():
+            try:
+                outcome, payload = results.get_nowait()
+            except queue.Empty:
+                self.root.after(100, poll)
+                return
+            self.on_sweep_done(outcome, payload, len(lengths))
         
-        for _, row in df.iterrows():
-            diameter = int(row[diameter_col])
-            length = float(row[length_col])
-            count = int(row[count_col])
-            
-            key = (diameter, length)
-            
-            # If same diameter+length seen before, add counts
-            if key in seen:
-                idx = seen[key]
-                demands[diameter]['counts'][idx] += count
-            else:
-                # First time, add new entry
-                demands[diameter]['lengths'].append(length)
-                demands[diameter]['counts'].append(count)
-                seen[key] = len(demands[diameter]['lengths']) - 1
+        self.root.after(100, poll)
+    
+    def on_sweep_done(self, outcome, payload, n_lengths: int):
+        """Show the result of a background stock length sweep (Tk thread)"""
+        self.sweep_btn.config(state=tk.NORMAL)
+        if outcome == 'error':
+            messagebox.showerror("Error", f"Sweep error:\n{str(payload)}")
+            self.status_label.config(text="✗ Sweep failed!")
+            return
         
-        return dict(demands)
+        # The table replaces the plan - drop it so Save/Copy/Book cannot export a hidden plan
+        self.clear_plan()
+        self.results_text.delete(1.0, tk.END)
+        self.results_text.insert(tk.END, "STOCK LENGTH COMPARISON (cheapest first)\n\n")
+        self.results_text.insert(tk.END, format_sweep_table(payload) + "\n")
+        self.status_label.config(text=f"● Compared {n_lengths} stock lengths")
+    
+    def clear_plan(self):
+        """Forget the last plan: report, summary and pattern browser"""
+        self.optimization_results = None
+        self.report = None
+        self.offcuts_booked = False
+        for label in self.summary_labels.values():
+            label.config(text="-", foreground=self.colors['secondary'])
+        self.pattern_diameter_combo.configure(values=[])
+        self.pattern_diameter_var.set("")
+        self.show_patterns()
+        self.pattern_info_label.config(text="")
     
     def calculate_optimization(self):
         """Calculate optimization using the fixed algorithm"""
@@ -938,36 +1191,52 @@ class RebarOptimizerGUI:
         self.root.update()
         
         try:
-            # Update stock length
-            self.stock_length = float(self.stock_entry.get().replace(',', '.'))
+            # Update stock length(s) - "12", or "6; 9; 12@0.98; 14" for a multi-stock solve
+            stocks = parse_stocks(self.stock_entry.get())
+            self.stock_length = max(stock.length for stock in stocks)
             
             # Prepare data for multi-diameter optimization
-            demands = {}
-            for rebar in self.rebar_list:
-                diameter = rebar['diameter']
-                if diameter not in demands:
-                    demands[diameter] = {'lengths': [], 'counts': []}
-                
-                demands[diameter]['lengths'].append(rebar['length'])
-                demands[diameter]['counts'].append(rebar['quantity'])
+            demands = self.collect_demands()
+            
+            # Run optimization (without console output, progress goes to the status bar)
+            # Stored remnants as limited stock - the connection is closed even if the solve fails
+            offcuts = OffcutInventory() if self.use_offcuts_var.get() else nullcontext()
+            with offcuts as inventory, log_to(self.show_solver_progress):
+                self.optimization_results = solve_multi_diameter_lexicographic(
+                    demands=demands,
+                    bin_capacity=self.stock_length,
+                    min_efficiency=0.85,
+                    max_patterns=1000,
+                    phase1_time_limit_ms=90000,
+                    phase2_time_limit_ms=90000,
+                    verbose=False,  # No console output
+                    print_output=False,  # No console printing
+                    adaptive=True,
+                    stocks=stocks if len(stocks) > 1 else None,
+                    offcuts=inventory
+                )
+            self.offcuts_booked = False
             
-            # Run optimization (without console output)
-            self.optimization_results = solve_multi_diameter_lexicographic(
-                demands=demands,
-                bin_capacity=self.stock_length,
-                min_efficiency=0.85,
-                max_patterns=1000,
-                phase1_time_limit_ms=90000,
-                phase2_time_limit_ms=90000,
-                verbose=False,  # No console output
-                print_output=False,  # No console printing
-                adaptive=True
+            # Patterns in cutting order - fewest open piece stacks on the shear line
+            self.optimization_results = apply_sequence(
+                self.optimization_results, schedule_cutting(self.optimization_results, demands)
             )
+            self.report = build_report(self.optimization_results, demands, self.stock_length,
+                                       stocks=stocks if len(stocks) > 1 else None)
             
             # Display results in GUI
             self.display_optimization_results()
             
-            self.status_label.config(text="● Calculation completed!")
+            # Slowest diameter from the solver statistics
+            timed = [(r['stats']['total_time'], d) for d, r in self.optimization_results.items()
+                     if r and r.get('stats')]
+            if timed:
+                slowest_time, slowest = max(timed)
+                self.status_label.config(
+                    text=f"● Calculation completed! (slowest: Ø{slowest} in {slowest_time:.1f}s)"
+                )
+            else:
+                self.status_label.config(text="● Calculation completed!")
             
         except Exception as e:
             messagebox.showerror("Error", f"Calculation error:\n{str(e)}")
@@ -975,136 +1244,66 @@ class RebarOptimizerGUI:
             import traceback
             traceback.print_exc()
     
-    def display_optimization_results(self):
-        """Display optimization results in GUI"""
+    def book_offcuts(self):
+        """Book the plan into the offcut inventory: remove used offcuts, add new remnants"""
         if not self.optimization_results:
+            messagebox.showwarning("Warning", "No plan to book!")
+            return
+        if self.offcuts_booked and not messagebox.askyesno(
+                "Book Offcuts", "This plan was already booked. Book it again?"):
             return
         
-        # Calculate totals
-        total_bars = 0
-        total_waste = 0
-        total_demand = 0
-        total_capacity = 0
-        theoretical_total = 0
-        
-        for diameter, result in self.optimization_results.items():
-            if result:
-                total_bars += result['total_bins']
-                total_waste += result['total_waste']
-                total_demand += result['total_demand']
-                total_capacity += result['total_capacity']
-                theoretical_total += result['theoretical_min']
+        try:
+            with OffcutInventory() as inventory:
+                used, added = inventory.apply_plan(self.optimization_results)
+                stored = sum(pieces for pieces, _ in inventory.summary().values())
+            self.offcuts_booked = True
+            self.status_label.config(
+                text=f"● Offcuts booked: {used} used, {added} added ({stored} in stock)"
+            )
+        except Exception as e:
+            messagebox.showerror("Error", f"Could not update the offcut inventory:\n{str(e)}")
+    
+    def show_solver_progress(self, record):
+        """Log handler callback - shows solver progress in the status bar"""
+        lines = [line.strip(" →✓=") for line in record.getMessage().splitlines()]
+        message = next((line for line in lines if line), "")
+        prefix = f"Ø{record.diameter}mm · " if record.diameter is not None else ""
+        self.status_label.config(text=f"⚡ {prefix}{message}")
+        self.root.update_idletasks()
+    
+    def display_optimization_results(self):
+        """Display optimization results in GUI (rendered from the report model)"""
+        report = self.report
+        if not report:
+            return
         
         # Update summary labels
-        overall_waste_pct = (total_waste / total_capacity * 100) if total_capacity > 0 else 0
-        
-        self.summary_labels['demand'].config(text=f"{total_demand:.2f}m")
-        self.summary_labels['bars'].config(text=f"{theoretical_total}/{total_bars} bars")  # Theoretical/Used
-        self.summary_labels['waste'].config(text=f"{total_waste:.2f}m")
+        self.summary_labels['demand'].config(text=f"{report.total_demand:.2f}m")
+        self.summary_labels['bars'].config(text=f"{report.theoretical_total}/{report.total_bars} bars")  # Theoretical/Used
+        self.summary_labels['waste'].config(text=f"{report.total_waste:.2f}m")
         self.summary_labels['waste_pct'].config(
-            text=f"{overall_waste_pct:.2f}%",
-            foreground=self.colors['success'] if overall_waste_pct < 10 else self.colors['warning']
+            text=f"{report.waste_percentage:.2f}%",
+            foreground=self.colors['success'] if report.waste_percentage < 10 else self.colors['warning']
         )
         
-        # Display cutting plan
+        # Display cutting plan - text is built once and inserted in one call
         self.results_text.delete(1.0, tk.END)
-        
-        self.results_text.insert(tk.END, "=" * 80 + "\n")
-        self.results_text.insert(tk.END, "CUTTING PLAN - PRODUCTION INSTRUCTION\n")
-        self.results_text.insert(tk.END, "=" * 80 + "\n\n")
-        
-        self.results_text.insert(tk.END, f"Date: {datetime.now().strftime('%d.%m.%Y %H:%M')}\n")
-        self.results_text.insert(tk.END, f"Stock Bar Length: {self.stock_length}m\n\n")
-        
-        # SUMMARY TABLE
-        self.results_text.insert(tk.END, "=" * 85 + "\n")
-        self.results_text.insert(tk.END, "OVERALL SUMMARY - ALL DIAMETERS\n")
-        self.results_text.insert(tk.END, "=" * 85 + "\n\n")
-        
-        # Table header
-        self.results_text.insert(tk.END, f"{'DIAM(mm)':<12} {'BARS':<10} {'WASTE(m)':<12} {'WASTE%':<10} {'DEMAND(m)':<12}\n")
-        self.results_text.insert(tk.END, "-" * 60 + "\n")
-        
-        # Table rows
-        for diameter in sorted(self.optimization_results.keys()):
-            result = self.optimization_results[diameter]
-            if result:
-                self.results_text.insert(
-                    tk.END,
-                    f"{diameter:<12} {result['total_bins']:<10} "
-                    f"{result['total_waste']:<12.2f} "
-                    f"{result['waste_percentage']:<10.2f} "
-                    f"{result['total_demand']:<12.2f}\n"
-                )
-            else:
-                self.results_text.insert(tk.END, f"{diameter:<12} {'NO SOLUTION':<10}\n")
-        
-        self.results_text.insert(tk.END, "-" * 60 + "\n")
-        self.results_text.insert(
-            tk.END,
-            f"{'TOTAL':<12} {total_bars:<10} "
-            f"{total_waste:<12.2f} "
-            f"{overall_waste_pct:<10.2f} "
-            f"{total_demand:<12.2f}\n"
-        )
-        self.results_text.insert(tk.END, "=" * 85 + "\n\n")
-        
-        # Display patterns for each diameter
-        for diameter in sorted(self.optimization_results.keys()):
-            result = self.optimization_results[diameter]
-            
-            if not result:
-                self.results_text.insert(tk.END, f"\n{'='*80}\n")
-                self.results_text.insert(tk.END, f"DIAMETER: Ø{diameter}mm\n")
-                self.results_text.insert(tk.END, f"{'='*80}\n")
-                self.results_text.insert(tk.END, "⚠️ NO SOLUTION FOUND\n\n")
-                continue
-            
-            self.results_text.insert(tk.END, f"\n{'='*80}\n")
-            self.results_text.insert(tk.END, f"DIAMETER: Ø{diameter}mm\n")
-            self.results_text.insert(tk.END, f"{'='*80}\n\n")
-            
-            self.results_text.insert(tk.END, f"Demand: {result['total_demand']:.2f}m\n")
-            self.results_text.insert(tk.END, f"Bars (Theoretical/Used): {result['theoretical_min']}/{result['total_bins']} bars\n")
-            self.results_text.insert(tk.END, f"Waste: {result['total_waste']:.2f}m ({result['waste_percentage']:.2f}%)\n\n")
-            
-            self.results_text.insert(tk.END, "-" * 80 + "\n")
-            self.results_text.insert(tk.END, "CUTTING PATTERNS:\n")
-            self.results_text.insert(tk.END, "-" * 80 + "\n\n")
-            
-            # Get lengths for this diameter
-            diameter_rebars = [r for r in self.rebar_list if r['diameter'] == diameter]
-            lengths = [r['length'] for r in diameter_rebars]
-            
-            # Display patterns
-            for idx, pattern_data in enumerate(result['used_patterns'], 1):
-                combo = pattern_data['combo']
-                count = pattern_data['count']
-                total = pattern_data['total']
-                waste = pattern_data['waste']
-                utilization = (total / self.stock_length) * 100
-                
-                # Build pattern description
-                cuts = []
-                for i, pieces in enumerate(combo):
-                    if pieces > 0:
-                        cuts.append(f"{pieces}×{lengths[i]:.2f}m")
-                
-                pattern_desc = " + ".join(cuts)
-                
-                self.results_text.insert(tk.END, f"Pattern {idx}: {count} bars\n")
-                self.results_text.insert(tk.END, f"  Cuts: {pattern_desc}\n")
-                self.results_text.insert(tk.END, f"  Total: {total:.2f}m | Waste: {waste:.2f}m | Utilization: {utilization:.1f}%\n\n")
-        
-        self.results_text.insert(tk.END, "=" * 80 + "\n")
-        self.results_text.insert(tk.END, "⚠️ NOTE: Double-check all measurements before cutting.\n")
-        self.results_text.insert(tk.END, "=" * 80 + "\n")
-        self.results_text.insert(tk.END, "END OF CUTTING PLAN\n")
-        self.results_text.insert(tk.END, "=" * 80 + "\n")
+        self.results_text.insert(tk.END, render_report_text(report))
+        
+        # Pattern browser - rows are loaded lazily per diameter
+        diameters = [f"Ø{d.diameter}mm" for d in report.solved]
+        self.pattern_diameter_combo.configure(values=diameters)
+        if diameters:
+            self.pattern_diameter_combo.current(0)
+            self.show_patterns(report.solved[0].diameter)
+        else:
+            self.pattern_diameter_var.set("")
+            self.show_patterns()
     
     def save_report(self):
-        """Save report to file (TXT, Excel, or PDF)"""
-        if not self.optimization_results:
+        """Save report to file (TXT, Excel, PDF or data)"""
+        if not self.report:
             messagebox.showwarning("Warning", "No report to save!")
             return
         
@@ -1112,7 +1311,11 @@ class RebarOptimizerGUI:
         file_types = [
             ("Text files", "*.txt"),
             ("Excel files", "*.xlsx"),
-            ("PDF files", "*.pdf")
+            ("PDF files", "*.pdf"),
+            ("JSON Lines (data)", "*.jsonl"),
+            ("CSV (data)", "*.csv"),
+            ("Parquet (data)", "*.parquet"),
+            ("Solver statistics", "*.json")
         ]
         
         # Default name
@@ -1129,44 +1332,58 @@ class RebarOptimizerGUI:
         if not filename:
             return
         
-        # Check extension and call appropriate function
-        if not (filename.endswith('.txt') or filename.endswith('.xlsx') or filename.endswith('.pdf')):
-            if '.txt' in str(file_types[0]):
-                filename += '.txt'
-            elif '.xlsx' in str(file_types[1]):
-                filename += '.xlsx'
-            elif '.pdf' in str(file_types[2]):
-                filename += '.pdf'
-        
         # Call appropriate save function
-        if filename.lower().endswith('.xlsx'):
+        extension = os.path.splitext(filename)[1].lower()
+        if extension == '.xlsx':
             self.save_as_excel(filename)
-        elif filename.lower().endswith('.pdf'):
+        elif extension == '.pdf':
             self.save_as_pdf(filename)
+        elif extension in ('.jsonl', '.csv', '.parquet'):
+            self.save_as_data(filename)
+        elif extension == '.json':
+            self.save_stats(filename)
         else:
-            if not filename.lower().endswith('.txt'):
+            if extension != '.txt':
                 filename += '.txt'
             self.save_as_text(filename)
     
+    def save_as_data(self, filename):
+        """Save plan as machine-readable data (one row per bar)"""
+        try:
+            save_plan_data(self.report, filename)
+            messagebox.showinfo("Success", f"Data file saved:\n{filename}")
+            self.status_label.config(text=f"● Data saved: {os.path.basename(filename)}")
+        except ImportError:
+            messagebox.showerror(
+                "Error",
+                "Parquet export requires pyarrow!\n\n"
+                "Install with: pip install pyarrow"
+            )
+        except Exception as e:
+            messagebox.showerror("Error", f"Could not save data file:\n{str(e)}")
+    
+    def save_stats(self, filename):
+        """Save solver timings and statistics of the last solve"""
+        try:
+            save_solver_stats(self.optimization_results, filename)
+            messagebox.showinfo("Success", f"Solver statistics saved:\n{filename}")
+            self.status_label.config(text=f"● Statistics saved: {os.path.basename(filename)}")
+        except Exception as e:
+            messagebox.showerror("Error", f"Could not save statistics:\n{str(e)}")
+    
     def save_as_text(self, filename):
         """Save report as text file"""
-        content = self.results_text.get(1.0, tk.END)
-        
         try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                f.write(content)
+            save_report_text(self.report, filename)
             messagebox.showinfo("Success", f"Text file saved:\n{filename}")
             self.status_label.config(text=f"● Text saved: {os.path.basename(filename)}")
         except Exception as e:
             messagebox.showerror("Error", f"Could not save file:\n{str(e)}")
     
     def save_as_excel(self, filename):
-        """Save report as Excel file"""
+        """Save report as Excel file (streaming, one sheet per diameter)"""
         try:
-            import pandas as pd
-            from openpyxl import Workbook
-            from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-            
+            import openpyxl
         except ImportError:
             messagebox.showerror(
                 "Error",
@@ -1176,169 +1393,7 @@ class RebarOptimizerGUI:
             return
         
         try:
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "Cutting Plan"
-            
-            # Styles
-            header_fill = PatternFill(start_color="5F9598", end_color="5F9598", fill_type="solid")
-            header_font = Font(bold=True, color="FFFFFF", size=11)
-            title_font = Font(bold=True, size=14)
-            border = Border(
-                left=Side(style='thin'),
-                right=Side(style='thin'),
-                top=Side(style='thin'),
-                bottom=Side(style='thin')
-            )
-            
-            row = 1
-            
-            # Title
-            ws.merge_cells(f'A{row}:E{row}')
-            cell = ws[f'A{row}']
-            cell.value = "CUTTING PLAN - PRODUCTION INSTRUCTION"
-            cell.font = title_font
-            cell.alignment = Alignment(horizontal='center')
-            row += 2
-            
-            # Date and settings
-            ws[f'A{row}'] = f"Date: {datetime.now().strftime('%d.%m.%Y %H:%M')}"
-            row += 1
-            ws[f'A{row}'] = f"Stock Bar Length: {self.stock_length}m"
-            row += 2
-            
-            # Summary table header
-            ws.merge_cells(f'A{row}:E{row}')
-            cell = ws[f'A{row}']
-            cell.value = "OVERALL SUMMARY - ALL DIAMETERS"
-            cell.font = Font(bold=True, size=12)
-            row += 1
-            
-            # Column headers
-            headers = ['DIAM(mm)', 'BARS', 'WASTE(m)', 'WASTE%', 'DEMAND(m)']
-            for col, header in enumerate(headers, 1):
-                cell = ws.cell(row=row, column=col)
-                cell.value = header
-                cell.font = header_font
-                cell.fill = header_fill
-                cell.alignment = Alignment(horizontal='center')
-                cell.border = border
-            row += 1
-            
-            # Calculate totals
-            total_bars = 0
-            total_waste = 0
-            total_demand = 0
-            total_capacity = 0
-            
-            for diameter, result in self.optimization_results.items():
-                if result:
-                    total_bars += result['total_bins']
-                    total_waste += result['total_waste']
-                    total_demand += result['total_demand']
-                    total_capacity += result['total_capacity']
-            
-            overall_waste_pct = (total_waste / total_capacity * 100) if total_capacity > 0 else 0
-            
-            # Data rows
-            for diameter in sorted(self.optimization_results.keys()):
-                result = self.optimization_results[diameter]
-                if result:
-                    data = [
-                        diameter,
-                        result['total_bins'],
-                        round(result['total_waste'], 2),
-                        round(result['waste_percentage'], 2),
-                        round(result['total_demand'], 2)
-                    ]
-                    for col, value in enumerate(data, 1):
-                        cell = ws.cell(row=row, column=col)
-                        cell.value = value
-                        cell.border = border
-                        cell.alignment = Alignment(horizontal='center')
-                    row += 1
-            
-            # Total row
-            total_data = ['TOTAL', total_bars, round(total_waste, 2), round(overall_waste_pct, 2), round(total_demand, 2)]
-            for col, value in enumerate(total_data, 1):
-                cell = ws.cell(row=row, column=col)
-                cell.value = value
-                cell.font = Font(bold=True)
-                cell.border = border
-                cell.alignment = Alignment(horizontal='center')
-            row += 2
-            
-            # Detailed patterns for each diameter
-            for diameter in sorted(self.optimization_results.keys()):
-                result = self.optimization_results[diameter]
-                if not result:
-                    continue
-                
-                # Diameter header
-                ws.merge_cells(f'A{row}:E{row}')
-                cell = ws[f'A{row}']
-                cell.value = f"DIAMETER: Ø{diameter}mm"
-                cell.font = Font(bold=True, size=11)
-                row += 1
-                
-                ws[f'A{row}'] = f"Demand: {result['total_demand']:.2f}m"
-                row += 1
-                ws[f'A{row}'] = f"Bars (Theoretical/Used): {result['theoretical_min']}/{result['total_bins']} bars"
-                row += 1
-                ws[f'A{row}'] = f"Waste: {result['total_waste']:.2f}m ({result['waste_percentage']:.2f}%)"
-                row += 2
-                
-                # Pattern headers
-                pattern_headers = ['Pattern', 'Bars', 'Cuts', 'Total(m)', 'Waste(m)']
-                for col, header in enumerate(pattern_headers, 1):
-                    cell = ws.cell(row=row, column=col)
-                    cell.value = header
-                    cell.font = header_font
-                    cell.fill = header_fill
-                    cell.alignment = Alignment(horizontal='center')
-                    cell.border = border
-                row += 1
-                
-                # Get lengths for this diameter
-                diameter_rebars = [r for r in self.rebar_list if r['diameter'] == diameter]
-                lengths = [r['length'] for r in diameter_rebars]
-                
-                # Pattern data
-                for idx, pattern_data in enumerate(result['used_patterns'], 1):
-                    combo = pattern_data['combo']
-                    count = pattern_data['count']
-                    total = pattern_data['total']
-                    waste = pattern_data['waste']
-                    
-                    # Build pattern description
-                    cuts = []
-                    for i, pieces in enumerate(combo):
-                        if pieces > 0:
-                            cuts.append(f"{pieces}×{lengths[i]:.2f}m")
-                    pattern_desc = " + ".join(cuts)
-                    
-                    data = [f"Pattern {idx}", count, pattern_desc, round(total, 2), round(waste, 2)]
-                    for col, value in enumerate(data, 1):
-                        cell = ws.cell(row=row, column=col)
-                        cell.value = value
-                        cell.border = border
-                        if col == 3:  # Cuts column
-                            cell.alignment = Alignment(horizontal='left')
-                        else:
-                            cell.alignment = Alignment(horizontal='center')
-                    row += 1
-                
-                row += 1
-            
-            # Adjust column widths
-            ws.column_dimensions['A'].width = 15
-            ws.column_dimensions['B'].width = 12
-            ws.column_dimensions['C'].width = 30
-            ws.column_dimensions['D'].width = 12
-            ws.column_dimensions['E'].width = 12
-            
-            # Save
-            wb.save(filename)
+            save_report_xlsx(self.report, filename)
             messagebox.showinfo("Success", f"Excel file saved:\n{filename}")
             self.status_label.config(text=f"● Excel saved: {os.path.basename(filename)}")
             
@@ -1350,7 +1405,7 @@ class RebarOptimizerGUI:
     def save_as_pdf(self, filename):
         """Save report as PDF file"""
         try:
-            from fpdf import FPDF
+            import fpdf
         except ImportError:
             messagebox.showerror(
                 "Error",
@@ -1360,150 +1415,7 @@ class RebarOptimizerGUI:
             return
         
         try:
-            pdf = FPDF()
-            pdf.add_page()
-            
-            # Use monospace font for better alignment
-            pdf.add_font('DejaVu', '', '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf', uni=True)
-            pdf.set_font('DejaVu', '', 10)
-            
-            # Title
-            pdf.set_font('DejaVu', '', 16)
-            pdf.cell(0, 10, 'CUTTING PLAN - PRODUCTION INSTRUCTION', 0, 1, 'C')
-            pdf.ln(5)
-            
-            # Info
-            pdf.set_font('DejaVu', '', 10)
-            pdf.cell(0, 6, f"Date: {datetime.now().strftime('%d.%m.%Y %H:%M')}", 0, 1)
-            pdf.cell(0, 6, f"Stock Bar Length: {self.stock_length}m", 0, 1)
-            pdf.ln(5)
-            
-            # Calculate totals
-            total_bars = 0
-            total_waste = 0
-            total_demand = 0
-            total_capacity = 0
-            
-            for diameter, result in self.optimization_results.items():
-                if result:
-                    total_bars += result['total_bins']
-                    total_waste += result['total_waste']
-                    total_demand += result['total_demand']
-                    total_capacity += result['total_capacity']
-            
-            overall_waste_pct = (total_waste / total_capacity * 100) if total_capacity > 0 else 0
-            
-            # Summary table
-            pdf.set_font('DejaVu', '', 12)
-            pdf.cell(0, 8, 'OVERALL SUMMARY - ALL DIAMETERS', 0, 1, 'C')
-            pdf.ln(2)
-            
-            # Table header
-            pdf.set_font('DejaVu', '', 9)
-            pdf.set_fill_color(95, 149, 152)
-            pdf.set_text_color(255, 255, 255)
-            
-            col_widths = [30, 25, 30, 25, 30]
-            headers = ['DIAM(mm)', 'BARS', 'WASTE(m)', 'WASTE%', 'DEMAND(m)']
-            
-            for i, header in enumerate(headers):
-                pdf.cell(col_widths[i], 8, header, 1, 0, 'C', True)
-            pdf.ln()
-            
-            # Table data
-            pdf.set_text_color(0, 0, 0)
-            pdf.set_fill_color(248, 249, 249)
-            
-            fill = False
-            for diameter in sorted(self.optimization_results.keys()):
-                result = self.optimization_results[diameter]
-                if result:
-                    pdf.cell(col_widths[0], 7, str(diameter), 1, 0, 'C', fill)
-                    pdf.cell(col_widths[1], 7, str(result['total_bins']), 1, 0, 'C', fill)
-                    pdf.cell(col_widths[2], 7, f"{result['total_waste']:.2f}", 1, 0, 'C', fill)
-                    pdf.cell(col_widths[3], 7, f"{result['waste_percentage']:.2f}", 1, 0, 'C', fill)
-                    pdf.cell(col_widths[4], 7, f"{result['total_demand']:.2f}", 1, 0, 'C', fill)
-                    pdf.ln()
-                    fill = not fill
-            
-            # Total row
-            pdf.set_font('DejaVu', '', 9)
-            pdf.cell(col_widths[0], 7, 'TOTAL', 1, 0, 'C', True)
-            pdf.cell(col_widths[1], 7, str(total_bars), 1, 0, 'C', True)
-            pdf.cell(col_widths[2], 7, f"{total_waste:.2f}", 1, 0, 'C', True)
-            pdf.cell(col_widths[3], 7, f"{overall_waste_pct:.2f}", 1, 0, 'C', True)
-            pdf.cell(col_widths[4], 7, f"{total_demand:.2f}", 1, 0, 'C', True)
-            pdf.ln(10)
-            
-            # Detailed patterns for each diameter
-            for diameter in sorted(self.optimization_results.keys()):
-                result = self.optimization_results[diameter]
-                if not result:
-                    continue
-                
-                # Check if new page needed
-                if pdf.get_y() > 250:
-                    pdf.add_page()
-                
-                # Diameter header
-                pdf.set_font('DejaVu', '', 12)
-                pdf.cell(0, 8, f"DIAMETER: O{diameter}mm", 0, 1)
-                pdf.set_font('DejaVu', '', 9)
-                pdf.cell(0, 6, f"Demand: {result['total_demand']:.2f}m", 0, 1)
-                pdf.cell(0, 6, f"Bars (Theoretical/Used): {result['theoretical_min']}/{result['total_bins']} bars", 0, 1)
-                pdf.cell(0, 6, f"Waste: {result['total_waste']:.2f}m ({result['waste_percentage']:.2f}%)", 0, 1)
-                pdf.ln(3)
-                
-                # Pattern table header
-                pdf.set_fill_color(95, 149, 152)
-                pdf.set_text_color(255, 255, 255)
-                pattern_widths = [25, 20, 75, 25, 25]
-                pattern_headers = ['Pattern', 'Bars', 'Cuts', 'Total(m)', 'Waste(m)']
-                
-                for i, header in enumerate(pattern_headers):
-                    pdf.cell(pattern_widths[i], 7, header, 1, 0, 'C', True)
-                pdf.ln()
-                
-                # Pattern data
-                pdf.set_text_color(0, 0, 0)
-                pdf.set_fill_color(248, 249, 249)
-                
-                # Get lengths for this diameter
-                diameter_rebars = [r for r in self.rebar_list if r['diameter'] == diameter]
-                lengths = [r['length'] for r in diameter_rebars]
-                
-                fill = False
-                for idx, pattern_data in enumerate(result['used_patterns'], 1):
-                    combo = pattern_data['combo']
-                    count = pattern_data['count']
-                    total = pattern_data['total']
-                    waste = pattern_data['waste']
-                    
-                    # Build pattern description
-                    cuts = []
-                    for i, pieces in enumerate(combo):
-                        if pieces > 0:
-                            cuts.append(f"{pieces}x{lengths[i]:.2f}m")
-                    pattern_desc = " + ".join(cuts)
-                    
-                    pdf.cell(pattern_widths[0], 6, f"Pattern {idx}", 1, 0, 'C', fill)
-                    pdf.cell(pattern_widths[1], 6, str(count), 1, 0, 'C', fill)
-                    pdf.cell(pattern_widths[2], 6, pattern_desc, 1, 0, 'L', fill)
-                    pdf.cell(pattern_widths[3], 6, f"{total:.2f}", 1, 0, 'C', fill)
-                    pdf.cell(pattern_widths[4], 6, f"{waste:.2f}", 1, 0, 'C', fill)
-                    pdf.ln()
-                    fill = not fill
-                
-                pdf.ln(5)
-            
-            # Warning note at the end
-            pdf.set_font('DejaVu', '', 10)
-            pdf.set_text_color(0, 0, 0)
-            pdf.cell(0, 8, 'NOTE: Double-check all measurements before cutting.', 0, 1, 'C')
-            pdf.ln(3)
-            
-            # Save PDF
-            pdf.output(filename)
+            save_report_pdf(self.report, filename)
             messagebox.showinfo("Success", f"PDF file saved:\n{filename}")
             self.status_label.config(text=f"● PDF saved: {os.path.basename(filename)}")
             
@@ -1522,20 +1434,19 @@ class RebarOptimizerGUI:
     
     def copy_to_clipboard(self):
         """Copy report to clipboard"""
-        content = self.results_text.get(1.0, tk.END)
-        
-        if not content.strip():
+        if not self.report:
             messagebox.showwarning("Warning", "No report to copy!")
             return
         
         self.root.clipboard_clear()
-        self.root.clipboard_append(content)
+        self.root.clipboard_append(render_report_text(self.report))
         messagebox.showinfo("Success", "Report copied to clipboard!")
         self.status_label.config(text="● Report copied to clipboard")
 
 
 def main():
     """Main function to run the application"""
+    multiprocessing.freeze_support()  # Parallel import in frozen (PyInstaller) builds
     root = tk.Tk()
     app = RebarOptimizerGUI(root)
     root.mainloop()
@@ -0,0 +1,447 @@
+#multistock.py
+# civileng.serdar@gmail.com
+"""
+Multi-stock cutting - one model picks the stock mix
+
+The supplier sells several stock lengths (e.g. 6, 9, 12 and 14 m) at
+different prices per metre. Patterns are generated in one pass shared by
+every stock length (each pattern is judged on the shortest stock it is
+efficient on) into one deduplicated pool. Each pattern becomes one column
+on the cheapest unlimited stock it fits (plus one per limited stock it
+fits), so the model grows with the pool, not with the number of stock
+lengths.
+
+    PHASE 1: minimize stock cost (length x price per metre)
+    PHASE 2: cost fixed, minimize waste
+
+Results use the solve_with_lexicographic_optimization dict format; every
+used pattern also carries its 'stock_length'.
+"""
+
+import math
+import re
+import time
+from dataclasses import dataclass
+from typing import List, Dict, Optional, Tuple
+
+from ortools.linear_solver import pywraplp
+
+from calculations import (
+    logger, report_logger, log_context, span, _console_args, _create_solver,
+    _record_solver_stats, _solution_counts, generate_comprehensive_patterns, MIP_BACKENDS
+)
+from patterns import PatternStore
+
+
+@dataclass(frozen=True)
+class Stock:
+    """One stock bar length on offer"""
+    length: float                       # m
+    price: float = 1.0                  # per metre (relative prices are enough)
+    quantity: Optional[int] = None      # bars available, None = unlimited
+    label: str = ''                     # e.g. 'offcut' for inventory remnants
+
+    @property
+    def bar_cost(self) -> float:
+        return self.length * self.price
+
+
+def parse_stocks(text: str) -> List[Stock]:
+    """
+    Stock list from the GUI field, e.g. "12", "6; 9; 12; 14" or "12@1.00, 14@1.05"
+
+    Entries are separated by ';', whitespace or ', '. An entry is a length
+    with an optional '@price' per metre; a comma inside a number is a
+    decimal comma ("12,5" = 12.5 m) unless it separates several numbers
+    ("6,9,12").
+    """
+    stocks = []
+    for token in re.split(r'[;\s]+|,(?=\s)', text.strip()):
+        if not token:
+            continue
+        parts = token.split(',') if token.count(',') > 1 else [token]
+        for part in parts:
+            length, _, price = part.partition('@')
+            length = float(length.replace(',', '.'))
+            price = float(price.replace(',', '.')) if price else 1.0
+            if length <= 0 or price < 0:
+                raise ValueError(f"Invalid stock entry: {part}")
+            stocks.append(Stock(length, price))
+    if not stocks:
+        raise ValueError("No stock length given!")
+    return stocks
+
+
+def _as_stocks(stocks) -> List[Stock]:
+    """Accept Stock objects, plain lengths or dicts with length/price/quantity"""
+    result = []
+    for stock in stocks:
+        if isinstance(stock, Stock):
+            result.append(Stock(float(stock.length), float(stock.price), stock.quantity, stock.label))
+        elif isinstance(stock, dict):
+            result.append(Stock(float(stock['length']), float(stock.get('price', 1.0)),
+                                stock.get('quantity'), stock.get('label', '')))
+        else:
+            result.append(Stock(float(stock)))
+    return result
+
+
+# ============================================================================
+# SHARED PATTERN POOL
+# ============================================================================
+
+def generate_multi_stock_patterns(
+    lengths: List[float],
+    counts: List[int],
+    stocks: List[Stock],
+    min_efficiency: float = 0.85,
+    max_patterns: int = 500
+) -> PatternStore:
+    """
+    One deduplicated pool over every stock length, generated in one pass
+
+    The enumeration runs once at the longest length; a pattern is kept if
+    it reaches min_efficiency on some stock it fits, and the best
+    max_patterns are kept per stock length (see generate_comprehensive_patterns).
+    Lengths offered only as limited stock (e.g. offcuts) take any
+    efficiency - the alternative is leaving the remnant unused.
+    """
+    unlimited = {s.length for s in stocks if s.quantity is None}
+    capacities = {
+        stock_length: min_efficiency if stock_length in unlimited else 0.0
+        for stock_length in {s.length for s in stocks} if stock_length >= min(lengths)
+    }
+    if not capacities:
+        return PatternStore(lengths, max(s.length for s in stocks))
+    return generate_comprehensive_patterns(
+        lengths=lengths,
+        counts=counts,
+        min_efficiency=min_efficiency,
+        max_patterns=max_patterns,
+        capacities=capacities
+    )
+
+
+def _stock_columns(pool: PatternStore, stocks: List[Stock]) -> List[Tuple[int, int]]:
+    """
+    (pattern, stock index) columns: the cheapest unlimited stock each
+    pattern fits (ties: shorter bar) and every limited stock it fits
+    """
+    unlimited = sorted((i for i, s in enumerate(stocks) if s.quantity is None),
+                       key=lambda i: (stocks[i].bar_cost, stocks[i].length))
+    limited = [i for i, s in enumerate(stocks) if s.quantity is not None]
+
+    columns = []
+    for p, total in enumerate(pool.total.tolist()):
+        fitting = [i for i in unlimited if stocks[i].length >= total - 1e-9]
+        if fitting:
+            columns.append((p, fitting[0]))
+        columns.extend((p, i) for i in limited if stocks[i].length >= total - 1e-9)
+    return columns
+
+
+# ============================================================================
+# MODEL
+# ============================================================================
+
+def _build_model(
+    pool: PatternStore,
+    columns: List[Tuple[int, int]],
+    stocks: List[Stock],
+    counts: List[int],
+    solver_backend: str
+):
+    """Demand rows and stock limits over the (pattern, stock) columns"""
+    solver = _create_solver(solver_backend)
+    limits = {i: solver.Constraint(0, s.quantity)
+              for i, s in enumerate(stocks) if s.quantity is not None}
+    x = []
+    pattern_columns: List[List[int]] = [[] for _ in range(len(pool))]
+    for c, (p, i) in enumerate(columns):
+        upper = stocks[i].quantity if i in limits else solver.infinity()
+        var = solver.IntVar(0, upper, f'pattern_{p}_stock_{i}')
+        if i in limits:
+            limits[i].SetCoefficient(var, 1)
+        x.append(var)
+        pattern_columns[p].append(c)
+
+    for t, (rows, pieces) in enumerate(pool.columns()):
+        constraint = solver.Constraint(counts[t], solver.infinity())
+        for p, n in zip(rows.tolist(), pieces.tolist()):
+            for c in pattern_columns[p]:
+                constraint.SetCoefficient(x[c], n)
+
+    return solver, x
+
+
+def _used_stock_patterns(
+    pool: PatternStore,
+    columns: List[Tuple[int, int]],
+    stocks: List[Stock],
+    column_counts: List[int]
+) -> Tuple[List[Dict], float]:
+    used_patterns = []
+    total_waste = 0.0
+    totals = pool.total
+    for c, count in enumerate(column_counts):
+        if count <= 0:
+            continue
+        p, i = columns[c]
+        total = float(totals[p])
+        waste = stocks[i].length - total
+        used_patterns.append({
+            'pattern_id': c,
+            'count': count,
+            'cuts': pool.cuts(p),
+            'waste': waste,
+            'total': total,
+            'stock_length': stocks[i].length,
+            'stock_price': stocks[i].price,
+            'stock_label': stocks[i].label
+        })
+        total_waste += waste * count
+    return used_patterns, total_waste
+
+
+def _solve_phase(
+    pool: PatternStore,
+    columns: List[Tuple[int, int]],
+    stocks: List[Stock],
+    counts: List[int],
+    time_limit_ms: int,
+    solver_backend: str,
+    stats: Dict,
+    max_cost: Optional[float] = None,
+    hint: Optional[List[int]] = None
+) -> Optional[List[int]]:
+    """Phase 1 (max_cost None): minimize cost. Phase 2: cost <= max_cost, minimize waste"""
+    build_start = time.perf_counter()
+    solver, x = _build_model(pool, columns, stocks, counts, solver_backend)
+    costs = [stocks[i].bar_cost for _, i in columns]
+
+    objective = solver.Objective()
+    if max_cost is None:
+        for var, cost in zip(x, costs):
+            objective.SetCoefficient(var, cost)
+    else:
+        budget = solver.Constraint(0, max_cost + 1e-6 * max(1.0, max_cost))
+        totals = pool.total.tolist()
+        for var, cost, (p, i) in zip(x, costs, columns):
+            budget.SetCoefficient(var, cost)
+            objective.SetCoefficient(var, stocks[i].length - totals[p])
+        if hint is not None:
+            solver.SetHint(x, [float(v) for v in hint])
+    objective.SetMinimization()
+
+    solver.SetTimeLimit(time_limit_ms)
+    solve_start = time.perf_counter()
+    status = solver.Solve()
+    _record_solver_stats(stats, solver, status, solve_start - build_start,
+                         time.perf_counter() - solve_start, solver_backend)
+
+    if status != pywraplp.Solver.OPTIMAL and status != pywraplp.Solver.FEASIBLE:
+        return None
+    return _solution_counts(x)
+
+
+# ============================================================================
+# SOLVE
+# ============================================================================
+
+@_console_args
+def solve_multi_stock(
+    lengths: List[float],
+    counts: List[int],
+    stocks,
+    min_efficiency: float = 0.85,
+    max_patterns: int = 500,
+    phase1_time_limit_ms: int = 30000,
+    phase2_time_limit_ms: int = 30000,
+    verbose: bool = True,
+    adaptive: bool = True,
+    solver_backend: str = 'SCIP'
+) -> Optional[Dict]:
+    """
+    Cutting plan over several stock lengths
+
+    Args:
+        stocks: Stock objects, lengths, or dicts {'length', 'price', 'quantity'}
+        solver_backend: 'SCIP' or 'CBC'
+
+    Returns the solve_with_lexicographic_optimization result dict plus
+    'stock_mix' ({stock_length: bars}), 'total_cost' and 'cost_lower_bound'.
+    """
+    if solver_backend not in MIP_BACKENDS:
+        raise ValueError(f"Multi-stock solves need a MIP backend ({', '.join(MIP_BACKENDS)})")
+    if len(lengths) != len(counts):
+        raise ValueError("lengths and counts must have same length!")
+    stocks = _as_stocks(stocks)
+    if not stocks:
+        raise ValueError("stocks cannot be empty!")
+
+    solve_start = time.perf_counter()
+    longest = max(s.length for s in stocks)
+    total_demand = sum(l * c for l, c in zip(lengths, counts))
+    theoretical_min = math.ceil(total_demand / longest - 1e-9)
+    unlimited_prices = [s.price for s in stocks if s.quantity is None]
+    cost_lower_bound = total_demand * min(unlimited_prices) if unlimited_prices else 0.0
+
+    if max(lengths) > longest:
+        logger.warning("❌ Longest cut %.2fm doesn't fit the longest stock bar (%sm)",
+                       max(lengths), longest)
+        return None
+
+    logger.info("Total demand: %.2fm, stock lengths: %s", total_demand,
+                ", ".join(f"{s.length:g}m" for s in stocks))
+
+    efficiency_levels = [min_efficiency]
+    if theoretical_min == 1:
+        efficiency_levels = [0.0]
+    elif adaptive:
+        current = min_efficiency
+        while current > 0.0:
+            current -= 0.05
+            efficiency_levels.append(round(max(current, 0.0), 2))
+
+    stats = {'levels': [], 'phase2': None}
+    solution = None
+    used_efficiency = min_efficiency
+    with span('adaptive_loop', levels=len(efficiency_levels), stocks=len(stocks)):
+        for eff in efficiency_levels:
+            level_stats = {'min_efficiency': eff, 'phase1': None}
+            stats['levels'].append(level_stats)
+
+            generation_start = time.perf_counter()
+            with span('generate_patterns', min_efficiency=eff, n_types=len(lengths)) as gen_span:
+                pool = generate_multi_stock_patterns(lengths, counts, stocks, eff, max_patterns)
+                columns = _stock_columns(pool, stocks)
+                gen_span.set(pattern_count=len(pool), column_count=len(columns))
+            level_stats['generation_time'] = time.perf_counter() - generation_start
+            level_stats['pattern_count'] = len(pool)
+            level_stats['column_count'] = len(columns)
+            if not columns:
+                continue
+
+            logger.info("\n[PHASE 1] Minimizing stock cost (efficiency: %.0f%%, %d columns)...",
+                        eff * 100, len(columns), extra={'phase': 1, 'efficiency': eff})
+            level_stats['phase1'] = {}
+            with span('phase1', min_efficiency=eff, pattern_count=len(columns)):
+                solution = _solve_phase(pool, columns, stocks, counts, phase1_time_limit_ms,
+                                        solver_backend, level_stats['phase1'])
+            if solution is not None:
+                used_efficiency = eff
+                break
+
+    if solution is None:
+        logger.warning("❌ NO SOLUTION FOUND for stocks %s",
+                       ", ".join(f"{s.length:g}m" for s in stocks))
+        return None
+
+    used_patterns, total_waste = _used_stock_patterns(pool, columns, stocks, solution)
+    phase1_cost = sum(stocks[columns[c][1]].bar_cost * n for c, n in enumerate(solution))
+    logger.info("  → Minimum cost: %.2f (%d bars)", phase1_cost, sum(solution),
+                extra={'phase': 1, 'bars': sum(solution), 'waste': total_waste})
+
+    phase_used = 1
+    if total_waste > 1e-9:
+        logger.info("\n[PHASE 2] Cost=%.2f fixed, minimizing waste...", phase1_cost,
+                    extra={'phase': 2})
+        stats['phase2'] = {}
+        with span('phase2', pattern_count=len(columns)):
+            improved = _solve_phase(pool, columns, stocks, counts, phase2_time_limit_ms,
+                                    solver_backend, stats['phase2'], max_cost=phase1_cost,
+                                    hint=solution)
+        if improved is not None:
+            patterns2, waste2 = _used_stock_patterns(pool, columns, stocks, improved)
+            if waste2 < total_waste - 1e-9:
+                logger.info("  ✓ Waste improvement: %.2fm", total_waste - waste2,
+                            extra={'phase': 2})
+                solution, used_patterns, total_waste = improved, patterns2, waste2
+                phase_used = 2
+
+    stock_mix: Dict[float, int] = {}
+    total_cost = 0.0
+    for up in used_patterns:
+        stock_mix[up['stock_length']] = stock_mix.get(up['stock_length'], 0) + up['count']
+        total_cost += up['stock_length'] * up['stock_price'] * up['count']
+    total_bins = sum(stock_mix.values())
+    total_capacity = sum(length * bars for length, bars in stock_mix.items())
+    stats['total_time'] = time.perf_counter() - solve_start
+
+    logger.info("  ✓ %d bars (%s), waste %.2fm", total_bins,
+                ", ".join(f"{bars}×{length:g}m" for length, bars in sorted(stock_mix.items())),
+                total_waste, extra={'bars': total_bins, 'waste': total_waste,
+                                    'elapsed': stats['total_time']})
+
+    return {
+        'used_patterns': used_patterns,
+        'total_bins': total_bins,
+        'total_waste': total_waste,
+        'waste_percentage': (total_waste / total_capacity) * 100 if total_capacity else 0.0,
+        'theoretical_min': theoretical_min,
+        'total_demand': total_demand,
+        'total_capacity': total_capacity,
+        'phase_used': phase_used,
+        'used_efficiency': used_efficiency,
+        'stock_mix': dict(sorted(stock_mix.items())),
+        'total_cost': total_cost,
+        'cost_lower_bound': cost_lower_bound,
+        'stats': stats
+    }
+
+
+@_console_args
+def solve_multi_diameter_multi_stock(
+    demands: Dict[int, Dict],
+    stocks,
+    min_efficiency: float = 0.85,
+    max_patterns: int = 1000,
+    phase1_time_limit_ms: int = 90000,
+    phase2_time_limit_ms: int = 90000,
+    verbose: bool = True,
+    print_output: bool = True,
+    adaptive: bool = True,
+    solver_backend: str = 'SCIP'
+) -> Dict[int, Optional[Dict]]:
+    """
+    solve_multi_stock for every diameter
+
+    demands: {diameter: {'lengths', 'counts'}}, optionally with 'stocks'
+        overriding the stock list of one diameter
+    """
+    if not demands:
+        raise ValueError("demands cannot be empty!")
+
+    results = {}
+    for diameter in sorted(demands.keys()):
+        demand_data = demands[diameter]
+        with log_context(diameter=diameter), \
+                span('diameter', diameter=diameter, n_types=len(demand_data['lengths'])):
+            results[diameter] = solve_multi_stock(
+                lengths=demand_data['lengths'],
+                counts=demand_data['counts'],
+                stocks=demand_data.get('stocks', stocks),
+                min_efficiency=min_efficiency,
+                max_patterns=max_patterns,
+                phase1_time_limit_ms=phase1_time_limit_ms,
+                phase2_time_limit_ms=phase2_time_limit_ms,
+                verbose=verbose,
+                adaptive=adaptive,
+                solver_backend=solver_backend
+            )
+
+    if print_output:
+        lines = ["", "="*80, "OVERALL SUMMARY - MULTI-STOCK", "="*80,
+                 f"\n{'DIAM(mm)':<12} {'BARS':<10} {'WASTE(m)':<12} {'WASTE%':<10} "
+                 f"{'COST':<12} STOCK MIX", "-" * 85]
+        for diameter, result in sorted(results.items()):
+            if result:
+                mix = ", ".join(f"{bars}×{length:g}m" for length, bars in result['stock_mix'].items())
+                lines.append(f"{diameter:<12} {result['total_bins']:<10} "
+                             f"{result['total_waste']:<12.2f} {result['waste_percentage']:<10.2f} "
+                             f"{result['total_cost']:<12.2f} {mix}")
+            else:
+                lines.append(f"{diameter:<12} {'NO SOLUTION':<10}")
+        report_logger.info("\n".join(lines))
+
+    return results
@@ -0,0 +1,180 @@
+#offcuts.py
+# civileng.serdar@gmail.com
+"""
+Offcut inventory - remnants kept on site, reused as stock in later solves
+
+Remnants are stored in SQLite, one row per (diameter, length) with a
+quantity. Lengths are kept in whole centimetres, rounded down, so a
+remnant is never assumed longer than it is. The (diameter, length_cm)
+primary key is the lookup index: candidate offcuts of one diameter above
+a minimum length are a range scan, fast with tens of thousands of rows.
+
+    inventory = OffcutInventory()
+    results = solve_multi_diameter_lexicographic(demands, offcuts=inventory)
+    inventory.apply_plan(results)       # book used offcuts and new remnants
+"""
+
+import os
+import sqlite3
+from datetime import datetime
+from typing import List, Dict, Iterable, Optional, Tuple
+
+from multistock import Stock
+
+
+INVENTORY_FILE = os.path.join(os.path.expanduser('~'), '.demirci', 'offcuts.sqlite')
+MIN_OFFCUT_LENGTH = 1.0     # m - shorter remnants are scrap
+OFFCUT_PRICE = 0.0          # per metre - remnants are already paid for
+OFFCUT_LABEL = 'offcut'
+MAX_OFFCUT_TYPES = 20       # distinct offcut lengths offered to one solve
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS offcuts (
+    diameter   INTEGER NOT NULL,
+    length_cm  INTEGER NOT NULL,
+    quantity   INTEGER NOT NULL,
+    updated    TEXT NOT NULL,
+    PRIMARY KEY (diameter, length_cm)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS offcuts_length ON offcuts (length_cm);
+"""
+
+
+def _to_cm(length: float) -> int:
+    return int(length * 100 + 1e-6)
+
+
+class OffcutInventory:
+    """SQLite-backed remnant store (use as a context manager or call close())"""
+
+    def __init__(self, path: str = INVENTORY_FILE):
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._db = sqlite3.connect(path)
+        self._db.executescript(_SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self) -> 'OffcutInventory':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    def _add(self, diameter: int, length: float, quantity: int, now: str):
+        key = (int(diameter), _to_cm(length))
+        updated = self._db.execute(
+            "UPDATE offcuts SET quantity = quantity + ?, updated = ? "
+            "WHERE diameter = ? AND length_cm = ?", (quantity, now) + key)
+        if updated.rowcount == 0:
+            self._db.execute("INSERT INTO offcuts VALUES (?, ?, ?, ?)", key + (quantity, now))
+
+    def _remove(self, diameter: int, length: float, quantity: int, now: str):
+        key = (int(diameter), _to_cm(length))
+        self._db.execute(
+            "UPDATE offcuts SET quantity = quantity - ?, updated = ? "
+            "WHERE diameter = ? AND length_cm = ?", (quantity, now) + key)
+        self._db.execute("DELETE FROM offcuts WHERE diameter = ? AND length_cm = ? AND quantity <= 0", key)
+
+    def add(self, diameter: int, length: float, quantity: int = 1):
+        """Store remnants (ignored below MIN_OFFCUT_LENGTH)"""
+        if length < MIN_OFFCUT_LENGTH or quantity <= 0:
+            return
+        with self._db:
+            self._add(diameter, length, quantity, datetime.now().isoformat(timespec='seconds'))
+
+    def add_many(self, offcuts: Iterable[Tuple[int, float, int]]):
+        """Store many (diameter, length, quantity) remnants in one transaction"""
+        now = datetime.now().isoformat(timespec='seconds')
+        with self._db:
+            for diameter, length, quantity in offcuts:
+                if length >= MIN_OFFCUT_LENGTH and quantity > 0:
+                    self._add(diameter, length, quantity, now)
+
+    def remove(self, diameter: int, length: float, quantity: int = 1):
+        """Take remnants out of the inventory (rows at zero are deleted)"""
+        with self._db:
+            self._remove(diameter, length, quantity, datetime.now().isoformat(timespec='seconds'))
+
+    def apply_plan(
+        self,
+        results: Dict[int, Optional[Dict]],
+        min_length: float = MIN_OFFCUT_LENGTH
+    ) -> Tuple[int, int]:
+        """
+        Book a solved plan in one transaction: offcuts it cuts from are
+        removed, remnants of at least min_length are added
+
+        Returns (offcuts used, remnants added).
+        """
+        now = datetime.now().isoformat(timespec='seconds')
+        used = added = 0
+        with self._db:
+            for diameter, result in results.items():
+                if not result:
+                    continue
+                for pattern in result['used_patterns']:
+                    count = pattern['count']
+                    if pattern.get('stock_label') == OFFCUT_LABEL:
+                        self._remove(diameter, pattern['stock_length'], count, now)
+                        used += count
+                    if pattern['waste'] >= min_length:
+                        self._add(diameter, pattern['waste'], count, now)
+                        added += count
+        return used, added
+
+    def clear(self, diameter: Optional[int] = None):
+        with self._db:
+            if diameter is None:
+                self._db.execute("DELETE FROM offcuts")
+            else:
+                self._db.execute("DELETE FROM offcuts WHERE diameter = ?", (int(diameter),))
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def candidates(
+        self,
+        diameter: int,
+        min_length: float = 0.0,
+        max_length: Optional[float] = None,
+        limit: Optional[int] = None
+    ) -> List[Tuple[float, int]]:
+        """(length, quantity) of one diameter in a length range, longest first"""
+        query = "SELECT length_cm, quantity FROM offcuts WHERE diameter = ? AND length_cm >= ?"
+        params = [int(diameter), _to_cm(min_length)]
+        if max_length is not None:
+            query += " AND length_cm <= ?"
+            params.append(_to_cm(max_length))
+        query += " ORDER BY length_cm DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(int(limit))
+        return [(cm / 100, quantity) for cm, quantity in self._db.execute(query, params)]
+
+    def as_stocks(
+        self,
+        diameter: int,
+        min_length: float,
+        price: float = OFFCUT_PRICE,
+        limit: int = MAX_OFFCUT_TYPES
+    ) -> List[Stock]:
+        """
+        Offcuts of one diameter that hold at least min_length (the shortest
+        cut), as limited-quantity stocks for multistock.solve_multi_stock
+        """
+        return [Stock(length, price, quantity, OFFCUT_LABEL)
+                for length, quantity in self.candidates(diameter, min_length, limit=limit)]
+
+    def summary(self) -> Dict[int, Tuple[int, float]]:
+        """{diameter: (pieces, metres)}"""
+        rows = self._db.execute(
+            "SELECT diameter, SUM(quantity), SUM(quantity * length_cm) FROM offcuts GROUP BY diameter")
+        return {diameter: (pieces, cm / 100) for diameter, pieces, cm in rows}
@@ -0,0 +1,197 @@
+#patterns.py
+# civileng.serdar@gmail.com
+"""
+Compact cutting pattern store
+
+Patterns are kept in CSR form - one row per pattern holding only the cut
+types it uses - with totals and waste as parallel NumPy arrays. For 300
+types x 5000 patterns that is a few hundred kB instead of millions of
+Python ints and dicts. Pattern generation fills the store, both solve
+phases read it directly and the results refer to patterns by their sparse
+cut list ((type_index, pieces), ...).
+"""
+
+from array import array
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+
+
+Cuts = Tuple[Tuple[int, int], ...]     # ((type_index, pieces), ...) sorted by type
+
+
+class PatternView:
+    """Read-only view of one pattern in a PatternStore"""
+    __slots__ = ('_store', 'index')
+
+    def __init__(self, store: 'PatternStore', index: int):
+        self._store = store
+        self.index = index
+
+    @property
+    def cuts(self) -> Cuts:
+        return self._store.cuts(self.index)
+
+    @property
+    def total(self) -> float:
+        return float(self._store.total[self.index])
+
+    @property
+    def waste(self) -> float:
+        return float(self._store.waste[self.index])
+
+    @property
+    def efficiency(self) -> float:
+        return self.total / self._store.bin_capacity
+
+    def __repr__(self) -> str:
+        return f"PatternView({self.index}, cuts={self.cuts}, waste={self.waste:.3f})"
+
+
+class PatternStore:
+    """
+    Deduplicated patterns of one cutting problem in CSR layout
+
+    indptr[p]:indptr[p+1] slices indices (cut types) and pieces of pattern p.
+    Rows are appended while generating and frozen into NumPy arrays on
+    first read.
+    """
+
+    def __init__(self, lengths: List[float], bin_capacity: float):
+        self.lengths = [float(l) for l in lengths]
+        self.bin_capacity = float(bin_capacity)
+        self.n_types = len(lengths)
+        self._seen: Dict[Cuts, int] = {}
+        self._indptr = array('q', [0])
+        self._indices = array('i')
+        self._pieces = array('i')
+        self._total = array('d')
+        self._frozen: Optional[Tuple[np.ndarray, ...]] = None
+        self._columns: Optional[List[Tuple[np.ndarray, np.ndarray]]] = None
+
+    # ------------------------------------------------------------------
+    # Building
+    # ------------------------------------------------------------------
+
+    def add(self, cuts: Iterable[Tuple[int, int]], total: Optional[float] = None) -> int:
+        """
+        Add a pattern given as (type_index, pieces) pairs
+
+        Returns the new pattern index, or -1 if the pattern is already stored.
+        total may be passed when the caller already summed the used length.
+        """
+        key = tuple(sorted((t, p) for t, p in cuts if p > 0))
+        if key in self._seen:
+            return -1
+        if total is None:
+            total = sum(self.lengths[t] * p for t, p in key)
+
+        index = len(self._total)
+        self._seen[key] = index
+        for t, p in key:
+            self._indices.append(t)
+            self._pieces.append(p)
+        self._indptr.append(len(self._indices))
+        self._total.append(total)
+        self._frozen = None
+        self._columns = None
+        return index
+
+    def find(self, cuts: Iterable[Tuple[int, int]]) -> int:
+        """Index of a stored pattern, or -1"""
+        return self._seen.get(tuple(sorted((t, p) for t, p in cuts if p > 0)), -1)
+
+    # ------------------------------------------------------------------
+    # Arrays
+    # ------------------------------------------------------------------
+
+    def _arrays(self) -> Tuple[np.ndarray, ...]:
+        if self._frozen is None:
+            total = np.frombuffer(self._total, dtype=np.float64).copy()
+            self._frozen = (
+                np.frombuffer(self._indptr, dtype=np.int64).copy(),
+                np.frombuffer(self._indices, dtype=np.int32).copy(),
+                np.frombuffer(self._pieces, dtype=np.int32).copy(),
+                total,
+                self.bin_capacity - total
+            )
+        return self._frozen
+
+    @property
+    def indptr(self) -> np.ndarray:
+        return self._arrays()[0]
+
+    @property
+    def indices(self) -> np.ndarray:
+        return self._arrays()[1]
+
+    @property
+    def pieces(self) -> np.ndarray:
+        return self._arrays()[2]
+
+    @property
+    def total(self) -> np.ndarray:
+        return self._arrays()[3]
+
+    @property
+    def waste(self) -> np.ndarray:
+        return self._arrays()[4]
+
+    @property
+    def efficiency(self) -> np.ndarray:
+        return self.total / self.bin_capacity
+
+    # ------------------------------------------------------------------
+    # Access
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._total)
+
+    def __getitem__(self, index: int) -> PatternView:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return PatternView(self, index)
+
+    def __iter__(self) -> Iterator[PatternView]:
+        return (PatternView(self, p) for p in range(len(self)))
+
+    def cuts(self, index: int) -> Cuts:
+        start, end = self._indptr[index], self._indptr[index + 1]
+        return tuple(zip(self._indices[start:end], self._pieces[start:end]))
+
+    def columns(self) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Per cut type: (pattern indices, pieces) - the CSC transpose for demand rows"""
+        if self._columns is None:
+            indptr, indices, pieces = self._arrays()[:3]
+            rows = np.repeat(np.arange(len(self), dtype=np.int64), np.diff(indptr))
+            order = np.argsort(indices, kind='stable')
+            bounds = np.searchsorted(indices[order], np.arange(self.n_types + 1))
+            self._columns = [
+                (rows[order[bounds[t]:bounds[t + 1]]], pieces[order[bounds[t]:bounds[t + 1]]])
+                for t in range(self.n_types)
+            ]
+        return self._columns
+
+    def select(self, order: Iterable[int]) -> 'PatternStore':
+        """New store with the given patterns, in that order"""
+        subset = PatternStore(self.lengths, self.bin_capacity)
+        total = self._total
+        for p in order:
+            subset.add(self.cuts(int(p)), total[int(p)])
+        return subset
+
+    def restrict(self, counts: List[int]) -> 'PatternStore':
+        """Patterns that cut no type more often than counts allows (0 = type not needed)"""
+        indptr, indices, pieces = self._arrays()[:3]
+        allowed = np.asarray(counts, dtype=np.int64)[indices] >= pieces
+        keep = np.logical_and.reduceat(allowed, indptr[:-1]) if len(indices) else allowed
+        return self.select(np.flatnonzero(keep))
+
+    def best(self, limit: int) -> 'PatternStore':
+        """The limit lowest-waste patterns (ties: higher efficiency, then insertion order)"""
+        waste = self.waste
+        order = np.lexsort((-self.efficiency, waste))
+        return self.select(order[:limit])
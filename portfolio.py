@@ -0,0 +1,205 @@
+#portfolio.py
+# civileng.serdar@gmail.com
+"""
+Portfolio Phase 1 - races solver backends on the same pattern pool
+
+SCIP, CBC, CP-SAT (all cores) and the greedy heuristic each run Phase 1 in
+their own process. The first result that is proven optimal - by the solver
+or by reaching the ceil(demand / stock length) bound - wins and the other
+processes are terminated; otherwise the best result at the deadline wins.
+
+The best exact backend of each race is recorded per instance class (cut
+types x pattern count) in a small JSON history, which solver_backend='auto'
+uses to pick one backend directly once a class has been raced a few times.
+Greedy takes part in the race but is never chosen as the sole solver.
+"""
+
+import json
+import math
+import multiprocessing
+import os
+import queue
+import time
+from typing import List, Dict, Optional, Tuple
+
+from calculations import EXACT_BACKENDS
+from patterns import PatternStore
+
+
+PORTFOLIO_BACKENDS = ('SCIP', 'CBC', 'CP-SAT', 'greedy')
+HISTORY_FILE = os.path.join(os.path.expanduser('~'), '.demirci', 'solver_history.json')
+AUTO_MIN_RACES = 3          # races per class before 'auto' trusts the history
+GRACE_SECONDS = 5.0         # on top of the time limit, for process start-up and model build
+
+_SIZE_BUCKETS = (10, 30, 100, 300, 1000, 3000)
+
+
+# ============================================================================
+# WINNER HISTORY
+# ============================================================================
+
+def _bucket(value: int) -> str:
+    for limit in _SIZE_BUCKETS:
+        if value <= limit:
+            return f"{limit}"
+    return f"{_SIZE_BUCKETS[-1]}+"
+
+
+def instance_class(n_types: int, n_patterns: int) -> str:
+    """Coarse instance class, e.g. 't30-p1000' (up to 30 types, up to 1000 patterns)"""
+    return f"t{_bucket(n_types)}-p{_bucket(n_patterns)}"
+
+
+def load_history(path: str = HISTORY_FILE) -> Dict[str, Dict[str, int]]:
+    """{instance_class: {backend: wins}} - empty if missing or unreadable"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f).get('classes', {})
+    except (OSError, ValueError):
+        return {}
+
+
+def record_winner(cls: str, backend: str, path: str = HISTORY_FILE):
+    history = load_history(path)
+    wins = history.setdefault(cls, {})
+    wins[backend] = wins.get(backend, 0) + 1
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'classes': history}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass    # history is an optimization only
+
+
+def choose_backend(n_types: int, n_patterns: int, path: str = HISTORY_FILE) -> str:
+    """Most frequent past exact winner of this class, or 'portfolio' while there is too little history"""
+    wins = load_history(path).get(instance_class(n_types, n_patterns), {})
+    wins = {backend: n for backend, n in wins.items()
+            if backend in PORTFOLIO_BACKENDS and backend in EXACT_BACKENDS}
+    if sum(wins.values()) < AUTO_MIN_RACES:
+        return 'portfolio'
+    return max(wins, key=lambda backend: (wins[backend], -PORTFOLIO_BACKENDS.index(backend)))
+
+
+# ============================================================================
+# RACE
+# ============================================================================
+
+def _race_worker(backend: str, kwargs: Dict, results: 'multiprocessing.Queue'):
+    """Process entry point - one backend, result posted to the queue"""
+    from calculations import solve_phase1_minimize_bins
+
+    stats = {}
+    try:
+        result = solve_phase1_minimize_bins(stats=stats, solver_backend=backend, **kwargs)
+    except Exception as e:
+        result = None
+        stats['error'] = f"{type(e).__name__}: {e}"
+    results.put((backend, result, stats))
+
+
+def _rank(candidate: Tuple) -> Tuple:
+    # (bins, waste), then proven optimal, then PORTFOLIO_BACKENDS order - never arrival order
+    bins, backend, waste, _, backend_stats = candidate
+    order = PORTFOLIO_BACKENDS.index(backend) if backend in PORTFOLIO_BACKENDS else len(PORTFOLIO_BACKENDS)
+    return (bins, round(waste, 9), backend_stats.get('status') != 'OPTIMAL', order)
+
+
+def _is_better(candidate: Tuple, best: Optional[Tuple]) -> bool:
+    return best is None or _rank(candidate) < _rank(best)
+
+
+def solve_phase1_portfolio(
+    lengths: List[float],
+    counts: List[int],
+    patterns: PatternStore,
+    bin_capacity: float = 12.0,
+    time_limit_ms: int = 30000,
+    backends: Tuple[str, ...] = PORTFOLIO_BACKENDS,
+    stats: Optional[Dict] = None,
+    history_file: Optional[str] = HISTORY_FILE
+) -> Optional[Tuple[int, List[Dict], float]]:
+    """
+    Run Phase 1 with every backend in parallel, keep the winner
+
+    Returns the winner's (min_bins, used_patterns, total_waste), like
+    solve_phase1_minimize_bins. stats gets the winner's statistics plus
+    'portfolio': {backend: {'status', 'objective', 'solve_time', 'error'}}.
+    """
+    race_start = time.perf_counter()
+    lower_bound = math.ceil(sum(l * c for l, c in zip(lengths, counts)) / bin_capacity - 1e-9)
+    kwargs = {
+        'lengths': list(lengths),
+        'counts': list(counts),
+        'patterns': patterns,
+        'bin_capacity': bin_capacity,
+        'time_limit_ms': time_limit_ms
+    }
+
+    results = multiprocessing.Queue()
+    processes = {}
+    for backend in backends:
+        process = multiprocessing.Process(target=_race_worker, args=(backend, kwargs, results),
+                                          name=f"phase1-{backend}", daemon=True)
+        process.start()
+        processes[backend] = process
+
+    deadline = race_start + time_limit_ms / 1000 + GRACE_SECONDS
+    reports = {}
+    best = None             # (bins, backend, waste, result, stats)
+    best_exact = None       # same, exact backends only - what the history learns from
+    proven = False
+    try:
+        while len(reports) < len(processes) and not proven:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                backend, result, backend_stats = results.get(timeout=min(timeout, 0.5))
+            except queue.Empty:
+                if not any(p.is_alive() for b, p in processes.items() if b not in reports):
+                    break   # every remaining worker died without reporting
+                continue
+
+            reports[backend] = backend_stats
+            if result is None:
+                continue
+            candidate = (result[0], backend, result[2], result, backend_stats)
+            if _is_better(candidate, best):
+                best = candidate
+            if backend in EXACT_BACKENDS and _is_better(candidate, best_exact):
+                best_exact = candidate
+            # Optimal bar count reached - best has the same bars, at most less waste
+            proven = backend_stats.get('status') == 'OPTIMAL' or result[0] <= lower_bound
+    finally:
+        for process in processes.values():
+            if process.is_alive():
+                process.terminate()
+        for process in processes.values():
+            process.join(timeout=1)
+        results.close()
+
+    if stats is not None:
+        if best is not None:
+            stats.update(best[4])
+            stats['solver'] = f"portfolio → {best[4].get('solver', best[1])}"
+        else:
+            stats.update({'solver': 'portfolio', 'backend': None, 'status': 'NOT_SOLVED'})
+        stats['race_time'] = time.perf_counter() - race_start
+        stats['portfolio'] = {
+            backend: {
+                'status': reports[backend].get('status', 'ERROR') if backend in reports else 'CANCELLED',
+                'objective': reports.get(backend, {}).get('objective'),
+                'solve_time': reports.get(backend, {}).get('solve_time'),
+                'error': reports.get(backend, {}).get('error')
+            }
+            for backend in backends
+        }
+
+    if best is None:
+        return None
+    if history_file and best_exact is not None:
+        record_winner(instance_class(len(lengths), len(patterns)), best_exact[1], history_file)
+    return best[3]
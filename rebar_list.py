@@ -0,0 +1,73 @@
+#rebar_list.py
+# civileng.serdar@gmail.com
+"""
+Rebar list model - demand rows keyed by Treeview item id
+
+Keeps the GUI list (self.rebar_list) and the Treeview in sync without
+positional lookups: every row gets a stable item id, so deleting a
+selection is one pass over the list instead of an index() search per
+selected row.
+"""
+
+from typing import List, Dict, Iterable, Optional, Tuple
+
+
+class RebarListModel:
+    """Rebar rows in input order with an item id → position index"""
+
+    def __init__(self):
+        self.rows: List[Dict] = []      # shared with the GUI as self.rebar_list
+        self._ids: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._next_id = 0
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def _reindex(self):
+        self._index = {item_id: i for i, item_id in enumerate(self._ids)}
+
+    def extend(self, rows: Iterable[Dict]) -> List[str]:
+        """Append rows, returns their new item ids"""
+        new_ids = []
+        for row in rows:
+            item_id = f"r{self._next_id}"
+            self._next_id += 1
+            self._index[item_id] = len(self.rows)
+            self.rows.append(row)
+            self._ids.append(item_id)
+            new_ids.append(item_id)
+        return new_ids
+
+    def remove(self, item_ids: Iterable[str]) -> int:
+        """Remove rows by item id in one pass, returns number removed"""
+        doomed = {item_id for item_id in item_ids if item_id in self._index}
+        if not doomed:
+            return 0
+
+        kept = [(item_id, row) for item_id, row in zip(self._ids, self.rows)
+                if item_id not in doomed]
+        # Mutate in place - the GUI holds a reference to self.rows
+        self.rows[:] = [row for _, row in kept]
+        self._ids = [item_id for item_id, _ in kept]
+        self._reindex()
+        return len(doomed)
+
+    def clear(self):
+        self.rows.clear()
+        self._ids = []
+        self._index = {}
+
+    def get(self, item_id: str) -> Optional[Dict]:
+        index = self._index.get(item_id)
+        return None if index is None else self.rows[index]
+
+    def items(self, diameter: Optional[int] = None) -> List[Tuple[str, Dict]]:
+        """(item_id, row) pairs in input order, optionally one diameter only"""
+        if diameter is None:
+            return list(zip(self._ids, self.rows))
+        return [(item_id, row) for item_id, row in zip(self._ids, self.rows)
+                if row['diameter'] == diameter]
+
+    def diameters(self) -> List[int]:
+        return sorted({row['diameter'] for row in self.rows})
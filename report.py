@@ -0,0 +1,198 @@
+#report.py
+# civileng.serdar@gmail.com
+"""
+Cutting plan report model
+
+One immutable snapshot of a multi-diameter solve: overall totals,
+per-diameter summaries and every used pattern with its cut lengths
+already resolved. All exports render from this model, so totals are
+computed once and every output shows the same numbers.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Dict, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class PatternRow:
+    """One used cutting pattern"""
+    index: int                              # 1-based, display order
+    count: int                              # number of bars cut this way
+    cuts: Tuple[Tuple[int, int, float], ...]  # ((type_index, pieces, length_m), ...)
+    total: float                            # used length per bar (m)
+    waste: float                            # waste per bar (m)
+    utilization: float                      # % of stock length
+    stock_length: float = 0.0               # stock bar cut (m)
+    open_stacks: int = 0                    # piece stacks open while cutting (sequenced plans)
+    closes: Tuple[float, ...] = ()          # lengths whose stack this pattern completes
+
+    def cuts_text(self, times: str = "×") -> str:
+        """Human readable cut list, e.g. '2×3.50m + 1×4.20m'"""
+        return " + ".join(f"{pieces}{times}{length:.2f}m" for _, pieces, length in self.cuts)
+
+    def cut_sequence(self) -> Tuple[float, ...]:
+        """Every piece of one bar in cutting order (longest first)"""
+        sequence = []
+        for _, pieces, length in sorted(self.cuts, key=lambda c: -c[2]):
+            sequence.extend([length] * pieces)
+        return tuple(sequence)
+
+
+@dataclass(frozen=True)
+class DiameterReport:
+    """Summary and patterns of one diameter"""
+    diameter: int
+    solved: bool
+    bin_capacity: float
+    lengths: Tuple[float, ...]
+    lines: Tuple[int, ...] = ()             # source demand line per length type (1-based)
+    total_demand: float = 0.0
+    theoretical_min: int = 0
+    total_bins: int = 0
+    total_waste: float = 0.0
+    waste_percentage: float = 0.0
+    total_capacity: float = 0.0
+    phase_used: int = 0
+    used_efficiency: float = 0.0
+    patterns: Tuple[PatternRow, ...] = ()
+    stock_mix: Tuple[Tuple[float, int], ...] = ()   # ((stock_length, bars), ...) of multi-stock solves
+    total_cost: Optional[float] = None
+    max_open_stacks: Optional[int] = None   # set when patterns are in cutting order (scheduling.py)
+
+    @property
+    def mixed_stock(self) -> bool:
+        """More than one stock length in this diameter's plan"""
+        return len(self.stock_mix) > 1
+
+
+@dataclass(frozen=True)
+class CuttingPlanReport:
+    """Whole cutting plan - totals over all solved diameters"""
+    created: datetime
+    stock_length: float
+    diameters: Tuple[DiameterReport, ...]
+    total_bars: int
+    total_waste: float
+    total_demand: float
+    total_capacity: float
+    theoretical_total: int
+    waste_percentage: float
+    stocks: Tuple[Tuple[float, float], ...] = ()    # ((length, price per m), ...) if several
+
+    def stock_text(self) -> str:
+        """Stock length(s) for the report header, e.g. '12.0m' or '6m, 12m @1.05/m'"""
+        if not self.stocks:
+            return f"{self.stock_length}m"
+        return ", ".join(f"{length:g}m" + (f" @{price:g}/m" if price != 1.0 else "")
+                         for length, price in self.stocks)
+
+    @property
+    def solved(self) -> Tuple[DiameterReport, ...]:
+        """Diameters with a solution"""
+        return tuple(d for d in self.diameters if d.solved)
+
+
+def _pattern_rows(
+    used_patterns: List[Dict],
+    lengths: List[float],
+    bin_capacity: float
+) -> Tuple[PatternRow, ...]:
+    rows = []
+    for idx, pattern_data in enumerate(used_patterns, 1):
+        cuts = tuple((i, pieces, lengths[i]) for i, pieces in pattern_data['cuts'])
+        total = pattern_data['total']
+        stock = pattern_data.get('stock_length', bin_capacity)
+        rows.append(PatternRow(
+            index=idx,
+            count=pattern_data['count'],
+            cuts=cuts,
+            total=total,
+            waste=pattern_data['waste'],
+            utilization=(total / stock) * 100 if stock else 0.0,
+            stock_length=stock,
+            open_stacks=pattern_data.get('open_stacks', 0),
+            closes=tuple(lengths[i] for i in pattern_data.get('closes', ()))
+        ))
+    return tuple(rows)
+
+
+def build_report(
+    results: Dict[int, Optional[Dict]],
+    demands: Dict[int, Dict],
+    stock_length: float,
+    created: Optional[datetime] = None,
+    stocks: Optional[List] = None
+) -> CuttingPlanReport:
+    """
+    Build the report model from solver output
+
+    Args:
+        results: {diameter: result_dict or None} from solve_multi_diameter_lexicographic
+        demands: The demands passed to the solver ({diameter: {'lengths', 'counts', ...}}),
+            optionally with 'lines' - the source demand line of each length type
+        stock_length: Default stock bar length (m)
+        stocks: The multistock.Stock list of a multi-stock solve, if any
+    """
+    diameters = []
+    total_bars = 0
+    total_waste = 0.0
+    total_demand = 0.0
+    total_capacity = 0.0
+    theoretical_total = 0
+
+    for diameter in sorted(results.keys()):
+        result = results[diameter]
+        demand_data = demands.get(diameter, {})
+        lengths = tuple(demand_data.get('lengths', ()))
+        lines = tuple(demand_data.get('lines', ()))
+        bin_capacity = demand_data.get('bin_capacity', stock_length)
+
+        if not result:
+            diameters.append(DiameterReport(
+                diameter=diameter,
+                solved=False,
+                bin_capacity=bin_capacity,
+                lengths=lengths,
+                lines=lines
+            ))
+            continue
+
+        diameters.append(DiameterReport(
+            diameter=diameter,
+            solved=True,
+            bin_capacity=bin_capacity,
+            lengths=lengths,
+            lines=lines,
+            total_demand=result['total_demand'],
+            theoretical_min=result['theoretical_min'],
+            total_bins=result['total_bins'],
+            total_waste=result['total_waste'],
+            waste_percentage=result['waste_percentage'],
+            total_capacity=result['total_capacity'],
+            phase_used=result['phase_used'],
+            used_efficiency=result.get('used_efficiency', 0.0),
+            patterns=_pattern_rows(result['used_patterns'], lengths, bin_capacity),
+            stock_mix=tuple(result.get('stock_mix', {}).items()),
+            total_cost=result.get('total_cost'),
+            max_open_stacks=result.get('max_open_stacks')
+        ))
+
+        total_bars += result['total_bins']
+        total_waste += result['total_waste']
+        total_demand += result['total_demand']
+        total_capacity += result['total_capacity']
+        theoretical_total += result['theoretical_min']
+
+    return CuttingPlanReport(
+        created=created or datetime.now(),
+        stock_length=stock_length,
+        diameters=tuple(diameters),
+        total_bars=total_bars,
+        total_waste=total_waste,
+        total_demand=total_demand,
+        total_capacity=total_capacity,
+        theoretical_total=theoretical_total,
+        waste_percentage=(total_waste / total_capacity * 100) if total_capacity > 0 else 0,
+        stocks=tuple((s.length, s.price) for s in stocks or ())
+    )
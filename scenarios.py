@@ -0,0 +1,255 @@
+#scenarios.py
+# civileng.serdar@gmail.com
+"""
+Batched what-if scenarios - "plan under ±5/10% demand", "without block B"
+
+All scenarios of a batch are solved together:
+- one pattern pool per diameter, generated for the largest count of every
+  length over all scenarios; each scenario uses the patterns its own
+  counts allow (PatternStore.restrict) instead of generating again
+- scenarios are ordered by demand and split into contiguous chunks, one
+  per worker process; inside a chunk every solve gets the previous
+  (neighbouring) scenario's plan as a MIP start
+
+    rows = evaluate_scenarios(demands, demand_scenarios((-10, -5, 5, 10)))
+    print(format_scenario_table(rows))
+"""
+
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import List, Dict, Optional, Tuple, Iterable
+
+from patterns import PatternStore
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """A change to the base demand"""
+    name: str
+    scale: float = 1.0                              # count factor, rounded up
+    diameters: Optional[Tuple[int, ...]] = None     # scale only these diameters (None = all)
+    exclude_lines: Tuple[int, ...] = ()             # drop these demand lines (e.g. one element)
+    add: Tuple[Tuple[int, float, int], ...] = ()    # extra (diameter, length, count)
+
+
+BASE = Scenario('base')
+
+SCENARIO_FIELDS = [
+    'scenario', 'bars', 'waste', 'waste_percentage', 'demand', 'delta_bars',
+    'delta_waste', 'unsolved', 'time'
+]
+
+
+def demand_scenarios(percentages: Iterable[float] = (-10, -5, 5, 10)) -> List[Scenario]:
+    """One scenario per demand change in percent, e.g. '+5%' scales every count by 1.05"""
+    return [Scenario(f"{p:+g}%", 1 + p / 100) for p in percentages]
+
+
+def without_lines(name: str, lines: Iterable[int]) -> Scenario:
+    """Scenario without some demand lines (rows of the rebar list, e.g. one element)"""
+    return Scenario(name, exclude_lines=tuple(lines))
+
+
+# ============================================================================
+# DEMAND ALIGNMENT
+# ============================================================================
+
+def _union_lengths(base: Dict[int, Dict], scenarios: List[Scenario]) -> Dict[int, List[float]]:
+    """Per diameter: every length of the base and of the scenario additions"""
+    union = {d: list(dict.fromkeys(float(l) for l in data['lengths'])) for d, data in base.items()}
+    for scenario in scenarios:
+        for diameter, length, _ in scenario.add:
+            lengths = union.setdefault(diameter, [])
+            if float(length) not in lengths:
+                lengths.append(float(length))
+    return union
+
+
+def apply_scenario(
+    base: Dict[int, Dict],
+    scenario: Scenario,
+    union: Dict[int, List[float]]
+) -> Dict[int, List[int]]:
+    """Scenario counts per diameter, aligned to the union lengths (0 = not needed)"""
+    if scenario.exclude_lines and any('lines' not in data for data in base.values()):
+        raise ValueError(f"Scenario {scenario.name!r} excludes lines but the demand has no 'lines'")
+
+    excluded = set(scenario.exclude_lines)
+    counts = {d: [0] * len(lengths) for d, lengths in union.items()}
+    for diameter, data in base.items():
+        index = {l: i for i, l in enumerate(union[diameter])}
+        scaled = scenario.diameters is None or diameter in scenario.diameters
+        lines = data.get('lines', [None] * len(data['lengths']))
+        for length, count, line in zip(data['lengths'], data['counts'], lines):
+            if line in excluded:
+                continue
+            if scaled:
+                count = math.ceil(count * scenario.scale - 1e-9)
+            counts[diameter][index[float(length)]] += max(count, 0)
+    for diameter, length, count in scenario.add:
+        counts[diameter][union[diameter].index(float(length))] += count
+    return counts
+
+
+# ============================================================================
+# SOLVING
+# ============================================================================
+
+def _solve_chunk(task: Tuple) -> List[Dict]:
+    """
+    Process pool entry point - a run of neighbouring scenarios, solved in
+    order with the previous plan of each diameter as MIP start
+    """
+    from calculations import solve_with_lexicographic_optimization, generate_comprehensive_patterns
+
+    chunk, union, pool_counts, pools, bin_capacity, settings = task
+    pool_cache = dict(pools)        # (diameter, efficiency) -> shared pool
+    previous: Dict[int, List[Dict]] = {}
+    outcomes = []
+
+    for name, counts in chunk:
+        start = time.perf_counter()
+        results = {}
+        for diameter, lengths in union.items():
+            needed = counts[diameter]
+            if not any(needed):
+                continue
+
+            def pool(eff: float, diameter=diameter, needed=needed) -> PatternStore:
+                key = (diameter, eff)
+                if key not in pool_cache:
+                    pool_cache[key] = generate_comprehensive_patterns(
+                        union[diameter], pool_counts[diameter], bin_capacity,
+                        min_efficiency=eff, max_patterns=settings['max_patterns'])
+                return pool_cache[key].restrict(needed)
+
+            result = solve_with_lexicographic_optimization(
+                lengths=lengths,
+                counts=needed,
+                bin_capacity=bin_capacity,
+                verbose=False,
+                pattern_pool=pool,
+                hint=previous.get(diameter),
+                **settings
+            )
+            results[diameter] = result
+            if result:
+                previous[diameter] = result['used_patterns']
+        outcomes.append({'scenario': name, 'results': results,
+                         'time': time.perf_counter() - start})
+    return outcomes
+
+
+def _chunks(items: List, n: int) -> List[List]:
+    size = math.ceil(len(items) / n)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def evaluate_scenarios(
+    base: Dict[int, Dict],
+    scenarios: List[Scenario],
+    bin_capacity: float = 12.0,
+    min_efficiency: float = 0.85,
+    max_patterns: int = 1000,
+    time_limit_ms: int = 30000,
+    solver_backend: str = 'SCIP',
+    max_workers: Optional[int] = None,
+    include_base: bool = True
+) -> List[Dict]:
+    """
+    Solve the base demand and every scenario as one batch
+
+    Args:
+        base: {diameter: {'lengths', 'counts'}}, with 'lines' for exclude_lines
+        scenarios: Scenario list, see demand_scenarios / without_lines
+
+    Returns one row per scenario (SCENARIO_FIELDS, deltas against the base)
+    plus 'results' - the per-diameter result dicts - in the given order.
+    """
+    from calculations import generate_comprehensive_patterns
+
+    if not base:
+        raise ValueError("demands cannot be empty!")
+    scenarios = ([BASE] if include_base else []) + list(scenarios)
+    union = _union_lengths(base, scenarios)
+    demands = [(s.name, apply_scenario(base, s, union)) for s in scenarios]
+
+    # One shared pool per diameter at the first efficiency level, sized for
+    # the largest count of every length over the batch
+    pool_counts = {d: [max(c[d][i] for _, c in demands) for i in range(len(lengths))]
+                   for d, lengths in union.items()}
+    pools = {}
+    for diameter, lengths in union.items():
+        if any(pool_counts[diameter]):
+            pools[(diameter, min_efficiency)] = generate_comprehensive_patterns(
+                lengths, pool_counts[diameter], bin_capacity,
+                min_efficiency=min_efficiency, max_patterns=max_patterns)
+
+    settings = {
+        'min_efficiency': min_efficiency,
+        'max_patterns': max_patterns,
+        'phase1_time_limit_ms': time_limit_ms,
+        'phase2_time_limit_ms': time_limit_ms,
+        'solver_backend': solver_backend
+    }
+
+    # Neighbours by total demand, so warm starts come from similar plans
+    def total(item):
+        _, counts = item
+        return sum(l * c for d, lengths in union.items() for l, c in zip(lengths, counts[d]))
+    ordered = sorted(demands, key=total)
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, len(ordered)))
+    tasks = [(chunk, union, pool_counts, pools, bin_capacity, settings)
+             for chunk in _chunks(ordered, max_workers)]
+
+    if max_workers == 1:
+        outcomes = [o for task in tasks for o in _solve_chunk(task)]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            outcomes = [o for part in executor.map(_solve_chunk, tasks) for o in part]
+
+    by_name = {o['scenario']: o for o in outcomes}
+    demand_by_name = {name: total((name, counts)) for name, counts in demands}
+    rows = []
+    for scenario in scenarios:
+        outcome = by_name[scenario.name]
+        solved = [r for r in outcome['results'].values() if r]
+        capacity = sum(r['total_capacity'] for r in solved)
+        rows.append({
+            'scenario': scenario.name,
+            'bars': sum(r['total_bins'] for r in solved),
+            'waste': sum(r['total_waste'] for r in solved),
+            'waste_percentage': sum(r['total_waste'] for r in solved) / capacity * 100 if capacity else 0.0,
+            'demand': demand_by_name[scenario.name],
+            'delta_bars': None,
+            'delta_waste': None,
+            'unsolved': sorted(d for d, r in outcome['results'].items() if not r),
+            'time': outcome['time'],
+            'results': outcome['results']
+        })
+
+    reference = next((r for r in rows if r['scenario'] == BASE.name), None) if include_base else None
+    if reference is not None:
+        for row in rows:
+            row['delta_bars'] = row['bars'] - reference['bars']
+            row['delta_waste'] = row['waste'] - reference['waste']
+    return rows
+
+
+def format_scenario_table(rows: List[Dict]) -> str:
+    """Plain text comparison of bars and waste across scenarios"""
+    lines = [f"{'SCENARIO':<20} {'DEMAND(m)':<11} {'BARS':<8} {'ΔBARS':<7} {'WASTE(m)':<10} "
+             f"{'ΔWASTE':<9} {'WASTE%':<8} NOTE", "-" * 85]
+    for row in rows:
+        delta_bars = f"{row['delta_bars']:+d}" if row['delta_bars'] is not None else '-'
+        delta_waste = f"{row['delta_waste']:+.2f}" if row['delta_waste'] is not None else '-'
+        note = f"no solution: Ø{', Ø'.join(map(str, row['unsolved']))}" if row['unsolved'] else ''
+        lines.append(f"{row['scenario']:<20} {row['demand']:<11.2f} {row['bars']:<8} {delta_bars:<7} "
+                     f"{row['waste']:<10.2f} {delta_waste:<9} {row['waste_percentage']:<8.2f} {note}")
+    return "\n".join(lines)
@@ -0,0 +1,480 @@
+#scheduling.py
+# civileng.serdar@gmail.com
+"""
+Cutting sequence - the order in which the shear line cuts the plan
+
+Every piece length of a diameter is collected on its own stack (bundle).
+A stack is open from the first bar that cuts that length until the last
+one; the fewer stacks open at once, the less floor space and sorting the
+line needs. The sequence is chosen lexicographically:
+
+1. Diameter changeovers - each diameter is cut as one block, ascending,
+   so a plan with n diameters changes bundle n - 1 times (the minimum;
+   stacks of different diameters never overlap)
+2. Maximum open stacks inside each block - greedy construction, then an
+   optional local search (pattern moves and segment reversals)
+3. Total stack-time (sum of open stacks over the steps) and stock length
+   changes as tie-breaks
+
+All bars of one pattern are cut back to back. apply_sequence reorders
+used_patterns accordingly, so reports and bar exports follow production.
+
+    schedule = schedule_cutting(results)
+    results = apply_sequence(results, schedule)
+    print(format_sequence(schedule))
+
+Several machines - balance_machines splits the plan into per-machine work
+lists (LPT assignment, then moves and swaps off the busiest machine):
+
+    machines = [Machine('Shear 1', (8, 10, 12), 20, 2), Machine('Shear 2', None, 15, 3)]
+    print(format_work_lists(balance_machines(results, machines)))
+"""
+
+import math
+import random
+import time
+from dataclasses import dataclass
+from typing import List, Dict, Optional, Tuple
+
+
+STEP_FIELDS = [
+    'step', 'diameter', 'pattern', 'bars', 'stock_length', 'cuts', 'waste',
+    'opens', 'closes', 'open_stacks'
+]
+
+
+# ============================================================================
+# OPEN STACKS
+# ============================================================================
+
+def _stacks(used_patterns: List[Dict]) -> List[Tuple[int, ...]]:
+    """Length types (stacks) of every pattern"""
+    return [tuple(sorted(i for i, pieces in p['cuts'] if pieces > 0)) for p in used_patterns]
+
+
+def open_stacks_profile(stacks: List[Tuple[int, ...]], order: List[int]) -> List[int]:
+    """Open stacks while each pattern of the order is cut"""
+    first: Dict[int, int] = {}
+    last: Dict[int, int] = {}
+    for position, p in enumerate(order):
+        for s in stacks[p]:
+            first.setdefault(s, position)
+            last[s] = position
+    change = [0] * (len(order) + 1)
+    for s, start in first.items():
+        change[start] += 1
+        change[last[s] + 1] -= 1
+    profile = []
+    running = 0
+    for position in range(len(order)):
+        running += change[position]
+        profile.append(running)
+    return profile
+
+
+def _cost(stacks: List[Tuple[int, ...]], stock: List[float], order: List[int]) -> Tuple[int, int, int]:
+    """(max open stacks, stack-time, stock changes) - compared lexicographically"""
+    profile = open_stacks_profile(stacks, order)
+    changes = sum(1 for a, b in zip(order, order[1:]) if stock[a] != stock[b])
+    return (max(profile, default=0), sum(profile), changes)
+
+
+# ============================================================================
+# SEQUENCING ONE DIAMETER
+# ============================================================================
+
+def _greedy_order(stacks: List[Tuple[int, ...]], stock: List[float]) -> List[int]:
+    """
+    Next pattern: fewest new stacks minus stacks it completes, then
+    fewest new stacks, then the same stock length as the previous one
+    """
+    remaining_uses: Dict[int, int] = {}
+    for pattern_stacks in stacks:
+        for s in pattern_stacks:
+            remaining_uses[s] = remaining_uses.get(s, 0) + 1
+
+    pending = set(range(len(stacks)))
+    opened = set()
+    order = []
+    while pending:
+        previous = stock[order[-1]] if order else None
+
+        def score(p: int) -> Tuple[int, int, int, int]:
+            new = sum(1 for s in stacks[p] if s not in opened)
+            closes = sum(1 for s in stacks[p] if remaining_uses[s] == 1)
+            return (new - closes, new, stock[p] != previous, p)
+
+        best = min(pending, key=score)
+        pending.remove(best)
+        order.append(best)
+        for s in stacks[best]:
+            opened.add(s)
+            remaining_uses[s] -= 1
+    return order
+
+
+def _local_search(
+    stacks: List[Tuple[int, ...]],
+    stock: List[float],
+    order: List[int],
+    deadline: float,
+    max_iterations: int,
+    seed: int
+) -> List[int]:
+    """First-improvement search over pattern moves and segment reversals"""
+    n = len(order)
+    if n < 3:
+        return order
+    rng = random.Random(seed)
+    best = _cost(stacks, stock, order)
+    for iteration in range(max_iterations):
+        if iteration % 64 == 0 and time.perf_counter() > deadline:
+            break
+        i, j = sorted(rng.sample(range(n), 2))
+        if rng.random() < 0.5:
+            candidate = order[:i] + order[i:j + 1][::-1] + order[j + 1:]
+        else:
+            candidate = order[:]
+            candidate.insert(j, candidate.pop(i))
+        cost = _cost(stacks, stock, candidate)
+        if cost < best:
+            order, best = candidate, cost
+    return order
+
+
+def sequence_patterns(
+    used_patterns: List[Dict],
+    local_search: bool = True,
+    time_limit: float = 0.5,
+    max_iterations: int = 20000,
+    seed: int = 0
+) -> List[int]:
+    """
+    Cutting order of one diameter's used_patterns (indices into the list)
+
+    time_limit: Local search budget in seconds
+    """
+    stacks = _stacks(used_patterns)
+    stock = [p.get('stock_length', 0.0) for p in used_patterns]
+    order = _greedy_order(stacks, stock)
+    if local_search:
+        order = _local_search(stacks, stock, order, time.perf_counter() + time_limit,
+                              max_iterations, seed)
+    return order
+
+
+# ============================================================================
+# WHOLE PLAN
+# ============================================================================
+
+def schedule_cutting(
+    results: Dict[int, Optional[Dict]],
+    demands: Optional[Dict[int, Dict]] = None,
+    local_search: bool = True,
+    time_limit: float = 0.5
+) -> Dict:
+    """
+    Production sequence of a solved plan
+
+    Args:
+        results: {diameter: result_dict or None} from solve_multi_diameter_lexicographic
+        demands: The solver demands - gives lengths to the steps (type indices otherwise)
+        time_limit: Local search budget per diameter in seconds
+
+    Returns {'steps', 'orders', 'max_open_stacks', 'open_stacks', 'changeovers',
+    'stock_changes', 'bars'}: steps (STEP_FIELDS) in cutting order with
+    (length, pieces) cuts, orders the used_patterns indices per diameter,
+    open_stacks the maximum per diameter.
+    """
+    steps = []
+    orders = {}
+    open_stacks = {}
+    stock_changes = 0
+    bars = 0
+    diameters = [d for d in sorted(results) if results[d]]
+
+    for diameter in diameters:
+        used = results[diameter]['used_patterns']
+        lengths = (demands or {}).get(diameter, {}).get('lengths')
+        order = sequence_patterns(used, local_search, time_limit)
+        stacks = _stacks(used)
+        stock = [p.get('stock_length', 0.0) for p in used]
+        profile = open_stacks_profile(stacks, order)
+        last_position = {}
+        for position, p in enumerate(order):
+            for s in stacks[p]:
+                last_position[s] = position
+
+        def label(s: int) -> float:
+            return float(lengths[s]) if lengths else s
+
+        seen = set()
+        for position, p in enumerate(order):
+            pattern = used[p]
+            steps.append({
+                'step': len(steps) + 1,
+                'diameter': diameter,
+                'pattern': p,
+                'bars': pattern['count'],
+                'stock_length': pattern.get('stock_length'),
+                'cuts': [(label(i), pieces) for i, pieces in pattern['cuts']],
+                'waste': pattern['waste'],
+                'opens': [label(s) for s in stacks[p] if s not in seen],
+                'closes': [label(s) for s in stacks[p] if last_position[s] == position],
+                'open_stacks': profile[position]
+            })
+            seen.update(stacks[p])
+            bars += pattern['count']
+
+        orders[diameter] = order
+        open_stacks[diameter] = max(profile, default=0)
+        stock_changes += _cost(stacks, stock, order)[2]
+
+    return {
+        'steps': steps,
+        'orders': orders,
+        'max_open_stacks': max(open_stacks.values(), default=0),
+        'open_stacks': open_stacks,
+        'changeovers': max(len(diameters) - 1, 0),
+        'stock_changes': stock_changes,
+        'bars': bars
+    }
+
+
+def apply_sequence(results: Dict[int, Optional[Dict]], schedule: Dict) -> Dict[int, Optional[Dict]]:
+    """
+    Copy of results with used_patterns in cutting order; every pattern gets
+    'open_stacks' and 'closes' (type indices of the stacks it completes),
+    every result 'max_open_stacks'
+    """
+    sequenced = {}
+    for diameter, result in results.items():
+        order = schedule['orders'].get(diameter)
+        if not result or order is None:
+            sequenced[diameter] = result
+            continue
+        used = result['used_patterns']
+        stacks = _stacks(used)
+        profile = open_stacks_profile(stacks, order)
+        last_position = {}
+        for position, p in enumerate(order):
+            for s in stacks[p]:
+                last_position[s] = position
+
+        patterns = []
+        for position, p in enumerate(order):
+            pattern = dict(used[p])
+            pattern['open_stacks'] = profile[position]
+            pattern['closes'] = [s for s in stacks[p] if last_position[s] == position]
+            patterns.append(pattern)
+        sequenced[diameter] = dict(result, used_patterns=patterns,
+                                   max_open_stacks=max(profile, default=0))
+    return sequenced
+
+
+def format_sequence(schedule: Dict) -> str:
+    """Plain text production sequence, one line per pattern run"""
+    lines = [f"{'STEP':<6} {'DIAM':<6} {'BARS':<6} {'CUTS':<34} {'OPEN':<6} COMPLETES", "-" * 85]
+    previous = None
+    for step in schedule['steps']:
+        if previous is not None and step['diameter'] != previous:
+            lines.append(f"{'':<6} -- change to Ø{step['diameter']}mm --")
+        previous = step['diameter']
+        cuts = " + ".join(f"{pieces}×{_length_text(length)}" for length, pieces in step['cuts'])
+        completes = ", ".join(_length_text(length) for length in step['closes'])
+        lines.append(f"{step['step']:<6} Ø{step['diameter']:<5} {step['bars']:<6} {cuts:<34} "
+                     f"{step['open_stacks']:<6} {completes}")
+    lines.append("-" * 85)
+    lines.append(f"Max open stacks: {schedule['max_open_stacks']} | "
+                 f"Diameter changeovers: {schedule['changeovers']} | "
+                 f"Stock changes: {schedule['stock_changes']} | Bars: {schedule['bars']}")
+    return "\n".join(lines)
+
+
+def _length_text(length) -> str:
+    return f"{length:.2f}m" if isinstance(length, float) else f"#{length}"
+
+
+# ============================================================================
+# MACHINES
+# ============================================================================
+
+@dataclass(frozen=True)
+class Machine:
+    """One shear / bending machine"""
+    name: str
+    diameters: Optional[Tuple[int, ...]] = None     # diameters it can cut (None = all)
+    cutting_rate: float = 20.0                      # cuts per minute
+    setup_time: float = 2.0                         # minutes per job (new pattern or bundle)
+
+    def can_cut(self, diameter: int) -> bool:
+        return self.diameters is None or diameter in self.diameters
+
+    def job_time(self, job: Dict) -> float:
+        """Minutes for one job: setup plus one cut per piece"""
+        return self.setup_time + job['bars'] * job['pieces'] / self.cutting_rate
+
+
+def _jobs(results: Dict[int, Optional[Dict]], machines: List[Machine]) -> List[Dict]:
+    """
+    One job per pattern run, in the plan's cutting order. A run longer
+    than an even share of the whole plan is split so it can be shared.
+    """
+    runs = []
+    for diameter in sorted(results):
+        result = results[diameter]
+        if not result:
+            continue
+        if not any(m.can_cut(diameter) for m in machines):
+            raise ValueError(f"No machine can cut Ø{diameter}mm!")
+        for position, pattern in enumerate(result['used_patterns']):
+            runs.append({
+                'diameter': diameter,
+                'pattern': position + 1,            # report numbering
+                'bars': pattern['count'],
+                'pieces': sum(pieces for _, pieces in pattern['cuts']),
+                'cuts': pattern['cuts'],
+                'stock_length': pattern.get('stock_length')
+            })
+
+    rate = sum(m.cutting_rate for m in machines)
+    share = sum(r['bars'] * r['pieces'] for r in runs) / rate     # minutes, all machines together
+    jobs = []
+    for run in runs:
+        fastest = max(m.cutting_rate for m in machines if m.can_cut(run['diameter']))
+        parts = min(run['bars'], len(machines),
+                    max(1, math.ceil(run['bars'] * run['pieces'] / fastest / max(share, 1e-9))))
+        base, extra = divmod(run['bars'], parts)
+        for k in range(parts):
+            jobs.append(dict(run, bars=base + (1 if k < extra else 0), part=k + 1, parts=parts))
+    return jobs
+
+
+def _improve(
+    jobs: List[Dict],
+    machines: List[Machine],
+    assignment: List[int],
+    max_rounds: int
+) -> List[int]:
+    """Move or swap jobs off the busiest machine while the makespan drops"""
+    times = [[m.job_time(job) if m.can_cut(job['diameter']) else math.inf for m in machines]
+             for job in jobs]
+    loads = [0.0] * len(machines)
+    for j, m in enumerate(assignment):
+        loads[m] += times[j][m]
+
+    for _ in range(max_rounds):
+        busiest = max(range(len(machines)), key=lambda m: loads[m])
+        makespan = loads[busiest]
+        best = None     # (new pair maximum, move)
+        for j in (j for j, m in enumerate(assignment) if m == busiest):
+            for other in range(len(machines)):
+                if other == busiest or times[j][other] == math.inf:
+                    continue
+                # Move j
+                pair = max(makespan - times[j][busiest], loads[other] + times[j][other])
+                if pair < makespan - 1e-9 and (best is None or pair < best[0]):
+                    best = (pair, (j, other, None))
+                # Swap j with a job k of the other machine
+                for k in (k for k, m in enumerate(assignment) if m == other):
+                    if times[k][busiest] == math.inf:
+                        continue
+                    pair = max(makespan - times[j][busiest] + times[k][busiest],
+                               loads[other] - times[k][other] + times[j][other])
+                    if pair < makespan - 1e-9 and (best is None or pair < best[0]):
+                        best = (pair, (j, other, k))
+        if best is None:
+            break
+        j, other, k = best[1]
+        loads[busiest] += -times[j][busiest]
+        loads[other] += times[j][other]
+        assignment[j] = other
+        if k is not None:
+            loads[other] -= times[k][other]
+            loads[busiest] += times[k][busiest]
+            assignment[k] = busiest
+    return assignment
+
+
+def balance_machines(
+    results: Dict[int, Optional[Dict]],
+    machines: List[Machine],
+    improve: bool = True,
+    max_rounds: int = 1000
+) -> Dict:
+    """
+    Assign the plan to machines, minimizing the makespan
+
+    Jobs (pattern runs, split when very long) are taken longest first and
+    given to the eligible machine that finishes them earliest (LPT); then
+    jobs are moved or swapped off the busiest machine while that lowers
+    the makespan. Each work list keeps the plan's cutting order (see
+    apply_sequence), diameter by diameter.
+
+    Returns {'machines': [{'machine', 'jobs', 'load', 'bars'}, ...],
+    'makespan', 'lower_bound'} - times in minutes.
+    """
+    if not machines:
+        raise ValueError("No machines given!")
+    jobs = _jobs(results, machines)
+
+    assignment = [0] * len(jobs)
+    loads = [0.0] * len(machines)
+    fastest = [min(m.job_time(job) for m in machines if m.can_cut(job['diameter'])) for job in jobs]
+    for j in sorted(range(len(jobs)), key=lambda j: -fastest[j]):
+        eligible = [m for m, machine in enumerate(machines) if machine.can_cut(jobs[j]['diameter'])]
+        best = min(eligible, key=lambda m: (loads[m] + machines[m].job_time(jobs[j]), m))
+        assignment[j] = best
+        loads[best] += machines[best].job_time(jobs[j])
+
+    if improve:
+        assignment = _improve(jobs, machines, assignment, max_rounds)
+
+    work_lists = []
+    for m, machine in enumerate(machines):
+        own = [dict(jobs[j], minutes=machine.job_time(jobs[j]))
+               for j in range(len(jobs)) if assignment[j] == m]      # jobs are in cutting order
+        work_lists.append({
+            'machine': machine.name,
+            'jobs': own,
+            'load': sum(job['minutes'] for job in own),
+            'bars': sum(job['bars'] for job in own)
+        })
+
+    # Longest single job; then per group of machines (the ones eligible for
+    # some diameter): the jobs only that group can cut, at their best time
+    # spread evenly, or their cuts at the group's combined rate without setups
+    eligible = {d: frozenset(m for m, machine in enumerate(machines) if machine.can_cut(d))
+                for d in {job['diameter'] for job in jobs}}
+    lower_bound = max(fastest, default=0.0)
+    for group in set(eligible.values()):
+        members = [j for j, job in enumerate(jobs) if eligible[job['diameter']] <= group]
+        lower_bound = max(
+            lower_bound,
+            sum(fastest[j] for j in members) / len(group),
+            sum(jobs[j]['bars'] * jobs[j]['pieces'] for j in members)
+            / sum(machines[m].cutting_rate for m in group)
+        )
+    return {
+        'machines': work_lists,
+        'makespan': max((w['load'] for w in work_lists), default=0.0),
+        'lower_bound': lower_bound
+    }
+
+
+def format_work_lists(balance: Dict) -> str:
+    """Plain text work list per machine"""
+    lines = []
+    for work in balance['machines']:
+        lines.append(f"{work['machine']}: {len(work['jobs'])} jobs, {work['bars']} bars, "
+                     f"{work['load']:.1f} min")
+        lines.append("-" * 85)
+        for job in work['jobs']:
+            label = f"Pattern {job['pattern']}"
+            if job['parts'] > 1:
+                label += f" ({job['part']}/{job['parts']})"
+            lines.append(f"  Ø{job['diameter']:<4} {label:<20} {job['bars']:>4} bars  "
+                         f"{job['minutes']:6.1f} min")
+        lines.append("")
+    lines.append(f"Makespan: {balance['makespan']:.1f} min (lower bound {balance['lower_bound']:.1f} min)")
+    return "\n".join(lines)
@@ -0,0 +1,305 @@
+#sweep.py
+# civileng.serdar@gmail.com
+"""
+Stock length sweep - which stock length is cheapest for this project?
+
+Every (diameter, stock length) candidate is solved with the regular
+lexicographic engine in a process pool. Work that does not depend on the
+stock length (demand totals, sorted piece lengths for the bounds) is done
+once per diameter, solved candidates are cached for the session (a second
+sweep with other prices re-solves nothing), and candidates are started in
+order of their cost lower bound, one per free worker. A best-fit-decreasing
+packing gives every stock length a feasible cost up front; that and every
+fully solved stock length set the cost to beat, and a candidate whose
+bound cannot beat it is skipped before it is started.
+"""
+
+import bisect
+import math
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import List, Dict, Optional, Tuple
+
+
+DEFAULT_STOCK_LENGTHS = (6.0, 9.0, 12.0, 14.0)
+CACHE_SIZE = 512
+
+SWEEP_FIELDS = [
+    'diameter', 'stock_length', 'price', 'status', 'bars', 'lower_bound',
+    'waste', 'waste_percentage', 'cost', 'cost_bound', 'time', 'cached'
+]
+
+_cache: 'OrderedDict[Tuple, Optional[Dict]]' = OrderedDict()
+
+
+def stock_range(start: float, stop: float, step: float = 0.5) -> List[float]:
+    """Stock lengths from start to stop (inclusive), e.g. stock_range(6, 14, 1)"""
+    n = int(math.floor((stop - start) / step + 1e-9))
+    return [round(start + i * step, 3) for i in range(n + 1)]
+
+
+def clear_cache():
+    _cache.clear()
+
+
+# ============================================================================
+# LENGTH-INDEPENDENT PRECOMPUTATION
+# ============================================================================
+
+class _DemandProfile:
+    """Per diameter: totals and sorted piece lengths for the bar lower bound"""
+
+    def __init__(self, lengths: List[float], counts: List[int]):
+        self.lengths = tuple(float(l) for l in lengths)
+        self.counts = tuple(int(c) for c in counts)
+        self.total_demand = sum(l * c for l, c in zip(self.lengths, self.counts))
+        self.longest = max(self.lengths)
+        order = sorted(range(len(self.lengths)), key=lambda i: self.lengths[i])
+        self._sorted = [self.lengths[i] for i in order]
+        self._pieces_above = [0] * (len(order) + 1)     # pieces from sorted index k upwards
+        for k in range(len(order) - 1, -1, -1):
+            self._pieces_above[k] = self._pieces_above[k + 1] + self.counts[order[k]]
+
+    def lower_bound(self, stock_length: float) -> int:
+        """max(ceil(demand / L), pieces longer than L/2) - no two of those share a bar"""
+        continuous = math.ceil(self.total_demand / stock_length - 1e-9)
+        long_pieces = self._pieces_above[bisect.bisect_right(self._sorted, stock_length / 2)]
+        return max(continuous, long_pieces)
+
+    def upper_bound(self, stock_length: float) -> int:
+        """Bars of a best-fit-decreasing packing - a feasible plan, milliseconds to build"""
+        free: List[float] = []      # remaining space of the open bars, ascending
+        for length, count in sorted(zip(self.lengths, self.counts), reverse=True):
+            for _ in range(count):
+                k = bisect.bisect_left(free, length - 1e-9)
+                space = free.pop(k) if k < len(free) else stock_length
+                bisect.insort(free, space - length)
+        return len(free)
+
+
+# ============================================================================
+# SOLVING
+# ============================================================================
+
+def _solve_candidate(task: Tuple) -> Dict:
+    """Process pool entry point - one diameter at one stock length"""
+    from calculations import solve_packing_lexicographic
+
+    lengths, counts, stock_length, settings = task
+    start = time.perf_counter()
+    result = solve_packing_lexicographic(
+        lengths=list(lengths),
+        counts=list(counts),
+        bin_capacity=stock_length,
+        verbose=False,
+        print_output=False,
+        **settings
+    )
+    if not result:
+        return {'status': 'no_solution', 'time': time.perf_counter() - start}
+    return {
+        'status': 'solved',
+        'bars': result['total_bins'],
+        'waste': result['total_waste'],
+        'waste_percentage': result['waste_percentage'],
+        'time': time.perf_counter() - start
+    }
+
+
+def sweep_stock_lengths(
+    demands: Dict[int, Dict],
+    stock_lengths=DEFAULT_STOCK_LENGTHS,
+    prices: Optional[Dict[float, float]] = None,
+    min_efficiency: float = 0.85,
+    max_patterns: int = 1000,
+    time_limit_ms: int = 30000,
+    solver_backend: str = 'SCIP',
+    max_workers: Optional[int] = None,
+    prune: bool = True
+) -> List[Dict]:
+    """
+    Solve every diameter at every stock length
+
+    Args:
+        demands: {diameter: {'lengths', 'counts'}} as for solve_multi_diameter_lexicographic
+        stock_lengths: Candidate stock lengths (m), see stock_range
+        prices: {stock_length: price per metre}, 1.0 if missing
+        prune: Skip stock lengths whose cost lower bound is not below the best known cost
+            (best-fit-decreasing packing or a fully solved stock length)
+
+    Returns one row per (diameter, stock length) with SWEEP_FIELDS;
+    status is 'solved', 'no_solution', 'too_short' (a cut does not fit)
+    or 'pruned'. summarize_sweep turns them into the comparison table.
+    """
+    if not demands:
+        raise ValueError("demands cannot be empty!")
+    prices = prices or {}
+    settings = {
+        'min_efficiency': min_efficiency,
+        'max_patterns': max_patterns,
+        'phase1_time_limit_ms': time_limit_ms,
+        'phase2_time_limit_ms': time_limit_ms,
+        'solver_backend': solver_backend
+    }
+    settings_key = tuple(sorted(settings.items()))
+    profiles = {d: _DemandProfile(data['lengths'], data['counts']) for d, data in demands.items()}
+
+    rows: Dict[Tuple[int, float], Dict] = {}
+    bounds: Dict[float, float] = {}
+    tasks: Dict[float, List[int]] = {}
+    for stock_length in sorted({float(s) for s in stock_lengths}):
+        price = prices.get(stock_length, 1.0)
+        bounds[stock_length] = 0.0
+        tasks[stock_length] = []
+        for diameter, profile in sorted(profiles.items()):
+            row = dict.fromkeys(SWEEP_FIELDS)
+            row.update(diameter=diameter, stock_length=stock_length, price=price, cached=False)
+            rows[(diameter, stock_length)] = row
+            if profile.longest > stock_length:
+                row['status'] = 'too_short'
+                bounds[stock_length] = math.inf
+                continue
+            row['lower_bound'] = profile.lower_bound(stock_length)
+            row['cost_bound'] = row['lower_bound'] * stock_length * price
+            bounds[stock_length] += row['cost_bound']
+
+            key = (profile.lengths, profile.counts, stock_length, settings_key)
+            if key in _cache:
+                _cache.move_to_end(key)
+                row.update(_cache[key], cached=True)
+            else:
+                tasks[stock_length].append(diameter)
+
+    # Cheapest bound first - the first complete candidates set the bar to beat
+    order = sorted((s for s in tasks if bounds[s] < math.inf), key=lambda s: bounds[s])
+    best = math.inf
+
+    # Feasible cost of every stock length - prunes before anything is solved.
+    # The stock length that holds it is never pruned (its bound may equal it).
+    incumbent = None
+    if prune:
+        for stock_length in order:
+            cost = sum(profile.upper_bound(stock_length) * stock_length * rows[(d, stock_length)]['price']
+                       for d, profile in profiles.items())
+            if cost < best - 1e-9:
+                best, incumbent = cost, stock_length
+
+    def hopeless(stock_length: float) -> bool:
+        return prune and stock_length != incumbent and bounds[stock_length] >= best - 1e-9
+
+    def finish(stock_length: float):
+        nonlocal best
+        group = [rows[(d, stock_length)] for d in profiles]
+        if all(r['status'] == 'solved' for r in group):
+            for r in group:
+                r['cost'] = r['bars'] * stock_length * r['price']
+            best = min(best, sum(r['cost'] for r in group))
+
+    def store(stock_length: float, diameter: int, outcome: Dict):
+        profile = profiles[diameter]
+        key = (profile.lengths, profile.counts, stock_length, settings_key)
+        _cache[key] = outcome
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+        rows[(diameter, stock_length)].update(outcome)
+
+    for stock_length in order:
+        if not tasks[stock_length]:
+            finish(stock_length)
+
+    pending = [s for s in order if tasks[s]]
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, sum(len(tasks[s]) for s in pending) or 1))
+
+    if max_workers == 1:
+        for stock_length in pending:
+            if hopeless(stock_length):
+                continue
+            for diameter in tasks[stock_length]:
+                store(stock_length, diameter,
+                      _solve_candidate((profiles[diameter].lengths, profiles[diameter].counts,
+                                        stock_length, settings)))
+            finish(stock_length)
+    else:
+        # Candidates in bound order, started only when a worker is free and
+        # only if their stock length can still beat the best cost
+        queued = [(s, d) for s in pending for d in tasks[s]]
+        remaining = {s: len(tasks[s]) for s in pending}
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {}
+            while queued or futures:
+                while queued and len(futures) < max_workers:
+                    stock_length, diameter = queued.pop(0)
+                    if hopeless(stock_length):
+                        continue
+                    profile = profiles[diameter]
+                    future = executor.submit(_solve_candidate, (profile.lengths, profile.counts,
+                                                                stock_length, settings))
+                    futures[future] = (stock_length, diameter)
+                if not futures:
+                    break
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stock_length, diameter = futures.pop(future)
+                    store(stock_length, diameter, future.result())
+                    remaining[stock_length] -= 1
+                    if remaining[stock_length] == 0:
+                        finish(stock_length)
+
+    for row in rows.values():
+        if row['status'] is None:
+            row['status'] = 'pruned'
+    return [rows[key] for key in sorted(rows, key=lambda k: (k[1], k[0]))]
+
+
+# ============================================================================
+# COMPARISON TABLE
+# ============================================================================
+
+def summarize_sweep(rows: List[Dict]) -> List[Dict]:
+    """
+    One row per stock length, cheapest first: total bars, waste and cost
+    over all diameters. 'complete' is False when a diameter was pruned,
+    unsolved or too short - cost is then the lower bound, if known.
+    """
+    table = []
+    for stock_length in sorted({r['stock_length'] for r in rows}):
+        group = [r for r in rows if r['stock_length'] == stock_length]
+        complete = all(r['status'] == 'solved' for r in group)
+        feasible = all(r['status'] != 'too_short' for r in group)
+        table.append({
+            'stock_length': stock_length,
+            'price': group[0]['price'],
+            'complete': complete,
+            'status': 'solved' if complete else ('too_short' if not feasible else
+                                                 group[0]['status'] if len({r['status'] for r in group}) == 1
+                                                 else 'partial'),
+            'bars': sum(r['bars'] for r in group) if complete else None,
+            'waste': sum(r['waste'] for r in group) if complete else None,
+            'waste_percentage': (sum(r['waste'] for r in group) /
+                                 sum(r['bars'] * stock_length for r in group) * 100) if complete else None,
+            'cost': sum(r['cost'] for r in group) if complete else None,
+            'cost_bound': sum(r['cost_bound'] for r in group) if feasible else None,
+        })
+    table.sort(key=lambda t: (not t['complete'], t['cost'] if t['complete'] else math.inf,
+                              t['stock_length']))
+    return table
+
+
+def format_sweep_table(rows: List[Dict]) -> str:
+    """Plain text comparison table (per stock length, cheapest first)"""
+    lines = [f"{'STOCK(m)':<10} {'PRICE/m':<9} {'BARS':<8} {'WASTE(m)':<10} {'WASTE%':<8} "
+             f"{'COST':<12} {'COST LB':<12} STATUS", "-" * 85]
+    for t in summarize_sweep(rows):
+        if t['complete']:
+            lines.append(f"{t['stock_length']:<10g} {t['price']:<9g} {t['bars']:<8} "
+                         f"{t['waste']:<10.2f} {t['waste_percentage']:<8.2f} {t['cost']:<12.2f} "
+                         f"{t['cost_bound']:<12.2f} solved")
+        else:
+            bound = f"{t['cost_bound']:.2f}" if t['cost_bound'] is not None else '-'
+            lines.append(f"{t['stock_length']:<10g} {t['price']:<9g} {'-':<8} {'-':<10} {'-':<8} "
+                         f"{'-':<12} {bound:<12} {t['status']}")
+    return "\n".join(lines)